@@ -23,6 +23,19 @@ def parse_args():
             default="report",
             help="report specification"
         )
+        parser.add_argument(
+            "-g", "--graph",
+            type=str,
+            default=None,
+            help="save the new DEG for the what-if analysis"
+        )
+        parser.add_argument(
+            "-n", "--near-critical",
+            type=float,
+            default=None,
+            help="the slack of near-critical edges, i.e., a fraction " \
+                "of the critical path length. None disables it"
+        )
         parser.add_argument(
             "-v", "--view",
             action="store_true",
@@ -65,8 +78,10 @@ def construct_new_graph_formulation(configs, trace):
             graph.model_interaction(inst)
 
     # graph.construct_critical_path_v1()
-    graph.construct_critical_path_v2()
+    graph.construct_critical_path_v2(configs.near_critical)
     graph.generate_report(configs.output)
+    if configs.graph is not None:
+        graph.dump(configs.graph)
     info("trace: {}, graph nodes: {}, graph edges: {}".format(
             trace.benchmark, len(graph.graph.nodes), len(graph.graph.edges)
         )
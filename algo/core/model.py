@@ -1,10 +1,11 @@
 # Author: baichen.bai@alibaba-inc.com
 
 
+import numpy as np
 import networkx as nx
 from enum import Enum
 from copy import deepcopy
-from typing import List, Tuple
+from typing import List, Tuple, Optional
 from collections import OrderedDict
 from utils.thread import WorkerThread
 from algo.core.visualize import Visualization
@@ -12,6 +13,7 @@ from utils.exceptions import UnSupportedException
 from algo.core.instruction import RiscvInstruction
 from utils.utils import info, error, warn, assert_error, \
     Timer
+from algo.core.slack import analyze_slack
 from algo.core.arch_bottleneck import bottleneck as BTNK
 from algo.core.arch_bottleneck import IcacheMiss, Base, \
     DcacheMiss, BPMiss, ROB, LQ, SQ, IntRF, FpRF, \
@@ -1600,7 +1602,41 @@ class Graph(Stats):
                 self.bottleneck[edge.bottleneck.name] += \
                     edge.delay
 
-    def construct_critical_path_v2(self):
+    def slack_analysis(self, epsilon: float):
+        """
+            Forward & backward passes of the longest path w.r.t. `cost`
+            give the slack of each edge, i.e., how much the longest
+            path through the edge is shorter than the critical path.
+            Edges whose slack is within `epsilon` of the critical path
+            length, both in `cost`, are near-critical. The profile of
+            a bottleneck is its maximal delay along a near-critical
+            path, so it is bounded by the critical path length.
+            Resources that are almost critical have zero contribution
+            to the critical path, but they are exposed by the profile.
+        """
+        order = {
+            node: i for i, node in enumerate(
+                nx.topological_sort(self.graph)
+            )
+        }
+        edges = []
+        for u, v in self.edges:
+            edge = self.get_edge(u, v)
+            edges.append((
+                order[u],
+                order[v],
+                edge.cost,
+                edge.delay,
+                BTNK.index(edge.bottleneck.name)
+            ))
+        _, self.slack_threshold, profile = analyze_slack(
+            len(order), edges, len(BTNK), epsilon
+        )
+        self.near_critical = self.contruct_bottleneck()
+        for name, delay in zip(BTNK, profile):
+            self.near_critical[name] = int(delay)
+
+    def construct_critical_path_v2(self, epsilon: Optional[float] = None):
         """
             We apply a dynamic programming method
             to construct the graph. The idea is
@@ -1620,12 +1656,17 @@ class Graph(Stats):
             1. horizontal edge: 0
             2. virual edge: 0
             3. cross-instruction dependence: `delay`
+            The slack of each edge is analyzed w.r.t. `epsilon`,
+            and `None` skips the slack analysis.
         """
         info("constructing the critical path...")
         with Timer("construct induced graph"):
             self.construct_induced_graph()
         with Timer("apply longest path"):
             self.longest_path()
+        if epsilon is not None:
+            with Timer("apply slack analysis"):
+                self.slack_analysis(epsilon)
 
     def generate_report(self, output: str):
         critical_path = getattr(self, "critical_path", None)
@@ -1660,9 +1701,58 @@ class Graph(Stats):
                         edge.delay
                     )
                 f.write("{}\n".format(msg))
+            near_critical = getattr(self, "near_critical", None)
+            if near_critical is not None:
+                """
+                    The near-critical profile is placed before the
+                    bottleneck section, which is at the end.
+                """
+                f.write("\nnear-critical (slack <= {}):\n".format(
+                        int(self.slack_threshold)
+                    )
+                )
+                msg = ""
+                for k, v in near_critical.items():
+                    msg += "{}: {}\n".format(k, v)
+                f.write(msg)
             f.write("\nbottleneck:\n")
             msg = ""
             for k, v in self.bottleneck.items():
                 msg += "{}: {}\n".format(k, v)
             f.write(msg)
             info("generating report: {}".format(output))
+
+    def dump(self, output: str):
+        """
+            Save the DEG for the what-if analysis, i.e.,
+            `algo/core/what_if.py`. Nodes are saved in the
+            topological order, and edges refer to nodes
+            with the order.
+        """
+        order = list(nx.topological_sort(self.graph))
+        index = {name: i for i, name in enumerate(order)}
+        stages = [stage.value for stage in PipelineStage]
+        nodes = [self.get_node_via_name(name) for name in order]
+        edges = [self.get_edge(u, v) for u, v in self.edges]
+        np.savez_compressed(
+            output,
+            timestamp=np.array(
+                [node.timestamp for node in nodes], dtype=np.int64
+            ),
+            seq=np.array([node.seq for node in nodes], dtype=np.int64),
+            stage=np.array(
+                [stages.index(node.stage) for node in nodes], dtype=np.int8
+            ),
+            src=np.array([index[edge.u.name] for edge in edges], dtype=np.int64),
+            dst=np.array([index[edge.v.name] for edge in edges], dtype=np.int64),
+            delay=np.array([edge.delay for edge in edges], dtype=np.int64),
+            cost=np.array([edge.cost for edge in edges], dtype=np.int64),
+            bottleneck=np.array(
+                [BTNK.index(edge.bottleneck.name) for edge in edges],
+                dtype=np.int8
+            ),
+            virtual=np.array([edge.virtual for edge in edges], dtype=bool),
+            icache_hit_delay=PipelineDelay.icache_hit_delay.value,
+            dcache_hit_delay=PipelineDelay.dcache_hit_delay.value
+        )
+        info("saving the DEG: {}".format(output))
@@ -0,0 +1,71 @@
+# Author: baichen.bai@alibaba-inc.com
+
+
+import numpy as np
+from typing import List, Tuple
+
+
+"""
+    The slack analysis of a DEG, which is independent of `Graph` in
+    `algo/core/model.py`. Nodes are indexed in the topological order,
+    and an edge is (src, dst, cost, delay, bottleneck index).
+"""
+
+
+def longest_cost(
+    num_of_node: int,
+    edges: List[Tuple[int, int, int, int, int]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        return: the longest `cost` from any node to each node, i.e., the
+        forward pass, and from each node to any node, i.e., the backward
+        pass.
+    """
+    forward = np.zeros(num_of_node, dtype=np.int64)
+    backward = np.zeros(num_of_node, dtype=np.int64)
+    for src, dst, cost, _, _ in sorted(edges, key=lambda e: e[1]):
+        forward[dst] = max(forward[dst], forward[src] + cost)
+    for src, dst, cost, _, _ in sorted(edges, key=lambda e: -e[0]):
+        backward[src] = max(backward[src], cost + backward[dst])
+    return forward, backward
+
+
+def analyze_slack(
+    num_of_node: int,
+    edges: List[Tuple[int, int, int, int, int]],
+    num_of_bottleneck: int,
+    epsilon: float
+) -> Tuple[np.ndarray, float, np.ndarray]:
+    """
+        The slack of an edge is how much the longest path through the
+        edge is shorter than the critical path w.r.t. `cost`. Edges
+        whose slack is within `epsilon` of the critical path length,
+        both in `cost`, are near-critical.
+        The near-critical profile of a bottleneck is its maximal delay
+        along a path of near-critical edges, so it is bounded by the
+        delay of a path, i.e., the critical path length.
+        return: the slack of each edge, the threshold of the slack, and
+        the near-critical profile of each bottleneck.
+    """
+    forward, backward = longest_cost(num_of_node, edges)
+    length = int(forward.max()) if num_of_node > 0 else 0
+    threshold = epsilon * length
+    slack = np.array(
+        [
+            length - (forward[src] + cost + backward[dst]) \
+                for src, dst, cost, _, _ in edges
+        ],
+        dtype=np.int64
+    )
+    # the maximal delay of each bottleneck along near-critical paths
+    profile = np.zeros((num_of_node, num_of_bottleneck), dtype=np.int64)
+    near_critical = sorted(
+        [edge for edge, _slack in zip(edges, slack) if _slack <= threshold],
+        key=lambda e: e[0]
+    )
+    for src, dst, _, delay, btnk in near_critical:
+        _profile = profile[src].copy()
+        _profile[btnk] += delay
+        np.maximum(profile[dst], _profile, out=profile[dst])
+    return slack, threshold, profile.max(axis=0) if num_of_node > 0 \
+        else np.zeros(num_of_bottleneck, dtype=np.int64)
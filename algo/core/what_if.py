@@ -0,0 +1,180 @@
+# Author: baichen.bai@alibaba-inc.com
+
+
+import numpy as np
+from typing import Dict, List
+from algo.core.arch_bottleneck import bottleneck, BIdx
+
+
+class WhatIfGraph(object):
+    """
+        The what-if analysis of a saved DEG, i.e., "deg.npz" generated
+        by `Graph.dump` in `algo/core/model.py`. A resource change is
+        modeled by rescaling the delays of edges w.r.t. a bottleneck,
+        e.g., a larger ROB shrinks delays of ROB edges, and a larger
+        I-cache turns miss delays to hit delays. The longest path is
+        recomputed to predict cycles of the new design without
+        simulation.
+        The arrival time of a node is the maximum among its in-edges,
+        so an edge is modeled as follows:
+        1. the cause edge, i.e., the in-edge with the maximal cost,
+        keeps its delay, so a DEG without changes is reproduced.
+        2. other horizontal edges are reduced to the intrinsic delay of
+        the pipeline stage, since they are stalled by the cause edge.
+        3. other virtual edges are removed.
+        4. other cross-instruction dependencies keep their delays, i.e.,
+        they become the bottleneck once the cause edge is removed.
+        Nodes are grouped by topological levels, i.e., the longest
+        number of edges from a node without in-edges, so the forward
+        pass is vectorized level by level, and multiple changes are
+        predicted at once.
+    """
+    def __init__(self, deg: str):
+        super(WhatIfGraph, self).__init__()
+        with np.load(deg) as data:
+            self.timestamp = data["timestamp"]
+            self.seq = data["seq"]
+            self.stage = data["stage"]
+            src = data["src"]
+            dst = data["dst"]
+            delay = data["delay"]
+            cost = data["cost"]
+            btnk = data["bottleneck"]
+            virtual = data["virtual"]
+            self.icache_hit_delay = int(data["icache_hit_delay"])
+            self.dcache_hit_delay = int(data["dcache_hit_delay"])
+        # sort edges by levels of end vertices, i.e., in the topological order
+        self.level = self.construct_level(src, dst)
+        order = np.lexsort((dst, self.level[dst]))
+        self.src = src[order]
+        self.dst = dst[order]
+        self.delay = delay[order]
+        self.cost = cost[order]
+        self.bottleneck = btnk[order]
+        self.virtual = virtual[order]
+        self.levels = self.construct_levels()
+        self.base_delay = self.construct_base_delay()
+
+    @property
+    def cycles(self) -> int:
+        return int(self.timestamp.max() - self.timestamp.min())
+
+    def construct_level(self, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        """
+            Nodes are saved in the topological order, so the level of
+            a node is final once in-edges of previous nodes are visited.
+            It is computed once for each DEG.
+        """
+        order = np.argsort(dst, kind="stable")
+        level = [0] * len(self.timestamp)
+        for u, v in zip(src[order].tolist(), dst[order].tolist()):
+            if level[u] + 1 > level[v]:
+                level[v] = level[u] + 1
+        return np.array(level, dtype=np.int64)
+
+    def construct_levels(self) -> List[tuple]:
+        """
+            return: (start, end, segments, nodes) of each level, i.e.,
+            in-edges of `nodes` are `start` to `end`, and `segments`
+            are offsets of in-edges of each node.
+        """
+        levels = []
+        if len(self.dst) == 0:
+            return levels
+        bound = np.flatnonzero(np.diff(self.dst)) + 1
+        starts = np.concatenate(([0], bound))
+        ends = np.concatenate((bound, [len(self.dst)]))
+        level = self.level[self.dst[starts]]
+        ptr = np.searchsorted(level, np.arange(1, level.max() + 2))
+        for i in range(len(ptr) - 1):
+            if ptr[i] == ptr[i + 1]:
+                continue
+            start = starts[ptr[i]]
+            end = ends[ptr[i + 1] - 1]
+            levels.append((
+                start,
+                end,
+                starts[ptr[i]:ptr[i + 1]] - start,
+                self.dst[starts[ptr[i]:ptr[i + 1]]]
+            ))
+        return levels
+
+    def construct_base_delay(self) -> np.ndarray:
+        horizontal = (self.seq[self.src] == self.seq[self.dst]) & \
+            ~self.virtual
+
+        # the intrinsic delay between two pipeline stages
+        num_of_stage = int(self.stage.max()) + 1
+        pair = self.stage[self.src].astype(np.int64) * num_of_stage + \
+            self.stage[self.dst]
+        intrinsic = np.full(num_of_stage ** 2, np.iinfo(np.int64).max)
+        np.minimum.at(intrinsic, pair[horizontal], self.delay[horizontal])
+
+        """
+            The cause edge of a node has the maximal cost, and we
+            prefer horizontal edges to virtual edges when costs tie.
+        """
+        cause = np.zeros(len(self.src), dtype=bool)
+        key = self.cost * 4 + horizontal * 2 + ~self.virtual
+        if len(self.src) > 0:
+            # the first edge with the maximal key of each node
+            order = np.lexsort((np.arange(len(self.src)), -key, self.dst))
+            first = np.flatnonzero(np.diff(self.dst[order])) + 1
+            cause[order[np.concatenate(([0], first))]] = True
+
+        delay = self.delay.copy()
+        mask = ~cause & horizontal
+        delay[mask] = intrinsic[pair[mask]]
+        delay[~cause & self.virtual] = 0
+        return delay
+
+    def get_floor(self, name: str) -> int:
+        """
+            The delay cannot be lower than the hit delay of caches.
+        """
+        if name == bottleneck[BIdx.IcacheMiss.value]:
+            return self.icache_hit_delay
+        if name == bottleneck[BIdx.DcacheMiss.value]:
+            return self.dcache_hit_delay
+        return 0
+
+    def predict(self, changes: Dict[str, float]) -> float:
+        """
+            `changes` maps a bottleneck to the scale of its delays,
+            e.g., 0 removes ROB stalls, and 0.5 halves them.
+            return: predicted cycles.
+        """
+        return float(self.predict_batch([changes])[0])
+
+    def predict_batch(self, changes: List[Dict[str, float]]) -> np.ndarray:
+        """
+            Predict each of `changes` with a single forward pass.
+            return: predicted cycles with the shape of (len(changes),)
+        """
+        delay = np.repeat(
+            self.base_delay.astype(np.float64)[:, np.newaxis],
+            len(changes),
+            axis=1
+        )
+        for i, _changes in enumerate(changes):
+            for name, scale in _changes.items():
+                mask = self.bottleneck == bottleneck.index(name)
+                floor = self.get_floor(name)
+                delay[mask, i] = floor + \
+                    np.maximum(self.delay[mask] - floor, 0) * scale
+
+        # the forward pass in the topological order
+        arrival = np.repeat(
+            (self.timestamp - self.timestamp.min()).astype(
+                np.float64
+            )[:, np.newaxis],
+            len(changes),
+            axis=1
+        )
+        for start, end, segments, nodes in self.levels:
+            arrival[nodes] = np.maximum.reduceat(
+                arrival[self.src[start:end]] + delay[start:end],
+                segments,
+                axis=0
+            )
+        return np.max(arrival, axis=0)
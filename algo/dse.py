@@ -3,21 +3,75 @@
 
 import os
 import re
+import copy
 import random
 import numpy as np
 from copy import deepcopy
 from abc import ABC, abstractmethod
-from typing import List, Tuple, Dict
-from utils.thread import WorkerThread
+from typing import List, Tuple, Dict, Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from algo.core.what_if import WhatIfGraph
 from algo.core.arch_bottleneck import bottleneck, BIdx
+from utils.pareto import ParetoArchive
+from utils.runner import install_signal_handlers
 from utils.utils import if_exist, info, warn, assert_error
-from funcs.sim.o3cpu.o3cpu_simulation import O3CPUSimulation
+from funcs.sim.o3cpu.o3cpu_straggler import is_partial
+from funcs.sim.o3cpu.o3cpu_simpoint import get_simpoints, read_ppa_report, \
+    read_near_critical_report
+from funcs.sim.o3cpu.o3cpu_simulation import O3CPUSimulation, simulation_lock
+from funcs.design.o3cpu.o3cpu_area_model import load_area_model
 from funcs.design.o3cpu.o3cpu_design_space import parse_design_space
 
 
 pat_ppa_rpt = re.compile(r"\d+\.\d+")
 
 
+"""
+    Hardware resources of each bottleneck for the what-if analysis,
+    i.e., [(the index of the embedding, exponent)]. The delays of a
+    bottleneck are scaled by (old / new) ** exponent. Misses of caches
+    & branch predictors follow the square-root rule.
+"""
+what_if_resources = {
+    bottleneck[BIdx.IcacheMiss.value]: [(18, 0.5)],
+    bottleneck[BIdx.DcacheMiss.value]: [(20, 0.5)],
+    bottleneck[BIdx.BPMiss.value]: [(3, 1 / 6), (4, 1 / 6), (5, 1 / 6)],
+    bottleneck[BIdx.ROB.value]: [(8, 1)],
+    bottleneck[BIdx.IntRF.value]: [(9, 1)],
+    bottleneck[BIdx.FpRF.value]: [(10, 1)],
+    bottleneck[BIdx.IQ.value]: [(11, 1)],
+    bottleneck[BIdx.LQ.value]: [(12, 1)],
+    bottleneck[BIdx.SQ.value]: [(13, 1)],
+    bottleneck[BIdx.IntAlu.value]: [(14, 1)],
+    bottleneck[BIdx.IntMultDiv.value]: [(15, 1)],
+    bottleneck[BIdx.FpAlu.value]: [(16, 1)],
+    bottleneck[BIdx.FpMultDiv.value]: [(17, 1)]
+}
+
+
+"""
+    Components of each bottleneck, which are adjusted by `adjust_*`.
+"""
+bottleneck_components = {
+    bottleneck[BIdx.IcacheMiss.value]: ["l1i_size", "l1i_assoc"],
+    bottleneck[BIdx.DcacheMiss.value]: ["l1d_size", "l1d_assoc"],
+    bottleneck[BIdx.BPMiss.value]: [
+        "localPredictorSize", "globalPredictorSize",
+        "choicePredictorSize", "RASSize", "BTBEntries"
+    ],
+    bottleneck[BIdx.ROB.value]: ["numROBEntries"],
+    bottleneck[BIdx.IntRF.value]: ["numPhysIntRegs"],
+    bottleneck[BIdx.FpRF.value]: ["numPhysFloatRegs"],
+    bottleneck[BIdx.IQ.value]: ["numIQEntries"],
+    bottleneck[BIdx.LQ.value]: ["LQEntries"],
+    bottleneck[BIdx.SQ.value]: ["SQEntries"],
+    bottleneck[BIdx.IntAlu.value]: ["IntALU"],
+    bottleneck[BIdx.IntMultDiv.value]: ["IntMult_Div"],
+    bottleneck[BIdx.FpAlu.value]: ["FP_ALU"],
+    bottleneck[BIdx.FpMultDiv.value]: ["FP_MultDiv"]
+}
+
+
 
 class SensitiveComponent(ABC):
     """
@@ -209,12 +263,38 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
         # we adjust `top_k` hardware resources
         self.top_k = self.dse_configs["top-k"]
         self.scm = SensitiveComponentManager()
+        # the near-critical contribution of each bottleneck
+        self.near_critical = {}
+        # `rng` saves the random state of an exploration
+        self.rng = random.Random(self.dse_configs["seed"])
         self.init_random_seed()
+        self.check_metric()
 
     def init_random_seed(self):
         random.seed(self.dse_configs["seed"])
         np.random.seed(self.dse_configs["seed"])
 
+    def fork(self, start: int, epoch: int, serial: bool = False):
+        """
+            An explorer of (`start`, `epoch`). It shares the design
+            space & configurations, and owns the simulator, sensitive
+            components and the random state, so explorations can be
+            run concurrently.
+            NOTICE: serial explorations share `rng`, which is seeded
+            once with `seed`, in the order of starts & epochs, so they
+            are the same as the baseline. Each parallel exploration is
+            seeded with (`seed`, `start`, `epoch`) instead, so parallel
+            results are not bit-identical to serial ones.
+        """
+        explorer = copy.copy(self)
+        explorer.simulator = None
+        explorer.scm = SensitiveComponentManager()
+        if not serial:
+            explorer.rng = random.Random(
+                "{}-{}-{}".format(self.dse_configs["seed"], start, epoch)
+            )
+        return explorer
+
     @property
     def dse_configs(self):
         return self.configs["dse"]
@@ -243,6 +323,46 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
     def output(self):
         return os.path.join(self.dse_configs["output"])
 
+    @property
+    def workers(self):
+        """
+            The number of explorations run concurrently, i.e., processes.
+            `None` means all explorations are run concurrently.
+        """
+        return self.dse_configs.get("workers")
+
+    @property
+    def speculation(self):
+        """
+            The number of alternative next designs evaluated in parallel
+            at each iteration. `None` or 1 disables the speculation.
+        """
+        return self.dse_configs.get("speculation")
+
+    @property
+    def slack_sizing(self):
+        """
+            Slack-proportional sizing is specified in `slack-sizing`.
+        """
+        slack_sizing = self.dse_configs.get("slack-sizing")
+        return slack_sizing if slack_sizing is not None else {}
+
+    @property
+    def what_if(self):
+        """
+            The what-if analysis is specified in `what-if`.
+        """
+        what_if = self.dse_configs.get("what-if")
+        return what_if if what_if is not None else {}
+
+    @property
+    def partial_weight(self):
+        """
+            The weight of partial results, i.e., benchmarks stopped
+            early. 0 means partial results are excluded.
+        """
+        return self.dse_configs.get("partial-weight", 1)
+
     def if_no_need_simulate(self, idx) -> bool:
         simulator_root = self.get_simulator_root(idx)
         if if_exist(simulator_root):
@@ -275,8 +395,115 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
             configs=self.configs["simulation"]
         )
 
+    @property
+    def objective(self):
+        """
+            pppa: IPC^2 / (power * area), ipc: IPC,
+            perf-per-watt: IPC / power, perf-per-area: IPC / area
+        """
+        return self.dse_configs.get("objective", "pppa")
+
+    @property
+    def constraints(self):
+        """
+            Area & power budgets are specified in `constraints`.
+        """
+        constraints = self.dse_configs.get("constraints")
+        return constraints if constraints is not None else {}
+
+    @property
+    def area_model(self):
+        """
+            The area & leakage model generated by `area-calibration`,
+            which screens designs before simulation. `None` means only
+            cached results are screened.
+        """
+        if not hasattr(self, "_area_model"):
+            path = self.constraints.get("area-model")
+            self._area_model = load_area_model(path, self.design_space) \
+                if path is not None else None
+        return self._area_model
+
+    def check_metric(self):
+        objectives = ["pppa", "ipc", "perf-per-watt", "perf-per-area"]
+        assert self.objective in objectives, \
+            assert_error("objective: {} is unsupported, candidates: {}.".format(
+                    self.objective, objectives
+                )
+            )
+        constraints = ["max-area", "max-power", "area-model"]
+        for k in self.constraints.keys():
+            assert k in constraints, \
+                assert_error("constraint: {} is unsupported, " \
+                    "candidates: {}.".format(k, constraints)
+                )
+
     def metric(self, ipc, power, area):
-        return (ipc ** 2) / (power * area)
+        if ipc <= 0 or not self.if_feasible(power, area):
+            return 0
+        if self.objective == "pppa":
+            return (ipc ** 2) / (power * area)
+        elif self.objective == "ipc":
+            return ipc
+        elif self.objective == "perf-per-watt":
+            return ipc / power
+        else:
+            # perf-per-area
+            return ipc / area
+
+    def if_feasible(self, power: float, area: float) -> bool:
+        max_power = self.constraints.get("max-power")
+        max_area = self.constraints.get("max-area")
+        if max_power is not None and power > max_power:
+            return False
+        if max_area is not None and area > max_area:
+            return False
+        return True
+
+    def estimate_leakage_area(
+        self, embedding: List[int]
+    ) -> Optional[Tuple[float, float]]:
+        """
+            return: leakage & area of `embedding` without simulation,
+            i.e., cached results or the estimation of the area model.
+        """
+        leakage_area = self.simulator.query_area(embedding)
+        if leakage_area is not None:
+            return leakage_area
+        if self.area_model is None:
+            return None
+        idx = self.design_space.embedding_to_idx(embedding)
+        return float(self.area_model.estimate_leakage(idx)[0]), \
+            float(self.area_model.estimate_area(idx)[0])
+
+    def if_feasible_indices(self, indices: np.ndarray) -> np.ndarray:
+        """
+            return: the feasibility mask of `indices` w.r.t. the area
+            model, i.e., all designs are feasible without the model.
+        """
+        feasible = np.ones(len(indices), dtype=bool)
+        if len(self.constraints) == 0 or self.area_model is None or \
+            len(indices) == 0:
+            return feasible
+        max_power = self.constraints.get("max-power")
+        max_area = self.constraints.get("max-area")
+        if max_power is not None:
+            feasible &= self.area_model.estimate_leakage(indices) <= max_power
+        if max_area is not None:
+            feasible &= self.area_model.estimate_area(indices) <= max_area
+        return feasible
+
+    def if_feasible_embedding(self, embedding: List[int]) -> bool:
+        """
+            Leakage is a lower bound of power, so a design whose
+            leakage exceeds the power budget is infeasible.
+        """
+        if len(self.constraints) == 0:
+            return True
+        leakage_area = self.estimate_leakage_area(embedding)
+        if leakage_area is None:
+            return True
+        return self.if_feasible(*leakage_area)
 
     def get_simulator_root(self, idx):
         return os.path.join(
@@ -298,28 +525,28 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                 # fetchBufferSize
                 16,
                 # fetchQueueSize
-                random.sample([8, 12, 16], k=1)[0],
+                self.rng.sample([8, 12, 16], k=1)[0],
                 # localPredictorSize
                 # globalPredictorSize
                 # choicePredictorSize
                 512, 2048, 2048,
                 # RASSize
-                random.sample([16, 18, 20], k=1)[0],
+                self.rng.sample([16, 18, 20], k=1)[0],
                 # BTBEntries
                 1024,
                 # numROBEntries
-                random.sample([32, 48, 64], k=1)[0],
+                self.rng.sample([32, 48, 64], k=1)[0],
                 # numPhysIntRegs numPhysFloatRegs
-                random.sample([40, 48, 64, 80], k=1)[0],
-                random.sample([40, 48, 64, 80], k=1)[0],
+                self.rng.sample([40, 48, 64, 80], k=1)[0],
+                self.rng.sample([40, 48, 64, 80], k=1)[0],
                 # numIQEntries
-                random.sample([16, 24, 32], k=1)[0],
+                self.rng.sample([16, 24, 32], k=1)[0],
                 # LQEntries
-                random.sample([20, 24, 28], k=1)[0],
+                self.rng.sample([20, 24, 28], k=1)[0],
                 # SQEntries
-                random.sample([20, 24, 28], k=1)[0],
+                self.rng.sample([20, 24, 28], k=1)[0],
                 # IntALU
-                random.sample([3, 4], k=1)[0],
+                self.rng.sample([3, 4], k=1)[0],
                 # IntMult_Div/FP_ALU/FP_MultDiv
                 1, 1, 1,
                 # l1i_size/l1i_assoc
@@ -328,188 +555,188 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                 16, 2
             ]
         elif pipeline_width == 2:
-            predictor_size = random.sample(
+            predictor_size = self.rng.sample(
                 [2048, 4096], k=1
             )[0]
             embedding += [
                 # fetchBufferSize
-                random.sample([16, 32], k=1)[0],
+                self.rng.sample([16, 32], k=1)[0],
                 # fetchQueueSize
-                random.sample([12, 16, 20], k=1)[0],
+                self.rng.sample([12, 16, 20], k=1)[0],
                 # localPredictorSize
-                random.sample([512, 1024], k=1)[0],
+                self.rng.sample([512, 1024], k=1)[0],
                 # globalPredictorSize
                 predictor_size,
                 # choicePredictorSize
                 predictor_size,
                 # RASSize
-                random.sample([16, 18, 20, 22], k=1)[0],
+                self.rng.sample([16, 18, 20, 22], k=1)[0],
                 # BTBEntries
-                random.sample([1024, 2048, 4096], k=1)[0],
+                self.rng.sample([1024, 2048, 4096], k=1)[0],
                 # numROBEntries
-                random.sample([32, 48, 64, 80], k=1)[0],
+                self.rng.sample([32, 48, 64, 80], k=1)[0],
                 # numPhysIntRegs
-                random.sample([40, 48, 64, 80], k=1)[0],
+                self.rng.sample([40, 48, 64, 80], k=1)[0],
                 # numPhysFloatRegs
-                random.sample([40, 48, 64, 80], k=1)[0],
+                self.rng.sample([40, 48, 64, 80], k=1)[0],
                 # numIQEntries
-                random.sample([16, 24, 32], k=1)[0],
+                self.rng.sample([16, 24, 32], k=1)[0],
                 # LQEntries
-                random.sample([20, 24, 28], k=1)[0],
+                self.rng.sample([20, 24, 28], k=1)[0],
                 # SQEntries
-                random.sample([20, 24, 28], k=1)[0],
+                self.rng.sample([20, 24, 28], k=1)[0],
                 # IntALU
-                random.sample([3, 4], k=1)[0],
+                self.rng.sample([3, 4], k=1)[0],
                 # IntMult_Div/FP_ALU/FP_MultDiv
                 1, 1, 1,
                 # l1i_size
-                random.sample([16, 32], k=1)[0],
+                self.rng.sample([16, 32], k=1)[0],
                 # l1i_assoc
-                random.sample([2, 4], k=1)[0],
+                self.rng.sample([2, 4], k=1)[0],
                 # l1d_size
-                random.sample([16, 32], k=1)[0],
+                self.rng.sample([16, 32], k=1)[0],
                 # l1d_assoc
-                random.sample([2, 4], k=1)[0]
+                self.rng.sample([2, 4], k=1)[0]
             ]
         elif pipeline_width == 3:
-            predictor_size = random.sample(
+            predictor_size = self.rng.sample(
                 [2048, 4096, 8192], k=1
             )[0]
             embedding += [
                 # fetchBufferSize
-                random.sample([16, 32, 64], k=1)[0],
+                self.rng.sample([16, 32, 64], k=1)[0],
                 # fetchQueueSize
-                random.sample([12, 16, 20, 24], k=1)[0],
+                self.rng.sample([12, 16, 20, 24], k=1)[0],
                 # localPredictorSize
-                random.sample([512, 1024, 2048], k=1)[0],
+                self.rng.sample([512, 1024, 2048], k=1)[0],
                 # globalPredictorSize
                 predictor_size,
                 # choicePredictorSize
                 predictor_size,
                 # RASSize
-                random.sample([16, 18, 20, 22, 24], k=1)[0],
+                self.rng.sample([16, 18, 20, 22, 24], k=1)[0],
                 # BTBEntries
-                random.sample([1024, 2048, 4096], k=1)[0],
+                self.rng.sample([1024, 2048, 4096], k=1)[0],
                 # numROBEntries
-                random.sample([32, 48, 64, 80, 96, 112], k=1)[0],
+                self.rng.sample([32, 48, 64, 80, 96, 112], k=1)[0],
                 # numPhysIntRegs
-                random.sample([40, 48, 64, 80, 96, 112, 128], k=1)[0],
+                self.rng.sample([40, 48, 64, 80, 96, 112, 128], k=1)[0],
                 # numPhysFloatRegs
-                random.sample([40, 48, 64, 80, 96, 112, 128], k=1)[0],
+                self.rng.sample([40, 48, 64, 80, 96, 112, 128], k=1)[0],
                 # numIQEntries
-                random.sample([16, 24, 32, 40], k=1)[0],
+                self.rng.sample([16, 24, 32, 40], k=1)[0],
                 # LQEntries
-                random.sample([20, 24, 28, 32], k=1)[0],
+                self.rng.sample([20, 24, 28, 32], k=1)[0],
                 # SQEntries
-                random.sample([20, 24, 28, 32], k=1)[0],
+                self.rng.sample([20, 24, 28, 32], k=1)[0],
                 # IntALU
-                random.sample([3, 4, 5], k=1)[0],
+                self.rng.sample([3, 4, 5], k=1)[0],
                 # IntMult_Div/FP_ALU/FP_MultDiv
                 1, 1, 1,
                 # l1i_size
-                random.sample([16, 32, 64], k=1)[0],
+                self.rng.sample([16, 32, 64], k=1)[0],
                 # l1i_assoc
-                random.sample([2, 4], k=1)[0],
+                self.rng.sample([2, 4], k=1)[0],
                 # l1d_size
-                random.sample([16, 32, 64], k=1)[0],
+                self.rng.sample([16, 32, 64], k=1)[0],
                 # l1d_assoc
-                random.sample([2, 4], k=1)[0]
+                self.rng.sample([2, 4], k=1)[0]
             ]
         elif pipeline_width == 4:
-            predictor_size = random.sample(
+            predictor_size = self.rng.sample(
                 [2048, 4096, 8192], k=1
             )[0]
             embedding += [
                 # fetchBufferSize
-                random.sample([32, 64], k=1)[0],
+                self.rng.sample([32, 64], k=1)[0],
                 # fetchQueueSize
-                random.sample([12, 16, 20, 24, 48], k=1)[0],
+                self.rng.sample([12, 16, 20, 24, 48], k=1)[0],
                 # localPredictorSize
-                random.sample([512, 1024, 2048], k=1)[0],
+                self.rng.sample([512, 1024, 2048], k=1)[0],
                 # globalPredictorSize
                 predictor_size,
                 # choicePredictorSize
                 predictor_size,
                 # RASSize
-                random.sample([16, 18, 20, 22, 24, 26], k=1)[0],
+                self.rng.sample([16, 18, 20, 22, 24, 26], k=1)[0],
                 # BTBEntries
-                random.sample([1024, 2048, 4096], k=1)[0],
+                self.rng.sample([1024, 2048, 4096], k=1)[0],
                 # numROBEntries
-                random.sample([80, 96, 112, 128, 144, 160], k=1)[0],
+                self.rng.sample([80, 96, 112, 128, 144, 160], k=1)[0],
                 # numPhysIntRegs
-                random.sample([80, 96, 112, 128, 144, 160], k=1)[0],
+                self.rng.sample([80, 96, 112, 128, 144, 160], k=1)[0],
                 # numPhysFloatRegs
-                random.sample([80, 96, 112, 128, 144, 160], k=1)[0],
+                self.rng.sample([80, 96, 112, 128, 144, 160], k=1)[0],
                 # numIQEntries
-                random.sample([24, 32, 40, 48], k=1)[0],
+                self.rng.sample([24, 32, 40, 48], k=1)[0],
                 # LQEntries
-                random.sample([24, 28, 32, 36], k=1)[0],
+                self.rng.sample([24, 28, 32, 36], k=1)[0],
                 # SQEntries
-                random.sample([24, 28, 32, 36], k=1)[0],
+                self.rng.sample([24, 28, 32, 36], k=1)[0],
                 # IntALU
-                random.sample([4, 5, 6], k=1)[0],
+                self.rng.sample([4, 5, 6], k=1)[0],
                 # IntMult_Div
-                random.sample([1, 2], k=1)[0],
+                self.rng.sample([1, 2], k=1)[0],
                 # FP_ALU
-                random.sample([1, 2], k=1)[0],
+                self.rng.sample([1, 2], k=1)[0],
                 # FP_MultDiv
-                random.sample([1, 2], k=1)[0],
+                self.rng.sample([1, 2], k=1)[0],
                 # l1i_size
-                random.sample([16, 32, 64], k=1)[0],
+                self.rng.sample([16, 32, 64], k=1)[0],
                 # l1i_assoc
-                random.sample([2, 4], k=1)[0],
+                self.rng.sample([2, 4], k=1)[0],
                 # l1d_size
-                random.sample([16, 32, 64], k=1)[0],
+                self.rng.sample([16, 32, 64], k=1)[0],
                 # l1d_assoc
-                random.sample([2, 4], k=1)[0]
+                self.rng.sample([2, 4], k=1)[0]
             ]
         else:
-            predictor_size = random.sample(
+            predictor_size = self.rng.sample(
                 [2048, 4096, 8192], k=1
             )[0]
             embedding += [
                 # fetchBufferSize
-                random.sample([32, 64], k=1)[0],
+                self.rng.sample([32, 64], k=1)[0],
                 # fetchQueueSize
-                random.sample([12, 16, 20, 24, 48], k=1)[0],
+                self.rng.sample([12, 16, 20, 24, 48], k=1)[0],
                 # localPredictorSize
-                random.sample([512, 1024, 2048], k=1)[0],
+                self.rng.sample([512, 1024, 2048], k=1)[0],
                 # globalPredictorSize
                 predictor_size,
                 # choicePredictorSize
                 predictor_size,
                 # RASSize
-                random.sample([16, 18, 20, 22, 24, 26], k=1)[0],
+                self.rng.sample([16, 18, 20, 22, 24, 26], k=1)[0],
                 # BTBEntries
-                random.sample([2048, 4096], k=1)[0],
+                self.rng.sample([2048, 4096], k=1)[0],
                 # numROBEntries
-                random.sample([96, 112, 128, 144, 160, 176], k=1)[0],
+                self.rng.sample([96, 112, 128, 144, 160, 176], k=1)[0],
                 # numPhysIntRegs
-                random.sample([96, 112, 128, 144, 160, 176], k=1)[0],
+                self.rng.sample([96, 112, 128, 144, 160, 176], k=1)[0],
                 # numPhysFloatRegs
-                random.sample([96, 112, 128, 144, 160, 176], k=1)[0],
+                self.rng.sample([96, 112, 128, 144, 160, 176], k=1)[0],
                 # numIQEntries
-                random.sample([24, 32, 40, 48, 56], k=1)[0],
+                self.rng.sample([24, 32, 40, 48, 56], k=1)[0],
                 # LQEntries
-                random.sample([24, 28, 32, 36], k=1)[0],
+                self.rng.sample([24, 28, 32, 36], k=1)[0],
                 # SQEntries
-                random.sample([24, 28, 32, 36], k=1)[0],
+                self.rng.sample([24, 28, 32, 36], k=1)[0],
                 # IntALU
-                random.sample([4, 5, 6], k=1)[0],
+                self.rng.sample([4, 5, 6], k=1)[0],
                 # IntMult_Div
-                random.sample([1, 2], k=1)[0],
+                self.rng.sample([1, 2], k=1)[0],
                 # FP_ALU
-                random.sample([1, 2], k=1)[0],
+                self.rng.sample([1, 2], k=1)[0],
                 # FP_MultDiv
-                random.sample([1, 2], k=1)[0],
+                self.rng.sample([1, 2], k=1)[0],
                 # l1i_size
-                random.sample([16, 32, 64], k=1)[0],
+                self.rng.sample([16, 32, 64], k=1)[0],
                 # l1i_assoc
-                random.sample([2, 4], k=1)[0],
+                self.rng.sample([2, 4], k=1)[0],
                 # l1d_size
-                random.sample([16, 32, 64], k=1)[0],
+                self.rng.sample([16, 32, 64], k=1)[0],
                 # l1d_assoc
-                random.sample([2, 4], k=1)[0]
+                self.rng.sample([2, 4], k=1)[0]
             ]
 
         return self.design_space.embedding_to_idx(embedding)
@@ -562,7 +789,7 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
 
     def get_simulation_results(self, idx):
         simulator_root = self.get_simulator_root(idx)
-        ipc, cpi, power, area = [], [], [], []
+        ipc, cpi, power, area, weights = [], [], [], [], []
         for k, v in self.simulator.benchmark.macros.items():
             """
                 "ppa.rpt" could be failed to generate due to
@@ -585,28 +812,95 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                     cpi.append(_cpi)
                     power.append(_power)
                     area.append(_area)
-        if len(ipc) == 0:
+                weights.append(
+                    self.simulator.benchmark.weight(k) * (
+                        self.partial_weight if \
+                            is_partial(os.path.join(simulator_root, k)) \
+                            else 1
+                    )
+                )
+        if len(ipc) == 0 or sum(weights) == 0:
             return 0, 0, 0, 0
-        ipc = np.average(ipc)
-        cpi = np.average(cpi)
-        power = np.average(power)
-        area = np.average(area)
+        ipc = np.average(ipc, weights=weights)
+        cpi = np.average(cpi, weights=weights)
+        power = np.average(power, weights=weights)
+        area = np.average(area, weights=weights)
         return ipc, cpi, power, area
 
-    def evaluate_microarch(self, idx):
+    def evaluate_microarch(self, idx, simulator=None):
+        """
+            `simulator` is a forked simulator to evaluate `idx`
+            concurrently, otherwise, `self.simulator` is used.
+        """
+        if simulator is None:
+            simulator = self.simulator
         if self.if_no_need_simulate(idx):
             return self.get_simulation_results(idx)
+        with simulation_lock(self.get_simulator_root(idx)):
+            """
+                Results in the result store are shared among explorers.
+                The design could be simulated by others while we are
+                waiting.
+            """
+            if not self.if_no_need_simulate(idx):
+                embedding = \
+                    self.design_space.idx_to_embedding(idx)
+                simulator.simulate(embedding)
+        return self.get_simulation_results(idx)
+
+    def refine_simulation_results(self, idx):
+        """
+            If the power is predicted by the surrogate, we refine
+            it with McPAT for a candidate of the optimal solution.
+        """
         embedding = \
             self.design_space.idx_to_embedding(idx)
-        self.simulator.simulate(embedding)
+        self.simulator.refine_power(embedding)
         return self.get_simulation_results(idx)
 
     def get_idx(self, name, value):
-        for k, v in \
-            self.design_space.components_mappings[name].items():
-            if v[0] == value:
-                return int(k)
-        return -1
+        k = self.design_space.get_mapping_idx(
+            [value], self.design_space.get_component_idx(name)
+        )
+        return int(k) if k is not None else -1
+
+    def increase_idx(
+        self,
+        name: str,
+        idx: int,
+        fraction: Optional[float] = None
+    ) -> int:
+        """
+            return: the index of the increased value of `name`, whose
+            current index is `idx`. By default, we increase one step.
+            With slack-proportional sizing, a resource of size S whose
+            stalls take a fraction f of the critical path is sized to
+            S / (1 - f), i.e., we jump to the smallest sufficient value.
+            `fraction` is bounded by `sizing_fraction`, so the scale is
+            limited by `max-scale` per iteration.
+        """
+        mappings = self.design_space.components_mappings[name]
+        tot = len(mappings.keys()) - 1
+        if not self.slack_sizing.get("enable", False) or \
+            fraction is None or fraction <= 0:
+            return idx + 1
+        target = mappings[idx][0] / (1 - fraction)
+        for _idx in range(idx + 1, tot + 1):
+            if mappings[_idx][0] >= target:
+                return _idx
+        return tot
+
+    def sizing_fraction(self, btnk_name: str, contrib: float) -> float:
+        """
+            The fraction f of slack-proportional sizing is the larger
+            one of the critical & near-critical contributions of
+            `btnk_name`, since stalls of a near-critical resource become
+            critical once the critical one is relieved. f is bounded by
+            1 - 1 / `max-scale`, i.e., S / (1 - f) <= S * `max-scale`.
+        """
+        max_scale = max(self.slack_sizing.get("max-scale", 2), 1)
+        fraction = max(contrib, self.near_critical.get(btnk_name, 0))
+        return min(max(fraction, 0), 1 - 1 / max_scale)
 
     def adjust_icache(self, embedding: List[int], up: bool = False):
         adjust = False
@@ -762,7 +1056,12 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                 adjust = True
         return adjust
 
-    def adjust_rob(self, embedding: List[int], up: bool = False):
+    def adjust_rob(
+        self,
+        embedding: List[int],
+        up: bool = False,
+        fraction: Optional[float] = None
+    ):
         adjust = False
         rob = embedding[8]
         tot_rob = len(
@@ -774,7 +1073,9 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
             idx = self.get_idx("numROBEntries", rob)
             if idx != -1 and tot_rob != idx:
                 embedding[8] = \
-                    self.design_space.components_mappings["numROBEntries"][idx + 1][0]
+                    self.design_space.components_mappings["numROBEntries"][
+                        self.increase_idx("numROBEntries", idx, fraction)
+                    ][0]
                 adjust = True
         else:
             # decrease
@@ -785,7 +1086,12 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                 adjust = True
         return adjust
 
-    def adjust_lq(self, embedding: List[int], up: bool = False):
+    def adjust_lq(
+        self,
+        embedding: List[int],
+        up: bool = False,
+        fraction: Optional[float] = None
+    ):
         adjust = False
         lq = embedding[12]
         tot_lq = len(
@@ -797,7 +1103,9 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
             idx = self.get_idx("LQEntries", lq)
             if idx != -1 and tot_lq != idx:
                 embedding[12] = \
-                    self.design_space.components_mappings["LQEntries"][idx + 1][0]
+                    self.design_space.components_mappings["LQEntries"][
+                        self.increase_idx("LQEntries", idx, fraction)
+                    ][0]
                 adjust = True
         else:
             # decrease
@@ -808,7 +1116,12 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                 adjust = True
         return adjust
 
-    def adjust_sq(self, embedding: List[int], up: bool = False):
+    def adjust_sq(
+        self,
+        embedding: List[int],
+        up: bool = False,
+        fraction: Optional[float] = None
+    ):
         adjust = False
         sq = embedding[13]
         tot_sq = len(
@@ -820,7 +1133,9 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
             idx = self.get_idx("SQEntries", sq)
             if idx != -1 and tot_sq != idx:
                 embedding[13] = \
-                    self.design_space.components_mappings["SQEntries"][idx + 1][0]
+                    self.design_space.components_mappings["SQEntries"][
+                        self.increase_idx("SQEntries", idx, fraction)
+                    ][0]
                 adjust = True
         else:
             # decrease
@@ -831,7 +1146,12 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                 adjust = True
         return adjust
 
-    def adjust_int_rf(self, embedding: List[int], up: bool = False):
+    def adjust_int_rf(
+        self,
+        embedding: List[int],
+        up: bool = False,
+        fraction: Optional[float] = None
+    ):
         adjust = False
         int_rf = embedding[9]
         tot_int_rf = len(
@@ -843,7 +1163,9 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
             idx = self.get_idx("numPhysIntRegs", int_rf)
             if idx != -1 and tot_int_rf != idx:
                 embedding[9] = \
-                    self.design_space.components_mappings["numPhysIntRegs"][idx + 1][0]
+                    self.design_space.components_mappings["numPhysIntRegs"][
+                        self.increase_idx("numPhysIntRegs", idx, fraction)
+                    ][0]
                 adjust = True
         else:
             # decrease
@@ -854,7 +1176,12 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                 adjust = True
         return adjust
 
-    def adjust_fp_rf(self, embedding: List[int], up: bool = False):
+    def adjust_fp_rf(
+        self,
+        embedding: List[int],
+        up: bool = False,
+        fraction: Optional[float] = None
+    ):
         adjust = False
         fp_rf = embedding[10]
         tot_fp_rf = len(
@@ -866,7 +1193,9 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
             idx = self.get_idx("numPhysFloatRegs", fp_rf)
             if idx != -1 and tot_fp_rf != idx:
                 embedding[10] = \
-                    self.design_space.components_mappings["numPhysFloatRegs"][idx + 1][0]
+                    self.design_space.components_mappings["numPhysFloatRegs"][
+                        self.increase_idx("numPhysFloatRegs", idx, fraction)
+                    ][0]
                 adjust = True
         else:
             # decrease
@@ -877,7 +1206,12 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                 adjust = True
         return adjust
 
-    def adjust_iq(self, embedding: List[int], up: bool = False):
+    def adjust_iq(
+        self,
+        embedding: List[int],
+        up: bool = False,
+        fraction: Optional[float] = None
+    ):
         adjust = False
         iq = embedding[11]
         tot_iq = len(
@@ -889,7 +1223,9 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
             idx = self.get_idx("numIQEntries", iq)
             if idx != -1 and tot_iq != idx:
                 embedding[11] = \
-                    self.design_space.components_mappings["numIQEntries"][idx + 1][0]
+                    self.design_space.components_mappings["numIQEntries"][
+                        self.increase_idx("numIQEntries", idx, fraction)
+                    ][0]
                 adjust = True
         else:
             # decrease
@@ -900,7 +1236,12 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                 adjust = True
         return adjust
 
-    def adjust_int_alu(self, embedding: List[int], up: bool = False):
+    def adjust_int_alu(
+        self,
+        embedding: List[int],
+        up: bool = False,
+        fraction: Optional[float] = None
+    ):
         adjust = False
         int_alu = embedding[14]
         tot_int_alu = len(
@@ -912,7 +1253,9 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
             idx = self.get_idx("IntALU", int_alu)
             if idx != -1 and tot_int_alu != idx:
                 embedding[14] = \
-                    self.design_space.components_mappings["IntALU"][idx + 1][0]
+                    self.design_space.components_mappings["IntALU"][
+                        self.increase_idx("IntALU", idx, fraction)
+                    ][0]
                 adjust = True
         else:
             # decrease
@@ -923,7 +1266,12 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                 adjust = True
         return adjust
 
-    def adjust_int_mult_div(self, embedding: List[int], up: bool = False):
+    def adjust_int_mult_div(
+        self,
+        embedding: List[int],
+        up: bool = False,
+        fraction: Optional[float] = None
+    ):
         adjust = False
         int_mult_div = embedding[15]
         tot_int_mult_div = len(
@@ -935,7 +1283,9 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
             idx = self.get_idx("IntMult_Div", int_mult_div)
             if idx != -1 and tot_int_mult_div != idx:
                 embedding[15] = \
-                    self.design_space.components_mappings["IntMult_Div"][idx + 1][0]
+                    self.design_space.components_mappings["IntMult_Div"][
+                        self.increase_idx("IntMult_Div", idx, fraction)
+                    ][0]
                 adjust = True
         else:
             # decrease
@@ -946,7 +1296,12 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                 adjust = True
         return adjust
 
-    def adjust_fp_alu(self, embedding: List[int], up: bool = False):
+    def adjust_fp_alu(
+        self,
+        embedding: List[int],
+        up: bool = False,
+        fraction: Optional[float] = None
+    ):
         adjust = False
         fp_alu = embedding[16]
         tot_fp_alu = len(
@@ -958,7 +1313,9 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
             idx = self.get_idx("FP_ALU", fp_alu)
             if idx != -1 and tot_fp_alu != idx:
                 embedding[16] = \
-                    self.design_space.components_mappings["FP_ALU"][idx + 1][0]
+                    self.design_space.components_mappings["FP_ALU"][
+                        self.increase_idx("FP_ALU", idx, fraction)
+                    ][0]
                 adjust = True
         else:
             # decrease
@@ -969,7 +1326,12 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                 adjust = True
         return adjust
 
-    def adjust_fp_mult_div(self, embedding: List[int], up: bool = False):
+    def adjust_fp_mult_div(
+        self,
+        embedding: List[int],
+        up: bool = False,
+        fraction: Optional[float] = None
+    ):
         adjust = False
         fp_mult_div = embedding[17]
         tot_fp_mult_div = len(
@@ -981,7 +1343,9 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
             idx = self.get_idx("FP_MultDiv", fp_mult_div)
             if idx != -1 and tot_fp_mult_div != idx:
                 embedding[17] = \
-                    self.design_space.components_mappings["FP_MultDiv"][idx + 1][0]
+                    self.design_space.components_mappings["FP_MultDiv"][
+                        self.increase_idx("FP_MultDiv", idx, fraction)
+                    ][0]
                 adjust = True
         else:
             # decrease
@@ -1001,8 +1365,15 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
         pass
 
     def increase_hardware_resource(
-        self, embedding: List[int], contribution: List[Tuple[str, int]]
+        self,
+        embedding: List[int],
+        contribution: List[Tuple[str, int]],
+        skip: Optional[str] = None
     ):
+        """
+            `skip` is a bottleneck not to adjust, so the next
+            bottleneck is adjusted instead.
+        """
         self.scm.update_terminate()
 
         num_of_adjust = 0
@@ -1010,7 +1381,10 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
             adjust = False
             if num_of_adjust >= self.top_k:
                 break
-            if btnk_name == bottleneck[BIdx.Base.value]:
+            fraction = self.sizing_fraction(btnk_name, contrib)
+            if btnk_name == skip:
+                pass
+            elif btnk_name == bottleneck[BIdx.Base.value]:
                 pass
             elif btnk_name == bottleneck[BIdx.IcacheMiss.value]:
                 if not self.scm.icache.terminate:
@@ -1028,25 +1402,25 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                 else:
                     self.scm.fallback_bp_config(embedding)
             elif btnk_name == bottleneck[BIdx.ROB.value]:
-                adjust = self.adjust_rob(embedding, True)
+                adjust = self.adjust_rob(embedding, True, fraction)
             elif btnk_name == bottleneck[BIdx.LQ.value]:
-                adjust = self.adjust_lq(embedding, True)
+                adjust = self.adjust_lq(embedding, True, fraction)
             elif btnk_name == bottleneck[BIdx.SQ.value]:
-                adjust = self.adjust_sq(embedding, True)
+                adjust = self.adjust_sq(embedding, True, fraction)
             elif btnk_name == bottleneck[BIdx.IntRF.value]:
-                adjust = self.adjust_int_rf(embedding, True)
+                adjust = self.adjust_int_rf(embedding, True, fraction)
             elif btnk_name == bottleneck[BIdx.FpRF.value]:
-                adjust = self.adjust_fp_rf(embedding, True)
+                adjust = self.adjust_fp_rf(embedding, True, fraction)
             elif btnk_name == bottleneck[BIdx.IQ.value]:
-                adjust = self.adjust_iq(embedding, True)
+                adjust = self.adjust_iq(embedding, True, fraction)
             elif btnk_name == bottleneck[BIdx.IntAlu.value]:
-                adjust = self.adjust_int_alu(embedding, True)
+                adjust = self.adjust_int_alu(embedding, True, fraction)
             elif btnk_name == bottleneck[BIdx.IntMultDiv.value]:
-                adjust = self.adjust_int_mult_div(embedding, True)
+                adjust = self.adjust_int_mult_div(embedding, True, fraction)
             elif btnk_name == bottleneck[BIdx.FpAlu.value]:
-                adjust = self.adjust_fp_alu(embedding, True)
+                adjust = self.adjust_fp_alu(embedding, True, fraction)
             elif btnk_name == bottleneck[BIdx.FpMultDiv.value]:
-                adjust = self.adjust_fp_mult_div(embedding, True)
+                adjust = self.adjust_fp_mult_div(embedding, True, fraction)
             elif btnk_name == bottleneck[BIdx.RdWrPort.value]:
                 adjust = self.adjust_rd_wr_port(embedding, True)
             elif btnk_name == bottleneck[BIdx.RAW.value]:
@@ -1099,71 +1473,346 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                 elif btnk_name == bottleneck[BIdx.Virtual.value]:
                     pass
 
+    def if_near_critical(self, btnk_name: str) -> bool:
+        """
+            A resource is near-critical if its contribution within the
+            slack exceeds `near-critical` of the critical path, and it
+            is not decreased to avoid oscillation.
+        """
+        threshold = self.dse_configs.get("near-critical")
+        if threshold is None:
+            return False
+        return self.near_critical.get(btnk_name, 0) > threshold
+
+    def decrease_resource(self, embedding: List[int], btnk_name: str):
+        """
+            Decrease the hardware resource w.r.t. `btnk_name`.
+        """
+        adjust = False
+        if btnk_name == bottleneck[BIdx.Base.value]:
+            pass
+        elif btnk_name == bottleneck[BIdx.IcacheMiss.value]:
+            adjust = self.adjust_icache(embedding)
+        elif btnk_name == bottleneck[BIdx.DcacheMiss.value]:
+            adjust = self.adjust_dcache(embedding)
+        elif btnk_name == bottleneck[BIdx.BPMiss.value]:
+            adjust = self.adjust_bp(embedding)
+        elif btnk_name == bottleneck[BIdx.ROB.value]:
+            adjust = self.adjust_rob(embedding)
+        elif btnk_name == bottleneck[BIdx.LQ.value]:
+            adjust = self.adjust_lq(embedding)
+        elif btnk_name == bottleneck[BIdx.SQ.value]:
+            adjust = self.adjust_sq(embedding)
+        elif btnk_name == bottleneck[BIdx.IntRF.value]:
+            adjust = self.adjust_int_rf(embedding)
+        elif btnk_name == bottleneck[BIdx.FpRF.value]:
+            adjust = self.adjust_fp_rf(embedding)
+        elif btnk_name == bottleneck[BIdx.IQ.value]:
+            adjust = self.adjust_iq(embedding)
+        elif btnk_name == bottleneck[BIdx.IntAlu.value]:
+            adjust = self.adjust_int_alu(embedding)
+        elif btnk_name == bottleneck[BIdx.IntMultDiv.value]:
+            adjust = self.adjust_int_mult_div(embedding)
+        elif btnk_name == bottleneck[BIdx.FpAlu.value]:
+            adjust = self.adjust_fp_alu(embedding)
+        elif btnk_name == bottleneck[BIdx.FpMultDiv.value]:
+            adjust = self.adjust_fp_mult_div(embedding)
+        elif btnk_name == bottleneck[BIdx.RdWrPort.value]:
+            adjust = self.adjust_rd_wr_port(embedding)
+        elif btnk_name == bottleneck[BIdx.RAW.value]:
+            adjust = self.adjust_raw(embedding)
+        elif btnk_name == bottleneck[BIdx.Virtual.value]:
+            pass
+        return bool(adjust)
+
     def decrease_hardware_resource_v2(
         self, embedding: List[int], contribution: List[Tuple[str, int]]
     ):
         """
             Decrease hardware resources that have zero contribution.
-            We randomly decrease `top_k` hardware resources.
+            We randomly decrease `top_k` hardware resources, except
+            near-critical ones.
         """
         candidates = []
         for btnk_name, contrib in contribution:
-            if contrib == 0:
+            if contrib == 0 and not self.if_near_critical(btnk_name):
                 candidates.append(btnk_name)
-        candidates = random.sample(
+        candidates = self.rng.sample(
             candidates, k=self.top_k \
                 if self.top_k < len(candidates) else len(candidates)
         )
 
         for btnk_name in candidates:
-            if btnk_name == bottleneck[BIdx.Base.value]:
-                pass
-            elif btnk_name == bottleneck[BIdx.IcacheMiss.value]:
-                self.adjust_icache(embedding)
-            elif btnk_name == bottleneck[BIdx.DcacheMiss.value]:
-                self.adjust_dcache(embedding)
-            elif btnk_name == bottleneck[BIdx.BPMiss.value]:
-                self.adjust_bp(embedding)
-            elif btnk_name == bottleneck[BIdx.ROB.value]:
-                self.adjust_rob(embedding)
-            elif btnk_name == bottleneck[BIdx.LQ.value]:
-                self.adjust_lq(embedding)
-            elif btnk_name == bottleneck[BIdx.SQ.value]:
-                self.adjust_sq(embedding)
-            elif btnk_name == bottleneck[BIdx.IntRF.value]:
-                self.adjust_int_rf(embedding)
-            elif btnk_name == bottleneck[BIdx.FpRF.value]:
-                self.adjust_fp_rf(embedding)
-            elif btnk_name == bottleneck[BIdx.IQ.value]:
-                self.adjust_iq(embedding)
-            elif btnk_name == bottleneck[BIdx.IntAlu.value]:
-                self.adjust_int_alu(embedding)
-            elif btnk_name == bottleneck[BIdx.IntMultDiv.value]:
-                self.adjust_int_mult_div(embedding)
-            elif btnk_name == bottleneck[BIdx.FpAlu.value]:
-                self.adjust_fp_alu(embedding)
-            elif btnk_name == bottleneck[BIdx.FpMultDiv.value]:
-                self.adjust_fp_mult_div(embedding)
-            elif btnk_name == bottleneck[BIdx.RdWrPort.value]:
-                self.adjust_rd_wr_port(embedding)
-            elif btnk_name == bottleneck[BIdx.RAW.value]:
-                self.adjust_raw(embedding)
-            elif btnk_name == bottleneck[BIdx.Virtual.value]:
-                pass
+            self.decrease_resource(embedding, btnk_name)
 
-    def bottleneck_removal(self, idx: int, contribution: List[Tuple[str, int]]):
+    def repair(
+        self, embedding: List[int], contribution: List[Tuple[str, int]]
+    ) -> bool:
+        """
+            Shrink hardware resources from the lowest contribution
+            until `embedding` satisfies `constraints`.
+            return: whether `embedding` is feasible.
+        """
+        while not self.if_feasible_embedding(embedding):
+            adjust = False
+            for btnk_name, _ in sorted(contribution, key=lambda x: x[1]):
+                if self.decrease_resource(embedding, btnk_name):
+                    adjust = True
+                    break
+            if not adjust:
+                return False
+        return True
+
+    def bottleneck_removal(
+        self,
+        idx: int,
+        contribution: List[Tuple[str, int]],
+        skip: Optional[str] = None,
+        decrease: bool = True
+    ):
         """
             Adjust hardware resources based on the contribution of
             each bottleneck. We adjust top-2 resources and all
             resources with zero contributions
+            return: the embedding of a feasible design, or `None`.
         """
         # increase hardware resources
         embedding = self.design_space.idx_to_embedding(idx)
-        self.increase_hardware_resource(embedding, contribution)
+        self.increase_hardware_resource(embedding, contribution, skip)
         # decrease hardware resources
-        self.decrease_hardware_resource_v2(embedding, contribution)
+        if decrease:
+            self.decrease_hardware_resource_v2(embedding, contribution)
+        # repair an infeasible design before simulation
+        if not self.if_feasible_embedding(embedding):
+            if self.repair(embedding, contribution):
+                info("an infeasible design is repaired: {}.".format(
+                        self.design_space.embedding_to_idx(embedding)
+                    )
+                )
+            else:
+                """
+                    NOTICE: an infeasible design is never simulated,
+                    and we escape to a feasible neighbor of `idx`.
+                """
+                warn("an infeasible design cannot be repaired: {}.".format(
+                        self.design_space.embedding_to_idx(embedding)
+                    )
+                )
+                embedding = self.escape(idx, contribution, set([idx]))
         return embedding
 
+    def generate_variants(
+        self,
+        idx: int,
+        contribution: List[Tuple[str, int]],
+        num: Optional[int] = None
+    ) -> List[Tuple[List[int], SensitiveComponentManager]]:
+        """
+            Generate `num` (`speculation` by default) alternative
+            next designs, i.e.,
+            1. the default bottleneck removal,
+            2. skipping one of the top-k bottlenecks,
+            3. increasing hardware resources only,
+            4. other random draws of decreased hardware resources.
+            Each variant owns a copy of sensitive components, which is
+            adopted if the variant is chosen.
+        """
+        if num is None:
+            num = self.speculation
+        scm = self.scm
+        choices = [(None, True)] + [
+            (btnk_name, True) for btnk_name, _ in contribution[:self.top_k]
+        ] + [(None, False)]
+        variants = []
+        for i in range(4 * num):
+            if len(variants) >= num:
+                break
+            skip, decrease = choices[i] if i < len(choices) else (None, True)
+            self.scm = deepcopy(scm)
+            embedding = self.bottleneck_removal(
+                idx, contribution, skip, decrease
+            )
+            if embedding is not None and \
+                embedding not in [_embedding for _embedding, _ in variants]:
+                variants.append((embedding, self.scm))
+        self.scm = scm
+        return variants
+
+    def speculate(
+        self,
+        idx: int,
+        contribution: List[Tuple[str, int]],
+        variants: Optional[
+            List[Tuple[List[int], SensitiveComponentManager]]
+        ] = None
+    ):
+        """
+            Evaluate alternative next designs in parallel, and continue
+            from the best one w.r.t. `metric`. Results of other variants
+            are kept in the result store.
+            return: the embedding of the best one, or `None` if no
+            feasible variant is generated.
+        """
+        if variants is None:
+            variants = self.generate_variants(idx, contribution)
+        if len(variants) == 0:
+            return None
+
+        def evaluate(embedding):
+            ipc, cpi, power, area = self.evaluate_microarch(
+                self.design_space.embedding_to_idx(embedding),
+                self.simulator.fork()
+            )
+            return self.metric(ipc, power, area)
+
+        with ThreadPoolExecutor(max_workers=len(variants)) as executor:
+            futures = [
+                executor.submit(evaluate, embedding) \
+                    for embedding, _ in variants
+            ]
+            pppa = []
+            for future in futures:
+                try:
+                    pppa.append(future.result())
+                except (Exception, SystemExit) as e:
+                    warn("a speculative design is failed: {}.".format(e))
+                    pppa.append(0)
+        best = int(np.argmax(pppa))
+        embedding, self.scm = variants[best]
+        info("speculative designs: {}, choose: {}.".format(
+                ["{:.4f}".format(_pppa) for _pppa in pppa], best
+            )
+        )
+        return embedding
+
+    def load_what_if_graphs(
+        self, idx: int
+    ) -> Optional[Dict[str, List[Tuple[float, float, WhatIfGraph]]]]:
+        """
+            return: (weight, CPI, DEG) of each SimPoint of each
+            benchmark of `idx`, i.e., "deg.npz" in
+            `<benchmark>/simpoints/<checkpoint>` of multiple SimPoints,
+            or `None` if any DEG is missing. Failed SimPoints are
+            excluded and weights are re-normalized, the same as
+            `combine_simpoints`.
+        """
+        simulator_root = self.get_simulator_root(idx)
+        graphs = {}
+        for k, v in self.simulator.benchmark.macros.items():
+            simpoints = get_simpoints(k, v) \
+                if self.simulator.benchmark.name == "spec2017" \
+                    else [(k, None, 1.0)]
+            graphs[k] = []
+            for name, _, weight in simpoints:
+                ppa_rpt = os.path.join(simulator_root, name, "ppa.rpt")
+                deg = os.path.join(simulator_root, name, "deg.npz")
+                if not if_exist(ppa_rpt):
+                    continue
+                if not if_exist(deg):
+                    warn("the DEG of {} of {} is not saved.".format(name, idx))
+                    return None
+                graphs[k].append(
+                    (weight, read_ppa_report(ppa_rpt)[1], WhatIfGraph(deg))
+                )
+            if len(graphs[k]) == 0:
+                warn("{} of {} is failed.".format(k, idx))
+                return None
+            total = sum([weight for weight, _, _ in graphs[k]])
+            graphs[k] = [
+                (weight / total, cpi, graph) \
+                    for weight, cpi, graph in graphs[k]
+            ]
+        return graphs
+
+    def get_what_if_changes(
+        self, embedding: List[int], _embedding: List[int]
+    ) -> Dict[str, float]:
+        """
+            return: the scale of delays of each bottleneck from
+            `embedding` to `_embedding`.
+        """
+        changes = {}
+        for btnk_name, resources in what_if_resources.items():
+            scale = 1
+            for i, exponent in resources:
+                scale *= (embedding[i] / _embedding[i]) ** exponent
+            if scale != 1:
+                changes[btnk_name] = scale
+        return changes
+
+    def predict_simulation_results(
+        self,
+        idx: int,
+        graphs: Dict[str, List[Tuple[float, float, WhatIfGraph]]],
+        embeddings: List[List[int]]
+    ) -> List[float]:
+        """
+            Predict `metric` of `embeddings`, neighbors of `idx`, with
+            the what-if analysis of DEGs of `idx`. Power of `idx` is
+            kept, and the area is queried if it is cached. All
+            neighbors are predicted with a single pass of each DEG.
+            CPI of a benchmark is the weighted average of its SimPoints.
+        """
+        _embedding = self.design_space.idx_to_embedding(idx)
+        changes = [
+            self.get_what_if_changes(_embedding, embedding) \
+                for embedding in embeddings
+        ]
+        ipc, weights = [], []
+        for k, simpoints in graphs.items():
+            cpi = 0
+            for weight, _cpi, graph in simpoints:
+                cpi += weight * _cpi * \
+                    np.maximum(graph.predict_batch(changes), 1) / \
+                        max(graph.cycles, 1)
+            ipc.append(1 / cpi)
+            weights.append(self.simulator.benchmark.weight(k))
+        ipc = np.average(ipc, axis=0, weights=weights)
+        _, _, power, area = self.get_simulation_results(idx)
+        pppa = []
+        for _ipc, embedding in zip(ipc, embeddings):
+            leakage_area = self.simulator.query_area(embedding)
+            pppa.append(
+                self.metric(
+                    float(_ipc),
+                    power,
+                    area if leakage_area is None else leakage_area[1]
+                )
+            )
+        return pppa
+
+    def what_if_selection(self, idx: int, contribution: List[Tuple[str, int]]):
+        """
+            Rank `candidates` alternative next designs with the what-if
+            analysis, and only the most promising `top` ones are
+            simulated, i.e., speculated.
+        """
+        graphs = self.load_what_if_graphs(idx)
+        if graphs is None:
+            warn("DEGs of {} are not saved, the what-if analysis " \
+                "is skipped.".format(idx)
+            )
+            return None
+        variants = self.generate_variants(
+            idx, contribution, self.what_if.get("candidates", 8)
+        )
+        if len(variants) == 0:
+            return None
+        pppa = self.predict_simulation_results(
+            idx, graphs, [embedding for embedding, _ in variants]
+        )
+        top = max(self.what_if.get("top", 1), 1)
+        order = np.argsort(pppa)[::-1][:top]
+        info("predicted designs: {}, choose: {}.".format(
+                ["{:.4f}".format(_pppa) for _pppa in pppa],
+                order.tolist()
+            )
+        )
+        variants = [variants[i] for i in order]
+        if len(variants) == 1:
+            embedding, self.scm = variants[0]
+            return embedding
+        return self.speculate(idx, contribution, variants)
 
     def calc_bottleneck_contribution(self, btnks: dict):
         """
@@ -1171,6 +1820,19 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
             bottlenecks' average contribution(s).
             among all benchmarks.
         """
+        contribution = self.average_contribution(btnks)
+
+        # update the sensitive components' information
+        self.scm.update(contribution)
+
+        return contribution
+
+    def average_contribution(self, btnks: dict):
+        """
+            The contribution of each bottleneck is normalized by the
+            critical path length, and averaged among benchmarks w.r.t.
+            their weights.
+        """
         contribution = {}
         for btnk in bottleneck:
             contribution[btnk] = 0
@@ -1187,16 +1849,15 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
             for btnk_name in _contribution.keys():
                 _contribution[btnk_name] /= v["length"]
                 contribution[btnk_name] += \
-                    _contribution[btnk_name]
+                    self.simulator.benchmark.weight(k) * \
+                        _contribution[btnk_name]
 
-        # get the average contribution
-        num_of_benchmark = len(btnks)
+        # get the weighted average contribution
+        num_of_benchmark = sum([
+            self.simulator.benchmark.weight(k) for k in btnks.keys()
+        ])
         for k, v in contribution.items():
             contribution[k] = v / num_of_benchmark
-
-        # update the sensitive components' information
-        self.scm.update(contribution)
-
         return contribution
 
     def get_bottleneck_contribution(self, idx):
@@ -1208,7 +1869,7 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
             mapping between each type of bottleneck and
             its contribution to the critical path.
         """
-        btnks = {}
+        btnks, near_critical = {}, {}
         for k, v in self.simulator.benchmark.macros.items():
             btnk_rpt = os.path.join(
                 simulator_root, k, "analysis.rpt"
@@ -1229,7 +1890,18 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                     # we include the critical path length
                     btnk["length"] = length
                 btnks[k] = deepcopy(btnk)
+                _near_critical = read_near_critical_report(btnk_rpt)
+                if _near_critical is not None:
+                    _near_critical["length"] = length
+                    near_critical[k] = _near_critical
         contribution = self.calc_bottleneck_contribution(btnks)
+        """
+            `near_critical` is the contribution of each bottleneck
+            within the slack, which is empty if any benchmark has no
+            near-critical profile.
+        """
+        self.near_critical = self.average_contribution(near_critical) \
+            if len(near_critical) == len(btnks) and len(btnks) > 0 else {}
         # sort the contribution from the largest to the smallest
         # `summary` consists of elements:
         # `(bottleneck, average contribution)`
@@ -1239,9 +1911,133 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
         summary.sort(key=lambda item: item[1], reverse=True)
         return summary
 
-    def bottleneck_analysis(self, idx):
+    @property
+    def pareto(self):
+        """
+            The Pareto archive is specified in `pareto`.
+        """
+        pareto = self.dse_configs.get("pareto")
+        return pareto if pareto is not None else {}
+
+    @property
+    def ref_point(self):
+        """
+            The reference point of the hypervolume, i.e., the worst
+            (IPC, power, area). Power & area are negated since all
+            objectives of the archive are maximized.
+        """
+        ipc, power, area = self.pareto.get("ref-point", [0, 1.0, 15.0])
+        return [ipc, -power, -area]
+
+    @property
+    def tabu(self):
+        """
+            True: visited designs are tabu, and the exploration is
+            redirected once a cycle is detected.
+        """
+        return self.dse_configs.get("tabu", False)
+
+    def redirect(
+        self,
+        idx: int,
+        contribution: List[Tuple[str, int]],
+        visited: set
+    ):
+        """
+            The next design is visited, i.e., a cycle. We redirect to
+            the next-best adjustment w.r.t. the contribution ranking,
+            i.e., skipping a bottleneck from the top one, and then
+            increasing hardware resources only.
+            return: the embedding of an unvisited design, or `None`.
+        """
+        scm = self.scm
+        choices = [
+            (btnk_name, True) for btnk_name, contrib in contribution \
+                if contrib > 0
+        ] + [(None, False)]
+        for skip, decrease in choices:
+            self.scm = deepcopy(scm)
+            embedding = self.bottleneck_removal(
+                idx, contribution, skip, decrease
+            )
+            if embedding is not None and \
+                self.design_space.embedding_to_idx(embedding) not in visited:
+                return embedding
+        self.scm = scm
+        return None
+
+    def escape(
+        self,
+        idx: int,
+        contribution: List[Tuple[str, int]],
+        visited: set
+    ):
+        """
+            All adjustments of `redirect` are visited. We escape to an
+            unvisited & feasible neighbor, i.e., a component of a
+            bottleneck with a positive contribution is increased by one
+            option w.r.t. the contribution ranking. Neighbors are
+            generated & screened at once, and the chosen one is
+            screened again with cached results.
+            return: the embedding of the neighbor, or `None`.
+        """
+        components = []
+        for btnk_name, contrib in contribution:
+            if contrib > 0:
+                components += bottleneck_components.get(btnk_name, [])
+        if len(components) == 0:
+            return None
+        moves = [
+            move for move in self.design_space.construct_moves(components) \
+                if move.sum() > 0
+        ]
+        neighbors, valid = self.design_space.neighbors(idx, np.array(moves))
+        neighbors = neighbors[0][valid[0]]
+        neighbors = neighbors[
+            ~np.isin(neighbors, np.array(list(visited), dtype=np.int64))
+        ]
+        neighbors = neighbors[self.if_feasible_indices(neighbors)]
+        for neighbor in neighbors:
+            embedding = self.design_space.idx_to_embedding(int(neighbor))
+            if self.if_feasible_embedding(embedding):
+                return embedding
+        return None
+
+    def bottleneck_analysis(self, idx, visited: Optional[set] = None):
+        """
+            `visited` is the set of evaluated designs of the
+            exploration, which are tabu if `tabu` is enabled.
+            return: the embedding of the next design, or `None` if no
+            feasible design is found.
+        """
         contribution = self.get_bottleneck_contribution(idx)
-        return self.bottleneck_removal(idx, contribution)
+        scm = deepcopy(self.scm)
+        embedding = None
+        if self.what_if.get("enable", False):
+            embedding = self.what_if_selection(idx, contribution)
+        if embedding is None:
+            if self.speculation is not None and self.speculation > 1:
+                embedding = self.speculate(idx, contribution)
+            else:
+                embedding = self.bottleneck_removal(idx, contribution)
+        if embedding is None:
+            return None
+        if visited is None or \
+            self.design_space.embedding_to_idx(embedding) not in visited:
+            return embedding
+        self.tabu_stats["cycle"] += 1
+        _scm, self.scm = self.scm, scm
+        _embedding = self.redirect(idx, contribution, visited)
+        if _embedding is None:
+            _embedding = self.escape(idx, contribution, visited)
+        if _embedding is None:
+            warn("a cycle is detected at {}, and all adjustments " \
+                "are visited.".format(idx)
+            )
+            self.scm = _scm
+            return embedding
+        self.tabu_stats["redirect"] += 1
+        return _embedding
 
     def exploration_impl(self, start: int):
         self.scm.reset()
@@ -1262,15 +2058,51 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
             "best-ppa": (),
             "best-idx": 0,
         }
-        self.scm.set_config(self.design_space.idx_to_embedding(idx))
+        visited = set()
+        self.tabu_stats = {"cycle": 0, "redirect": 0}
+        solutions["tabu"] = self.tabu_stats
+        # the non-dominated archive of (IPC, power, area)
+        archive = ParetoArchive(self.ref_point)
+        solutions["hypervolume"] = []
+        solutions["pareto"] = []
+        last_hv_update = 0
+        # repair an infeasible initial design before simulation
+        embedding = self.design_space.idx_to_embedding(idx)
+        if not self.if_feasible_embedding(embedding):
+            if not self.repair(
+                embedding, [(btnk_name, 0) for btnk_name in bottleneck]
+            ):
+                warn("the initial design cannot be repaired: {}.".format(idx))
+                return solutions
+            idx = self.design_space.embedding_to_idx(embedding)
+            info("the initial design is repaired: {}.".format(idx))
+        self.scm.set_config(embedding)
         for i in range(self.budget):
             embedding = self.design_space.idx_to_embedding(idx)
             ipc, cpi, power, area = \
                 self.evaluate_microarch(idx)
             cur_pppa = self.metric(ipc, power, area)
+            if cur_pppa > solutions["best-pppa"] and \
+                self.simulator.power_surrogate is not None:
+                ipc, cpi, power, area = \
+                    self.refine_simulation_results(idx)
+                cur_pppa = self.metric(ipc, power, area)
             solutions["trace"].append(
                 (embedding, ipc, cpi, power, area, cur_pppa)
             )
+            if ipc > 0 and self.if_feasible(power, area) and \
+                archive.insert([ipc, -power, -area], idx):
+                solutions["pareto"] = [
+                    (_idx, float(point[0]), float(-point[1]), float(-point[2])) \
+                        for _idx, point in zip(archive.items, archive.points)
+                ]
+                if len(solutions["hypervolume"]) == 0 or \
+                    archive.hypervolume > solutions["hypervolume"][-1]:
+                    last_hv_update = i
+            solutions["hypervolume"].append(archive.hypervolume)
+            info("iteration: {}, hypervolume: {:.6f}, Pareto designs: " \
+                "{}.".format(i, archive.hypervolume, len(archive))
+            )
             if ipc == 0:
                 """
                     The simulation is failed. We terminate
@@ -1285,7 +2117,13 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                 last_update = i
 
             # get the new microarch
-            embedding = self.bottleneck_analysis(idx)
+            visited.add(idx)
+            embedding = self.bottleneck_analysis(
+                idx, visited if self.tabu else None
+            )
+            if embedding is None:
+                warn("no feasible design is found from {}.".format(idx))
+                break
             self.scm.set_config(embedding)
             idx = self.design_space.embedding_to_idx(embedding)
             if (i - last_update) >= self.early_stopping:
@@ -1294,69 +2132,82 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                 )
             )
                 break
+            hv_early_stopping = self.pareto.get("early-stopping")
+            if hv_early_stopping is not None and \
+                (i - last_hv_update) >= hv_early_stopping:
+                info("the hypervolume is not improved since {}.".format(
+                        last_hv_update
+                    )
+                )
+                break
         return solutions
 
-    def multi_exploration(self, pipeline_width: int):
-        threads = []
-        assert self.epoch == 1, assert_error(
-                "currently, we only support ont thread " \
-                "for each pipeline width."
-            )
-        for epoch in range(self.epoch):
-            thread = WorkerThread(
-                func=self.exploration_impl,
-                args=(pipeline_width,)
-            )
-            threads.append(thread)
-            thread.start()
-
-        for thread in threads:
-            thread.join()
+    def explore(self, start: int, epoch: int, serial: bool = False):
+        return self.fork(start, epoch, serial).exploration_impl(start)
 
-        solutions = []
-        for thread in threads:
-            solutions.append(thread.get_output())
-        return solutions
+    def multi_exploration(self, pipeline_width: int):
+        return self.parallel_exploration([pipeline_width])[0]
 
     def exploration(self, start: int):
         solutions = []
         for epoch in range(self.epoch):
             solutions.append(
-                self.exploration_impl(start)
+                self.explore(start, epoch, serial=True)
             )
         return solutions
 
+    def parallel_exploration(self, starts: List[int]):
+        """
+            Each (start, epoch) is explored in a process, and results
+            are shared via the result store. A failed exploration
+            does not affect others.
+        """
+        with ProcessPoolExecutor(
+            max_workers=self.workers if self.workers is not None \
+                else len(starts) * self.epoch,
+            initializer=install_signal_handlers
+        ) as executor:
+            futures = [
+                [
+                    executor.submit(self.explore, start, epoch) \
+                        for epoch in range(self.epoch)
+                ] for start in starts
+            ]
+            solutions = []
+            for start, _futures in zip(starts, futures):
+                _solutions = []
+                for epoch, future in enumerate(_futures):
+                    try:
+                        _solutions.append(future.result())
+                    except (Exception, SystemExit) as e:
+                        warn("the exploration of {} at epoch {} is " \
+                            "failed: {}.".format(start, epoch, e)
+                        )
+                        _solutions.append({
+                            "trace": [],
+                            "best-pppa": 0,
+                            "best-ppa": (),
+                            "best-idx": 0,
+                        })
+                solutions.append(_solutions)
+        return solutions
+
     def run(self):
         """
-            For artifact evaluation, we disable parallel
-            DSE.
+            All initial designs (or pipeline widths) and epochs are
+            explored concurrently. For artifact evaluation, we can
+            set `workers` to 1 to disable parallel DSE, which keeps a
+            single random state like the baseline. Parallel results are
+            not bit-identical to serial ones.
         """
-        threads = []
         if isinstance(self.initial_design, list):
-            for initial_idx in self.initial_design:
-                thread = WorkerThread(
-                    func=self.exploration,
-                    args=(initial_idx,)
-                )
-                threads.append(thread)
-                thread.start()
-                thread.join()
+            starts = self.initial_design
         else:
-            for pipeline_width in self.pipeline_width:
-                thread = WorkerThread(
-                    func=self.exploration,
-                    args=(pipeline_width,)
-                )
-                threads.append(thread)
-                thread.start()
-                thread.join()
-
-            # for thread in threads:
-            #     thread.join()
-
-        solutions = []
-        for thread in threads:
-            solutions.append(thread.get_output())
+            starts = self.pipeline_width
+        if self.workers == 1:
+            solutions = [self.exploration(start) for start in starts]
+        else:
+            solutions = self.parallel_exploration(starts)
         self.generate_report(solutions)
 
     def generate_report(self, solutions: List[List[Dict]]):
@@ -1412,12 +2263,15 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                     msg = ""
                     best_pppa = best_idx = 0
                     best_ppa = ()
-                    for (embedding, ipc, _, power, area, pppa) \
-                        in solution["trace"]:
+                    hypervolume = solution.get(
+                        "hypervolume", [0] * len(solution["trace"])
+                    )
+                    for (embedding, ipc, _, power, area, pppa), hv \
+                        in zip(solution["trace"], hypervolume):
                         msg += "{}: {} {}\tipc: {}\tpower: {}\t" \
-                            "area: {}\tpppa: {}\n".format(
+                            "area: {}\tpppa: {}\thv: {}\n".format(
                             idx, self.design_space.embedding_to_idx(embedding),
-                            embedding, ipc, power, area, pppa
+                            embedding, ipc, power, area, pppa, hv
                         )
                         idx += 1
                     idx = 1
@@ -1442,6 +2296,20 @@ class ArchExplorerEngine(ArchExplorerEngineMacros):
                         best_ppa[3],
                         best_pppa
                     )
+                    if "tabu" in solution.keys():
+                        msg += "cycles: {}\tredirects: {}\n\n".format(
+                            solution["tabu"]["cycle"],
+                            solution["tabu"]["redirect"]
+                        )
+                    if len(solution.get("pareto", [])) > 0:
+                        msg += "Pareto frontier:\n"
+                        for _idx, ipc, power, area in sorted(
+                            solution["pareto"], key=lambda x: x[1]
+                        ):
+                            msg += "{}\tipc: {}\tpower: {}\tarea: {}\n".format(
+                                _idx, ipc, power, area
+                            )
+                        msg += "\n"
                     fout.write(msg)
                     info("generate report: {}".format(report_name))
 
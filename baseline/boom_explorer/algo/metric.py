@@ -3,7 +3,16 @@
 
 import torch
 import numpy as np
-from botorch.utils.multi_objective.pareto import is_non_dominated
+from utils.pareto import is_non_dominated as _is_non_dominated
+
+
+def is_non_dominated(y: torch.Tensor) -> torch.Tensor:
+    """
+        A tensor version of `utils.pareto.is_non_dominated`.
+    """
+    return torch.from_numpy(
+        _is_non_dominated(y.detach().cpu().numpy())
+    ).to(y.device)
 
 
 def get_pareto_frontier(y: torch.Tensor, reverse=True):
@@ -1,74 +1,24 @@
 # Author: baichen318@gmail.com
 
 
-import math
-import random
 import numpy as np
 from typing import List, NoReturn
 from algo.dataset import ndarray_to_tensor
 from algo.problem import DesignSpaceProblem
+from funcs.initialize import RandomizedTED as _RandomizedTED
 
 
-class RandomizedTED(object):
-
+class RandomizedTED(_RandomizedTED):
+    """
+        Randomized TED is shared with `funcs/initialize.py`.
+    """
     def __init__(self, kwargs: dict):
-        super(RandomizedTED, self).__init__()
-        self.Nrted = kwargs["Nrted"]
-        self.mu = kwargs["mu"]
-        self.sig = kwargs["sig"]
-
-    def f(self, u, v):
-        u = u[:-2]
-        v = v[:-2]
-        return pow(
-            math.e,
-            -np.linalg.norm(
-                np.array(u, dtype=np.float64) - np.array(v, dtype=np.float64)
-            ) ** 2 / (2 * self.sig ** 2)
+        super(RandomizedTED, self).__init__(
+            kwargs["Nrted"],
+            kwargs["mu"],
+            kwargs["sig"]
         )
 
-    def f_same(self, K: List[List[int]]) -> np.ndarray:
-        n = len(K)
-        F = []
-        for i in range(n):
-            t = []
-            for j in range(n):
-                t.append(self.f(K[i], K[j]))
-            F.append(t)
-        return np.array(F)
-
-    def update_f(self, F: List[List[int]], K: List[int]) -> NoReturn:
-        n = F.shape[0]
-        for i in range(len(K)):
-            denom = self.f(K[i], K[i]) + self.mu
-            for j in range(n):
-                for k in range(n):
-                    F[j][k] -= (F[j][i] * F[k][i]) / denom
-
-    def select_mi(self, K: List[List[int]], F: List[List[int]]) -> List[List[int]]:
-        return K[
-            np.argmax(
-                [np.linalg.norm(F[i]) ** 2 / (self.f(K[i], K[i]) + self.mu) \
-                    for i in range(len(K))]
-            )
-        ]
-
-    def rted(self, vec: np.ndarray, m: int) -> List[List[int]]:
-        """
-            vec: the dataset
-            m: the number of samples initialized from `vec`
-        """
-        K_ = []
-        for i in range(m):
-            M_ = random.sample(list(vec), self.Nrted)
-            M_ = M_ + K_
-            M_ = [tuple(M_[j]) for j in range(len(M_))]
-            M_ = list(set(M_))
-            F = self.f_same(M_)
-            self.update_f(F, M_)
-            K_.append(self.select_mi(M_, F))
-        return K_
-
 
 class MicroAL(RandomizedTED):
 
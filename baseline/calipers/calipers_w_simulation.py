@@ -26,6 +26,7 @@ from funcs.sim.o3cpu.o3cpu_simulation import O3CPUSimulation
 from funcs.design.o3cpu.o3cpu_design_space import parse_design_space
 from utils.utils import if_exist, info, remove, parse_args, mkdir, get_configs, \
     execute, assert_error, remove_suffix
+from utils.artifact import restore_artifact
 
 
 
@@ -95,7 +96,8 @@ SQ_Size                  {}
         output = os.path.join(
             arch_explorer_root, "temp", "gem5-{}".format(idx), bmark, "calipers.rpt"
         )
-        if if_exist(trace):
+        # the trace could be compressed in the result store
+        if restore_artifact(trace):
             cmd = "{} -c {} -t {} -o {}".format(
                 calipers_bin,
                 config_file,
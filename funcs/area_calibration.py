@@ -0,0 +1,162 @@
+# Author: baichen.bai@alibaba-inc.com
+
+
+import random
+import numpy as np
+from typing import List, Tuple
+from utils.utils import info, warn, error, assert_error
+from funcs.sim.o3cpu.o3cpu_simulation import O3CPUSimulation
+from funcs.design.o3cpu.o3cpu_area_model import O3CPUAreaModel
+from funcs.design.o3cpu.o3cpu_design_space import O3CPUDesignSpace, \
+    parse_design_space
+
+
+def generate_calibration_set(design_space: O3CPUDesignSpace) -> List[List[int]]:
+    """
+        A one-factor-at-a-time design: starting from a base design
+        with the median option of each component, we sweep every
+        option of each component. Each option of each component is
+        therefore observed at least once.
+    """
+    design = design_space.designs[0]
+    base = [
+        design_space.descriptions[design][component][
+            len(design_space.descriptions[design][component]) // 2
+        ] for component in design_space.components
+    ]
+    calibration_set = [base]
+    for i, component in enumerate(design_space.components):
+        for option in design_space.descriptions[design][component]:
+            if option == base[i]:
+                continue
+            vec = base.copy()
+            vec[i] = option
+            calibration_set.append(vec)
+    return calibration_set
+
+
+def generate_validation_set(
+    design_space: O3CPUDesignSpace,
+    size: int
+) -> List[List[int]]:
+    return [
+        design_space.idx_to_vec(idx) for idx in \
+            random.sample(range(1, design_space.size + 1), size)
+    ]
+
+
+def query_leakage_area(
+    simulator: O3CPUSimulation,
+    vec: List[int]
+) -> Tuple[float, float]:
+    """
+        McPAT needs the configuration generated by GEM5, so we
+        simulate the design if its area is not cached.
+    """
+    embedding = simulator.o3cpu_design_space.vec_to_embedding(vec)
+    cache = simulator.query_area(embedding)
+    if cache is None:
+        simulator.simulate(embedding)
+        cache = simulator.query_area(embedding)
+    if cache is None:
+        warn("{} is failed in area calibration.".format(embedding))
+    return cache
+
+
+def evaluate_area_model(
+    area_model: O3CPUAreaModel,
+    vec: np.ndarray,
+    area: np.ndarray,
+    leakage: np.ndarray
+) -> Tuple[float, float, float, float]:
+    """
+        return: MAPE & max. absolute percentage error of area and
+                leakage, respectively.
+    """
+    area_error = np.abs(
+        area_model.estimate_area_with_vec(vec) - area
+    ) / area
+    leakage_error = np.abs(
+        area_model.estimate_leakage_with_vec(vec) - leakage
+    ) / leakage
+    return np.mean(area_error), np.max(area_error), \
+        np.mean(leakage_error), np.max(leakage_error)
+
+
+def calibrate(
+    simulator: O3CPUSimulation,
+    calibration_set: List[List[int]]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    vec, area, leakage = [], [], []
+    for i, _vec in enumerate(calibration_set):
+        info("calibrating {}/{}: {}.".format(
+                i + 1, len(calibration_set), _vec
+            )
+        )
+        cache = query_leakage_area(simulator, _vec)
+        if cache is None:
+            continue
+        vec.append(_vec)
+        leakage.append(cache[0])
+        area.append(cache[1])
+    return np.array(vec), np.array(area), np.array(leakage)
+
+
+def area_calibration(configs: dict):
+    """
+        The one-factor-at-a-time calibration set is fitted exactly by
+        the additive model, so the fit error is reported on random
+        designs, i.e., the validation set, only.
+    """
+    design_space = parse_design_space(configs["design-space"])
+    simulator = O3CPUSimulation(
+        design_space=design_space,
+        configs=configs["simulation"]
+    )
+    configs = configs["area-calibration"]
+    assert configs["validation-size"] is not None and \
+        configs["validation-size"] > 0, \
+        assert_error("validation-size: {} should be positive.".format(
+                configs["validation-size"]
+            )
+        )
+    random.seed(configs["seed"])
+
+    vec, area, leakage = calibrate(
+        simulator,
+        generate_calibration_set(design_space)
+    )
+    if len(vec) == 0:
+        error("no designs are calibrated.")
+    area_model = O3CPUAreaModel(
+        design_space,
+        np.zeros((design_space.dims, 1)),
+        np.zeros((design_space.dims, 1))
+    )
+    area_model.fit(vec, area, leakage)
+
+    vec, area, leakage = calibrate(
+        simulator,
+        generate_validation_set(
+            design_space, configs["validation-size"]
+        )
+    )
+    if len(vec) == 0:
+        error("no designs are validated.")
+    fit_error = evaluate_area_model(area_model, vec, area, leakage)
+    info("fit error on {} random designs, area MAPE: {:.4f}, " \
+        "area max. APE: {:.4f}, leakage MAPE: {:.4f}, " \
+        "leakage max. APE: {:.4f}.".format(len(vec), *fit_error)
+    )
+    misc = {
+        "fit-error": {
+            "validation": {
+                "size": len(vec),
+                "area-mape": float(fit_error[0]),
+                "area-max-ape": float(fit_error[1]),
+                "leakage-mape": float(fit_error[2]),
+                "leakage-max-ape": float(fit_error[3])
+            }
+        }
+    }
+    area_model.dump(configs["output"], misc)
@@ -7,6 +7,7 @@ import sys
 import numpy as np
 from typing import List, Tuple
 from utils.utils import if_exist, info, write_txt, execute
+from utils.artifact import if_artifact_exist, open_artifact, restore_artifact
 from funcs.design.o3cpu.o3cpu_design_space import parse_design_space
 
 
@@ -97,7 +98,11 @@ def get_ppa_by_original_file(bmark_root: str):
     stats = os.path.join(bmark_root, "stats.txt")
     pp = os.path.join(bmark_root, "report")
     ppa_rpt = os.path.join(bmark_root, "ppa.rpt")
-    if not if_exist(ppa_rpt) and if_exist(stats) and not if_exist(pp):
+    if not if_exist(ppa_rpt) and if_artifact_exist(stats) and \
+        not if_artifact_exist(pp):
+        # the parser cannot read compressed artifacts
+        restore_artifact(os.path.join(bmark_root, "config.json"))
+        restore_artifact(stats)
         template = os.path.join(
             arch_explorer_root,
             "tools",
@@ -145,8 +150,8 @@ def get_ppa_by_original_file(bmark_root: str):
 
 def get_perf(stats) -> Tuple[float, float]:
     ipc = cpi = 0
-    if if_exist(stats):
-        with open(stats, 'r') as f:
+    if if_artifact_exist(stats):
+        with open_artifact(stats, 'r') as f:
             cnt = f.readlines()
         cpu = "switch_cpus"
         for line in cnt:
@@ -164,7 +169,7 @@ def get_power_area(report: str) -> Tuple[float, float] :
     p_dynamic = re.compile(r"Runtime\ Dynamic\ =\ [+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?\ W")
     p_area = re.compile(r"Area\ =\ [+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?\ mm\^2")
     subthreshold, gate, dynamic, area = 0, 0, 0, 0
-    with open(report, 'r') as f:
+    with open_artifact(report, 'r') as f:
         cnt = f.read()
         subthreshold = float(p_subthreshold.findall(cnt)[1][0])
         gate = float(p_gate.findall(cnt)[1][0])
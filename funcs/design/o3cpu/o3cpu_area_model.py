@@ -0,0 +1,180 @@
+# Author: baichen.bai@alibaba-inc.com
+
+
+import yaml
+import numpy as np
+from typing import List, Dict, Tuple, NoReturn, Union
+from utils.utils import if_exist, info, assert_error
+from funcs.design.o3cpu.o3cpu_design_space import O3CPUDesignSpace
+
+
+class O3CPUAreaModel(object):
+    """
+        An additive area & leakage model over the O3CPU design space.
+        McPAT area (and leakage) is close to additive over components,
+        i.e., caches, ROB, register files, FU pool, predictors, etc.
+        We model
+            area(design) = intercept + \sum_{i} area_table[i][option_i]
+        where `option_i` is the option index of the i-th component
+        specified by the "Components" sheet.
+    """
+    def __init__(
+        self,
+        design_space: O3CPUDesignSpace,
+        area_table: np.ndarray,
+        leakage_table: np.ndarray
+    ):
+        super(O3CPUAreaModel, self).__init__()
+        self.design_space = design_space
+        """
+            `area_table` and `leakage_table` are padded matrices with
+            the shape of (dims, max. options + 1). The column 0 is
+            reserved for the intercept, which is saved at [0][0].
+        """
+        self.area_table = np.array(area_table, dtype=np.float64)
+        self.leakage_table = np.array(leakage_table, dtype=np.float64)
+        self.options = self.construct_options()
+
+    def construct_options(self) -> List[List[int]]:
+        """
+            options: <list> option indices of each component
+            ```example
+                [[1, 2, 3, 4], [1, 2, 3], [1, 2]]
+            ```
+        """
+        options = []
+        for component in self.design_space.components:
+            options.append(
+                [k for k in self.design_space.components_mappings[component].keys() \
+                    if k != "description"
+                ]
+            )
+        return options
+
+    def encode(self, vec: np.ndarray) -> np.ndarray:
+        """
+            One-hot encoding of option indices, which is used to fit
+            additive tables. An extra column of ones is for the
+            intercept.
+        """
+        vec = np.atleast_2d(vec)
+        x = [np.ones((vec.shape[0], 1))]
+        for i, options in enumerate(self.options):
+            x.append(
+                (vec[:, i][:, np.newaxis] == np.array(options)[np.newaxis, :]) \
+                    .astype(np.float64)
+            )
+        return np.concatenate(x, axis=1)
+
+    def decode(self, coef: np.ndarray) -> np.ndarray:
+        """
+            Transfer fitted coefficients to a padded table.
+        """
+        table = np.zeros(
+            (self.design_space.dims, max(map(max, self.options)) + 1)
+        )
+        table[0][0] = coef[0]
+        j = 1
+        for i, options in enumerate(self.options):
+            for option in options:
+                table[i][option] = coef[j]
+                j += 1
+        return table
+
+    def fit(
+        self,
+        vec: np.ndarray,
+        area: np.ndarray,
+        leakage: np.ndarray
+    ) -> NoReturn:
+        """
+            Fit per-component tables with the least squares method.
+        """
+        x = self.encode(vec)
+        area_coef = np.linalg.lstsq(x, np.array(area), rcond=None)[0]
+        leakage_coef = np.linalg.lstsq(x, np.array(leakage), rcond=None)[0]
+        self.area_table = self.decode(area_coef)
+        self.leakage_table = self.decode(leakage_coef)
+
+    def indices_to_vec(self, indices: Union[int, List[int], np.ndarray]) -> np.ndarray:
+        """
+            indices: design indices with the shape of (n,)
+            return: option indices with the shape of (n, dims)
+        """
+        return self.design_space.idx_to_vec(
+            np.atleast_1d(np.array(indices, dtype=np.int64))
+        )
+
+    def estimate_impl(self, table: np.ndarray, vec: np.ndarray) -> np.ndarray:
+        return table[0][0] + \
+            table[np.arange(self.design_space.dims)[np.newaxis, :], vec].sum(axis=1)
+
+    def estimate_area_with_vec(self, vec: np.ndarray) -> np.ndarray:
+        return self.estimate_impl(self.area_table, np.atleast_2d(vec))
+
+    def estimate_leakage_with_vec(self, vec: np.ndarray) -> np.ndarray:
+        return self.estimate_impl(self.leakage_table, np.atleast_2d(vec))
+
+    def estimate_area(self, indices: Union[int, List[int], np.ndarray]) -> np.ndarray:
+        """
+            indices: design indices with the shape of (n,)
+            return: estimated area (mm^2) with the shape of (n,)
+        """
+        return self.estimate_area_with_vec(self.indices_to_vec(indices))
+
+    def estimate_leakage(self, indices: Union[int, List[int], np.ndarray]) -> np.ndarray:
+        """
+            indices: design indices with the shape of (n,)
+            return: estimated leakage (W) with the shape of (n,)
+        """
+        return self.estimate_leakage_with_vec(self.indices_to_vec(indices))
+
+    def dump(self, path: str, misc: Dict = {}) -> NoReturn:
+        """
+            The tables are saved with the YAML format, keyed by
+            component names and option indices.
+        """
+        model = {
+            "intercept": {
+                "area": float(self.area_table[0][0]),
+                "leakage": float(self.leakage_table[0][0])
+            },
+            "components": {}
+        }
+        for i, component in enumerate(self.design_space.components):
+            model["components"][component] = {
+                int(option): {
+                    "area": float(self.area_table[i][option]),
+                    "leakage": float(self.leakage_table[i][option])
+                } for option in self.options[i]
+            }
+        model.update(misc)
+        with open(path, 'w') as f:
+            yaml.dump(model, f, sort_keys=False)
+        info("dump the area model to {}".format(path))
+
+
+def load_area_model(path: str, design_space: O3CPUDesignSpace) -> O3CPUAreaModel:
+    if_exist(path, strict=True, quiet=False)
+    with open(path, 'r') as f:
+        model = yaml.load(f, Loader=yaml.FullLoader)
+    area_model = O3CPUAreaModel(
+        design_space,
+        np.zeros((design_space.dims, 1)),
+        np.zeros((design_space.dims, 1))
+    )
+    area_table = np.zeros(
+        (design_space.dims, max(map(max, area_model.options)) + 1)
+    )
+    leakage_table = np.zeros_like(area_table)
+    area_table[0][0] = model["intercept"]["area"]
+    leakage_table[0][0] = model["intercept"]["leakage"]
+    for i, component in enumerate(design_space.components):
+        assert component in model["components"], \
+            assert_error("{} is not found in {}.".format(component, path))
+        for option, v in model["components"][component].items():
+            area_table[i][int(option)] = v["area"]
+            leakage_table[i][int(option)] = v["leakage"]
+    area_model.area_table = area_table
+    area_model.leakage_table = leakage_table
+    return area_model
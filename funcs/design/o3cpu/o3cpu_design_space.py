@@ -2,9 +2,16 @@
 
 
 import os
+import json
+import hashlib
+import itertools
+import threading
 import numpy as np
-from typing import NoReturn
-from utils.utils import load_xlsx, assert_error
+from bisect import bisect_right
+from functools import lru_cache
+from collections import OrderedDict
+from typing import List, Tuple, Union, Optional, NoReturn
+from utils.utils import load_xlsx, assert_error, if_exist, info, warn
 from funcs.design.design_space import DesignSpace, Macros, \
     parse_design_space_sheet, parse_components_sheet
 
@@ -14,33 +21,111 @@ class O3CPUMacros(Macros):
         self.components_mappings = components_mappings
         self.component_dims = component_dims
         super(O3CPUMacros, self).__init__()
+        self.construct_mapping_tables()
+
+    def construct_mapping_tables(self) -> NoReturn:
+        """
+            Reverse look-up tables of `components_mappings`.
+            self.mapping_offsets: <list> [start, end) of each component
+                                         in an embedding
+            self.params_to_option: <list> dicts from parameters of each
+                                          component to its option index
+            self.params_table: <list> parameters of each component
+                                      indexed by option indices, with the
+                                      shape of (#option + 1, width)
+        """
+        self.mapping_offsets = []
+        self.params_to_option = []
+        self.params_table = []
+        j = 0
+        for component in self.components:
+            mappings = self.components_mappings[component]
+            l = len(mappings["description"])
+            self.mapping_offsets.append((j, j + l))
+            j += l
+            options = [k for k in mappings.keys() if k != "description"]
+            self.params_to_option.append(
+                dict((tuple(mappings[k]), k) for k in options)
+            )
+            table = np.zeros(
+                (max(options) + 1, l),
+                dtype=np.array([mappings[k] for k in options]).dtype
+            )
+            for k in options:
+                table[k] = mappings[k]
+            self.params_table.append(table)
 
     def get_mapping_params(self, vec: list, idx: int) -> list:
         return self.components_mappings[self.components[idx]][vec[idx]]
 
     def get_mapping_idx(self, params: list, idx: int) -> int:
-        for k, v in self.components_mappings[self.components[idx]].items():
-            if params == v:
-                return k
+        return self.params_to_option[idx].get(tuple(params))
 
-    def vec_to_embedding(self, vec: list) -> list:
+    def vec_to_embedding(self, vec: Union[list, np.ndarray]) -> Union[list, np.ndarray]:
+        """
+            vec: a vector, or vectors with the shape of (n, dims)
+        """
+        if isinstance(vec, np.ndarray) and vec.ndim == 2:
+            # NOTICE: arrays are transposed to be contiguous w.r.t. components
+            vec = np.ascontiguousarray(vec.T)
+            return np.concatenate(
+                [self.params_table[i].T[:, vec[i]] for i in range(self.dims)]
+            ).T
         embedding = []
         for i in range(len(vec)):
             embedding += self.get_mapping_params(vec, i)
         return embedding
 
-    def embedding_to_vec(self, embedding: list) -> list:
+    def embedding_to_vec(self, embedding: Union[list, np.ndarray]) -> Union[list, np.ndarray]:
+        """
+            embedding: an embedding, or embeddings with the shape of
+            (n, #parameters)
+            NOTICE: a parameter not in `components_mappings` is `None`
+            for an embedding, and raises `ValueError` for embeddings.
+        """
+        if isinstance(embedding, np.ndarray) and embedding.ndim == 2:
+            return self.embeddings_to_vec(embedding)
         vec = []
-        i = j = 0
-        while i < self.dims:
-            l = len(self.components_mappings[self.components[i]]["description"])
-            vec.append(self.get_mapping_idx(embedding[j: j + l], i))
-            i += 1
-            j += l
+        for i, (start, end) in enumerate(self.mapping_offsets):
+            vec.append(self.get_mapping_idx(embedding[start: end], i))
         return vec
 
+    def embeddings_to_vec(self, embedding: np.ndarray) -> np.ndarray:
+        embedding = np.ascontiguousarray(embedding.T)
+        vec = np.zeros((self.dims, embedding.shape[1]), dtype=np.int64)
+        for i, (start, end) in enumerate(self.mapping_offsets):
+            table = self.params_table[i][1:]
+            params = embedding[start: end]
+            if end - start == 1 and table.dtype.kind in "iu" and \
+                table.min() >= 0:
+                # look up option indices directly, and invalid parameters
+                # are mapped to the last entry, i.e., 0
+                lut = np.zeros(table.max() + 2, dtype=np.int64)
+                lut[table[::-1, 0]] = np.arange(len(table), 0, -1)
+                option = lut[np.where(
+                    (params[0] >= 0) & (params[0] < len(lut)), params[0], -1
+                )]
+                valid = option > 0
+            else:
+                option = np.zeros(embedding.shape[1], dtype=np.int64)
+                for k in reversed(range(len(table))):
+                    option[np.all(params == table[k][:, np.newaxis], axis=0)] = k + 1
+                valid = option > 0
+            if not np.all(valid):
+                raise ValueError(
+                    "invalid parameters of {}: {}.".format(
+                        self.components[i],
+                        params[:, ~valid][:, 0].tolist()
+                    )
+                )
+            vec[i] = option
+        return vec.T
+
 
 class O3CPUDesignSpace(DesignSpace, O3CPUMacros):
+    # the maximal size of LRU caches of scalar conversions
+    cache_size = 2 ** 16
+
     def __init__(self, descriptions: dict, components_mappings: dict, size: int):
         """
             descriptions: <class "collections.OrderedDict">
@@ -122,6 +207,8 @@ class O3CPUDesignSpace(DesignSpace, O3CPUMacros):
         self.acc_design_size = np.cumsum(self.design_size).tolist()
         DesignSpace.__init__(self, size, len(self.components))
         O3CPUMacros.__init__(self, components_mappings, self.construct_component_dims())
+        self.construct_index_tables()
+        self.construct_cache()
 
     def construct_design_size(self) -> list:
         """
@@ -157,57 +244,353 @@ class O3CPUDesignSpace(DesignSpace, O3CPUMacros):
             component_dims.append(_component_dims)
         return component_dims
 
-    def valid(self, idx: int) -> NoReturn:
-        assert idx > 0 and idx <= self.size, \
+    def construct_index_tables(self) -> NoReturn:
+        """
+            Look-up tables of the mixed-radix index, where the first
+            component is the least significant digit.
+            self.offsets: <list> the offset of each design
+            self.strides: <list> strides of each component w.r.t.
+                                 each design
+            self.option_table: <list> option indices of each component
+                                      indexed by digits w.r.t. each design
+            self.option_to_digit: <list> dicts, i.e., the reverse of
+                                         `option_table`
+        """
+        self.offsets = [0] + self.acc_design_size[:-1]
+        self.strides = []
+        self.option_table = []
+        self.option_to_digit = []
+        for design in self.designs:
+            strides, option_table, option_to_digit = [], [], []
+            stride = 1
+            for component in self.components:
+                options = [
+                    int(option) for option in \
+                        self.descriptions[design][component]
+                ]
+                strides.append(stride)
+                stride *= len(options)
+                option_table.append(options)
+                option_to_digit.append(
+                    dict((option, digit) for digit, option in enumerate(options))
+                )
+            self.strides.append(strides)
+            self.option_table.append(option_table)
+            self.option_to_digit.append(option_to_digit)
+
+    def construct_cache(self) -> NoReturn:
+        """
+            Scalar conversions are memoized with LRU caches. Caches
+            are not pickled, and they are re-constructed in sub-processes.
+        """
+        self.idx_to_embedding_cache = lru_cache(maxsize=self.cache_size)(
+            lambda idx: tuple(self.vec_to_embedding(self.idx_to_vec(idx)))
+        )
+        self.embedding_to_idx_cache = lru_cache(maxsize=self.cache_size)(
+            lambda embedding: self.vec_to_idx(self.embedding_to_vec(embedding))
+        )
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["idx_to_embedding_cache"]
+        del state["embedding_to_idx_cache"]
+        return state
+
+    def __setstate__(self, state: dict) -> NoReturn:
+        self.__dict__.update(state)
+        self.construct_cache()
+
+    def valid(self, idx: Union[int, np.ndarray]) -> NoReturn:
+        assert np.all(idx > 0) and np.all(idx <= self.size), \
             assert_error("invalid index.")
 
-    def idx_to_vec(self, idx: int) -> list:
+    def idx_to_vec(self, idx: Union[int, np.ndarray]) -> Union[list, np.ndarray]:
         """
-            idx: the index of a microarchitecture
+            idx: the index of a microarchitecture, or indices with
+            the shape of (n,)
         """
+        if isinstance(idx, np.ndarray):
+            return self.indices_to_vec(idx)
         self.valid(idx)
-        idx -= 1
+        idx = int(idx) - 1
+        design = bisect_right(self.acc_design_size, idx)
+        # NOTICE: subtract the offset
+        idx -= self.offsets[design]
         vec = []
-        design = np.where(np.array(self.acc_design_size) > idx)[0][0]
-        if design:
-            # NOTICE: subtract the offset
-            idx -= self.acc_design_size[design - 1]
-        for dim in self.component_dims[design]:
-            vec.append(idx % dim)
-            idx //= dim
-        # add the offset
-        for i in range(len(vec)):
-            vec[i] = self.descriptions[self.designs[design]][self.components[i]][vec[i]]
+        for option_table in self.option_table[design]:
+            idx, digit = divmod(idx, len(option_table))
+            vec.append(option_table[digit])
         return vec
 
-    def vec_to_idx(self, vec: list) -> int:
+    def indices_to_vec(self, indices: np.ndarray) -> np.ndarray:
+        indices = np.atleast_1d(indices).astype(np.int64)
+        self.valid(indices)
+        indices = indices - 1
+        design = np.searchsorted(
+            self.acc_design_size, indices, side="right"
+        )
+        indices = indices - np.array(self.offsets, dtype=np.int64)[design]
+        # NOTICE: arrays are transposed to be contiguous w.r.t. components
+        vec = np.zeros((self.dims, len(indices)), dtype=np.int64)
+        for d in np.unique(design):
+            mask = design == d
+            full = bool(np.all(mask))
+            idx = indices if full else indices[mask]
+            _vec = vec if full else np.zeros((self.dims, len(idx)), dtype=np.int64)
+            for i, option_table in enumerate(self.option_table[d]):
+                idx, digit = np.divmod(idx, len(option_table))
+                _vec[i] = np.take(option_table, digit)
+            if not full:
+                vec[:, mask] = _vec
+        return vec.T
+
+    def vec_to_idx(self, vec: Union[list, np.ndarray]) -> Union[int, np.ndarray]:
         """
-            vec: the list of a microarchitecture encoding
+            vec: the list of a microarchitecture encoding, or vectors
+            with the shape of (n, dims). `vec` is not modified.
         """
-        idx = 0
         design = 0
-        # subtract the offset
-        for i in range(len(vec)):
-            vec[i] = self.descriptions[self.designs[design]][self.components[i]].index(vec[i])
-        for j, k in enumerate(vec):
-            idx += int(np.prod(self.component_dims[design][:j])) * k
-        if design:
-            # NOTICE: add the offset
-            idx += self.acc_design_size[design - 1]
-        idx += 1
+        if isinstance(vec, np.ndarray) and vec.ndim == 2:
+            return self.vecs_to_idx(vec, design)
+        idx = 0
+        for i, option in enumerate(vec):
+            if option not in self.option_to_digit[design][i]:
+                raise ValueError(
+                    "{} is not an option of {}.".format(
+                        option, self.components[i]
+                    )
+                )
+            idx += self.strides[design][i] * \
+                self.option_to_digit[design][i][option]
+        # NOTICE: add the offset
+        idx += self.offsets[design] + 1
         self.valid(idx)
         return idx
 
-    def idx_to_embedding(self, idx: int) -> list:
-        vec = self.idx_to_vec(idx)
-        return self.vec_to_embedding(vec)
+    def vecs_to_idx(self, vec: np.ndarray, design: int = 0) -> np.ndarray:
+        vec = np.ascontiguousarray(vec.T, dtype=np.int64)
+        idx = np.zeros(vec.shape[1], dtype=np.int64)
+        for i, option_to_digit in enumerate(self.option_to_digit[design]):
+            lut = np.full(max(option_to_digit.keys()) + 2, -1, dtype=np.int64)
+            lut[list(option_to_digit.keys())] = list(option_to_digit.values())
+            # NOTICE: invalid options are mapped to the last entry, i.e., -1
+            digit = lut[np.where(
+                (vec[i] >= 0) & (vec[i] < len(lut)), vec[i], -1
+            )]
+            if np.any(digit < 0):
+                raise ValueError(
+                    "{} is not an option of {}.".format(
+                        vec[i][digit < 0][0], self.components[i]
+                    )
+                )
+            idx += self.strides[design][i] * digit
+        # NOTICE: add the offset
+        idx += self.offsets[design] + 1
+        self.valid(idx)
+        return idx
 
-    def embedding_to_idx(self, embedding: list) -> int:
-        vec = self.embedding_to_vec(embedding)
-        return self.vec_to_idx(vec)
+    def get_component_idx(self, component: Union[int, str]) -> int:
+        return component if isinstance(component, (int, np.integer)) \
+            else self.components.index(component)
 
+    def construct_moves(
+        self,
+        components: Optional[List[Union[int, str]]] = None,
+        order: int = 1
+    ) -> np.ndarray:
+        """
+            Moves of neighbors, i.e., each move steps 1 ~ `order`
+            components of `components` (all components by default) by
+            +1 or -1 digit.
+            return: moves with the shape of (m, dims)
+        """
+        components = range(self.dims) if components is None else \
+            [self.get_component_idx(component) for component in components]
+        moves = []
+        for k in range(1, order + 1):
+            for combination in itertools.combinations(components, k):
+                for steps in itertools.product([-1, 1], repeat=k):
+                    move = [0] * self.dims
+                    for i, step in zip(combination, steps):
+                        move[i] = step
+                    moves.append(move)
+        return np.array(moves, dtype=np.int64).reshape(-1, self.dims)
 
-def parse_o3cpu_design_space(design_space_xlsx: str) -> O3CPUDesignSpace:
+    def indices_to_digits(self, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+            return: digits of each component with the shape of (n, dims),
+            and the design of each index with the shape of (n,)
+        """
+        indices = np.atleast_1d(indices).astype(np.int64)
+        self.valid(indices)
+        indices = indices - 1
+        design = np.searchsorted(
+            self.acc_design_size, indices, side="right"
+        )
+        indices = indices - np.array(self.offsets, dtype=np.int64)[design]
+        strides = np.array(self.strides, dtype=np.int64)[design]
+        dims = np.array(self.component_dims, dtype=np.int64)[design]
+        return indices[:, np.newaxis] // strides % dims, design
+
+    def neighbors(
+        self,
+        indices: Union[int, List[int], np.ndarray],
+        moves: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+            Neighbors of designs in the index space, where a neighbor is
+            a design with some components stepped by +1 or -1 option.
+            indices: design indices with the shape of (n,)
+            moves: steps of each component with the shape of (m, dims),
+            whose entries are -1, 0 or 1, e.g., from `construct_moves`.
+            All single-component moves are used by default.
+            return: neighbors with the shape of (n, m), and the validity
+            mask with the same shape, i.e., a move beyond the first or
+            the last option is invalid, and its neighbor is 0.
+        """
+        if moves is None:
+            moves = self.construct_moves()
+        moves = np.atleast_2d(np.array(moves, dtype=np.int64))
+        assert np.all(np.abs(moves) <= 1), \
+            assert_error("steps of moves should be -1, 0 or 1.")
+        indices = np.atleast_1d(np.array(indices, dtype=np.int64))
+        digits, design = self.indices_to_digits(indices)
+        dims = np.array(self.component_dims, dtype=np.int64)[design]
+        # the number of components that cannot be stepped by each move,
+        # which is counted with BLAS, i.e., floating points
+        blocked = (digits == dims - 1).astype(np.float32) @ \
+            (moves == 1).T.astype(np.float32) + \
+            (digits == 0).astype(np.float32) @ \
+            (moves == -1).T.astype(np.float32)
+        valid = blocked == 0
+        # offsets of each move w.r.t. each design
+        offsets = np.array(self.strides, dtype=np.int64) @ moves.T
+        neighbors = np.where(
+            valid, indices[:, np.newaxis] + offsets[design], 0
+        )
+        return neighbors, valid
+
+    def idx_to_embedding(self, idx: Union[int, np.ndarray]) -> Union[list, np.ndarray]:
+        """
+            idx: the index of a microarchitecture, or indices with the
+            shape of (n,), which returns embeddings with the shape of
+            (n, #parameters)
+        """
+        if isinstance(idx, np.ndarray):
+            return self.vec_to_embedding(self.indices_to_vec(idx))
+        return list(self.idx_to_embedding_cache(idx))
+
+    def embedding_to_idx(self, embedding: Union[list, np.ndarray]) -> Union[int, np.ndarray]:
+        """
+            embedding: an embedding, or embeddings with the shape of
+            (n, #parameters), which returns indices with the shape of (n,)
+        """
+        if isinstance(embedding, np.ndarray) and embedding.ndim == 2:
+            return self.vec_to_idx(self.embedding_to_vec(embedding))
+        return self.embedding_to_idx_cache(tuple(embedding))
+
+
+"""
+    The parsed design space is cached in "<xlsx>.cache.json", which is
+    keyed by the SHA-256 of the xlsx, so the xlsx is parsed with pandas
+    only if it is changed. `cache_version` should be increased once the
+    format of the cache or the parsing is changed.
+"""
+cache_version = 1
+
+
+def get_design_space_cache(design_space_xlsx: str) -> str:
+    return design_space_xlsx + ".cache.json"
+
+
+def get_xlsx_hash(design_space_xlsx: str) -> str:
+    with open(design_space_xlsx, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def to_builtin(value):
+    """
+        Values from pandas are NumPy scalars, which are not serializable.
+    """
+    if isinstance(value, (list, tuple)):
+        return [to_builtin(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def load_design_space_cache(
+    design_space_xlsx: str,
+    xlsx_hash: str
+) -> Optional[O3CPUDesignSpace]:
+    cache = get_design_space_cache(design_space_xlsx)
+    if not if_exist(cache):
+        return None
+    try:
+        with open(cache, 'r') as f:
+            data = json.load(f, object_pairs_hook=OrderedDict)
+        if data["version"] != cache_version or data["hash"] != xlsx_hash:
+            return None
+        descriptions = data["descriptions"]
+        # keys of components mappings are option indices, i.e., <int>
+        components_mappings = OrderedDict(
+            (name, OrderedDict((k, v) for k, v in mappings)) \
+                for name, mappings in data["components-mappings"]
+        )
+    except (ValueError, KeyError, TypeError) as e:
+        warn("{} is corrupted: {}.".format(cache, e))
+        return None
+    info("read the design space from {}".format(cache))
+    return O3CPUDesignSpace(
+        descriptions,
+        components_mappings,
+        data["size"]
+    )
+
+
+def write_design_space_cache(
+    design_space_xlsx: str,
+    xlsx_hash: str,
+    design_space: O3CPUDesignSpace
+) -> NoReturn:
+    cache = get_design_space_cache(design_space_xlsx)
+    data = {
+        "version": cache_version,
+        "hash": xlsx_hash,
+        "size": int(design_space.size),
+        "descriptions": OrderedDict(
+            (design, OrderedDict(
+                (component, to_builtin(candidates)) \
+                    for component, candidates in components.items()
+            )) for design, components in design_space.descriptions.items()
+        ),
+        "components-mappings": [
+            [name, [[k, to_builtin(v)] for k, v in mappings.items()]] \
+                for name, mappings in design_space.components_mappings.items()
+        ]
+    }
+    temp = "{}.tmp-{}-{}".format(cache, os.getpid(), threading.get_ident())
+    try:
+        with open(temp, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(temp, cache)
+    except OSError as e:
+        # the design space is still available, e.g., in a read-only directory
+        warn("failed to write {}: {}.".format(cache, e))
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+def parse_o3cpu_design_space(
+    design_space_xlsx: str,
+    cache: bool = True
+) -> O3CPUDesignSpace:
+    if cache:
+        if_exist(design_space_xlsx, strict=True, quiet=False)
+        xlsx_hash = get_xlsx_hash(design_space_xlsx)
+        design_space = load_design_space_cache(design_space_xlsx, xlsx_hash)
+        if design_space is not None:
+            return design_space
     o3cpu_design_space_sheet = load_xlsx(
         design_space_xlsx, sheet_name="O3CPU"
     )
@@ -222,14 +605,23 @@ def parse_o3cpu_design_space(design_space_xlsx: str) -> O3CPUDesignSpace:
     components_mappings = parse_components_sheet(
         components_sheet
     )
-    return O3CPUDesignSpace(
+    design_space = O3CPUDesignSpace(
         descriptions,
         components_mappings,
         int(o3cpu_design_space_sheet.values[0][-1])
     )
+    if cache:
+        write_design_space_cache(design_space_xlsx, xlsx_hash, design_space)
+    return design_space
 
 
-def parse_design_space(design_space_root: str) -> O3CPUDesignSpace:
+def parse_design_space(
+    design_space_root: str,
+    cache: bool = True
+) -> O3CPUDesignSpace:
+    """
+        cache: use the compiled design space if the xlsx is not changed
+    """
     design_space_xlsx = os.path.abspath(
         os.path.join(
             os.path.dirname(__file__),
@@ -242,5 +634,6 @@ def parse_design_space(design_space_root: str) -> O3CPUDesignSpace:
         )
     )
     return parse_o3cpu_design_space(
-        design_space_xlsx
+        design_space_xlsx,
+        cache=cache
     )
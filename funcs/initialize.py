@@ -4,6 +4,7 @@
 import os
 import math
 import random
+import itertools
 import numpy as np
 from utils.utils import mkdir, info
 from funcs.design.o3cpu.o3cpu_design_space import parse_design_space
@@ -36,28 +37,71 @@ class RandomizedTED(object):
         )
 
     def f_same(self, K):
-        n = len(K)
-        F = []
-        for i in range(n):
-            t = []
-            for j in range(n):
-                t.append(self.f(K[i], K[j]))
-            F.append(t)
-        return np.array(F)
+        """
+            The RBF kernel among `K`. Pairwise distances are computed at
+            once, and kernel values are computed by `pow` of each unique
+            distance, so they are identical to `f` for integral embeddings.
+        """
+        # NOTICE: target value should be discards
+        K = np.array(K, dtype=np.float64)[:, :-2]
+        distance = np.sum(
+            (K[:, np.newaxis, :] - K[np.newaxis, :, :]) ** 2,
+            axis=-1
+        )
+        distance, inverse = np.unique(distance, return_inverse=True)
+        exponent = -np.sqrt(distance) ** 2 / (2 * self.sig**2)
+        # NOTICE: e^x is underflowed to 0 if x < -746
+        kernel = np.zeros(len(distance))
+        mask = exponent >= -746
+        kernel[mask] = np.fromiter(
+            map(pow, itertools.repeat(math.e), exponent[mask].tolist()),
+            dtype=np.float64,
+            count=np.count_nonzero(mask)
+        )
+        return kernel[inverse].reshape(len(K), len(K))
 
     def update_f(self, F, K):
-        n = F.shape[0]
+        """
+            It is equivalent to the in-place update, i.e.,
+            for i, j, k:
+                F[j][k] -= (F[j][i] * F[k][i]) / denom
+            where F[j][i] & F[k][i] could be updated before (j, k).
+            So, the i-th update is the outer product of the i-th column
+            before & after the update, masked by the update order. The
+            update is confined to the support of the i-th column, i.e.,
+            rows & columns of its non-zero entries.
+        """
+        # NOTICE: the distance of a point to itself is 0, so `denom`
+        # is identical for all points
+        denom = self.f(K[0], K[0]) + self.mu
         for i in range(len(K)):
-            denom = self.f(K[i], K[i]) + self.mu
-            for j in range(n):
-                for k in range(n):
-                    F[j][k] -= (F[j][i] * F[k][i]) / denom
+            support = np.flatnonzero(F[:, i])
+            if len(support) == 1 and support[0] == i:
+                # only the diagonal is updated, e.g., a small `sig`
+                F[i][i] -= (F[i][i] * F[i][i]) / denom
+                continue
+            a = F[support, i]
+            after = support > i
+            # F[i][i] before & after the i-th row is updated
+            diag = F[i][i]
+            s = np.where(after, diag - (diag * diag) / denom, diag)
+            # the i-th column after each row is updated
+            _a = a - (a * s) / denom
+            # F[k][i] when F[j][k] is updated
+            y = np.where(support[np.newaxis, :] < support[:, np.newaxis], _a, a)
+            y[after, after] = _a[after]
+            # F[j][i] when F[j][k] is updated
+            y *= np.where(
+                after[np.newaxis, :], _a[:, np.newaxis], a[:, np.newaxis]
+            )
+            y /= denom
+            F[np.ix_(support, support)] -= y
 
     def select_mi(self, K, F):
+        denom = self.f(K[0], K[0]) + self.mu
         return K[
             np.argmax(
-                [np.linalg.norm(F[i]) ** 2 / (self.f(K[i], K[i]) + self.mu) \
-                    for i in range(len(K))]
+                [np.linalg.norm(F[i]) ** 2 / denom for i in range(len(K))]
             )
         ]
 
@@ -69,7 +113,8 @@ class RandomizedTED(object):
         """
         K_ = []
         for i in range(m):
-            M_ = random.sample(list(vec), self.Nrted)
+            # NOTICE: it is identical to sample `list(vec)`
+            M_ = [vec[j] for j in random.sample(range(len(vec)), self.Nrted)]
             M_ = M_ + K_
             M_ = [tuple(M_[j]) for j in range(len(M_))]
             M_ = list(set(M_))
@@ -95,8 +140,8 @@ def initialize(configs: dict):
 			configs["initialize"]["size"])
 		)
 		group = random.sample(range(o3cpu_design_space.size), configs["initialize"]["group-size"])
-		_group = [o3cpu_design_space.idx_to_embedding(j) for j in group]
-		for j in sampler.rted(np.array(_group), configs["initialize"]["top-k"]):
+		_group = o3cpu_design_space.idx_to_embedding(np.array(group))
+		for j in sampler.rted(_group, configs["initialize"]["top-k"]):
 			if j not in sample:
 				sample.append(j)
 
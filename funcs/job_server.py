@@ -0,0 +1,322 @@
+# Author: baichen.bai@alibaba-inc.com
+
+
+import os
+import time
+import socket
+import threading
+from collections import deque
+from multiprocessing.connection import Listener, Client, Connection
+from typing import List, Dict, Optional, NoReturn
+from utils.utils import if_exist, mkdir, remove_suffix, info, warn
+from funcs.simulation import get_candidate_embeddings
+from funcs.sim.o3cpu.o3cpu_simulation import O3CPUSimulation
+from funcs.design.o3cpu.o3cpu_design_space import parse_design_space
+
+
+"""
+    A job is a (design, benchmark) pair. The job server hands out jobs
+    to workers, which register over TCP, and collects results into the
+    result store. The protocol is:
+    1. worker -> server: {"type": "request", "worker": name, "last": idx}
+    2. server -> worker: {"type": "job", "job": job}, or
+                         {"type": "wait", "interval": seconds}, or
+                         {"type": "stop"}
+    3. worker -> server: {"type": "result", "job": id, "succeeded": bool,
+                          "files": {relative path: content}}
+"""
+
+
+def get_job_server_configs(configs: dict) -> Dict:
+    return configs["job-server"]
+
+
+def get_address(configs: dict):
+    configs = get_job_server_configs(configs)
+    return (configs["host"], configs["port"])
+
+
+def get_authkey(configs: dict) -> bytes:
+    return str(get_job_server_configs(configs)["authkey"]).encode()
+
+
+def collect_results(temp: str, benchmark: str) -> Dict[str, bytes]:
+    """
+        Collect results of `benchmark` in `temp`, i.e., `temp/gem5-<idx>`,
+        including the area cache & logs. The trace is excluded since it
+        is too large, even if it is compressed.
+    """
+    files = {}
+    benchmark = remove_suffix(benchmark, ".riscv")
+    roots = [os.path.join(temp, benchmark), os.path.join(temp, "logs")]
+    for root in roots:
+        if not if_exist(root):
+            continue
+        for _root, _, _files in os.walk(root):
+            for f in _files:
+                path = os.path.join(_root, f)
+                rel = os.path.relpath(path, temp)
+                if f in ["instruction-flow", "instruction-flow.gz"] or \
+                    (rel.startswith("logs") and \
+                        not f.startswith(benchmark)):
+                    continue
+                with open(path, 'rb') as fin:
+                    files[rel] = fin.read()
+    area_rpt = os.path.join(temp, "area.rpt")
+    if if_exist(area_rpt):
+        with open(area_rpt, 'rb') as fin:
+            files["area.rpt"] = fin.read()
+    return files
+
+
+def store_results(temp: str, files: Dict[str, bytes]) -> NoReturn:
+    for rel, content in files.items():
+        path = os.path.abspath(os.path.join(temp, rel))
+        assert path.startswith(os.path.abspath(temp) + os.sep), \
+            "{} is out of the result store.".format(rel)
+        mkdir(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(content)
+
+
+class JobServer(object):
+    """
+        The job server. Jobs of a disconnected worker are re-assigned.
+    """
+    def __init__(self, configs: dict):
+        super(JobServer, self).__init__()
+        self.configs = configs
+        self.simulator = O3CPUSimulation(
+            design_space=parse_design_space(configs["design-space"]),
+            configs=configs["simulation"]
+        )
+        self.server_configs = get_job_server_configs(configs)
+        self.lock = threading.Lock()
+        self.pending = deque()
+        self.running = {}
+        self.retries = {}
+        self.finished = threading.Event()
+        self.construct_jobs()
+
+    @property
+    def shared_store(self) -> bool:
+        return self.server_configs["shared-store"]
+
+    @property
+    def max_retries(self) -> int:
+        return self.server_configs["max-retries"]
+
+    def construct_jobs(self) -> NoReturn:
+        for embedding in get_candidate_embeddings(
+            self.simulator,
+            self.configs["simulation"]
+        ):
+            idx = self.simulator.o3cpu_design_space.embedding_to_idx(embedding)
+            for k, v in self.simulator.benchmark:
+                if self.simulator.if_simulated(embedding, k):
+                    continue
+                job_id = "{}/{}".format(idx, k)
+                self.pending.append({
+                    "id": job_id,
+                    "idx": idx,
+                    "embedding": embedding,
+                    "benchmark": k
+                })
+                self.retries[job_id] = 0
+        info("{} jobs are pending.".format(len(self.pending)))
+        if len(self.pending) == 0:
+            self.finished.set()
+
+    def check_finished(self) -> NoReturn:
+        if len(self.pending) == 0 and len(self.running) == 0:
+            self.finished.set()
+
+    def assign(self, worker: str, last: Optional[int]) -> Optional[Dict]:
+        """
+            We prefer a job of the design that the worker simulated last
+            time, so the worker does not need to build another GEM5.
+        """
+        with self.lock:
+            if len(self.pending) == 0:
+                return None
+            job = None
+            for _job in self.pending:
+                if _job["idx"] == last:
+                    job = _job
+                    break
+            if job is None:
+                job = self.pending[0]
+            self.pending.remove(job)
+            self.running[job["id"]] = (job, worker)
+            return job
+
+    def release(self, worker: str) -> NoReturn:
+        """
+            Re-assign jobs of the disconnected `worker`.
+        """
+        with self.lock:
+            for job_id, (job, _worker) in list(self.running.items()):
+                if _worker != worker:
+                    continue
+                del self.running[job_id]
+                self.retries[job_id] += 1
+                if self.retries[job_id] <= self.max_retries:
+                    warn("{} is disconnected. {} is re-assigned.".format(
+                            worker, job_id
+                        )
+                    )
+                    self.pending.appendleft(job)
+                else:
+                    warn("{} is failed after {} retries.".format(
+                            job_id, self.max_retries
+                        )
+                    )
+            self.check_finished()
+
+    def complete(self, worker: str, msg: Dict) -> NoReturn:
+        if not self.shared_store:
+            store_results(
+                os.path.join(
+                    self.simulator.macros["temp-root"],
+                    "gem5-{}".format(msg["job"].split('/')[0])
+                ),
+                msg["files"]
+            )
+        with self.lock:
+            if msg["job"] in self.running.keys():
+                del self.running[msg["job"]]
+            info("{} is {} by {}. pending: {}, running: {}.".format(
+                    msg["job"],
+                    "finished" if msg["succeeded"] else "failed",
+                    worker,
+                    len(self.pending),
+                    len(self.running)
+                )
+            )
+            self.check_finished()
+
+    def serve(self, conn: Connection) -> NoReturn:
+        worker = None
+        try:
+            while True:
+                msg = conn.recv()
+                worker = msg["worker"]
+                if msg["type"] == "result":
+                    self.complete(worker, msg)
+                    continue
+                assert msg["type"] == "request", \
+                    "unknown message: {}.".format(msg["type"])
+                job = self.assign(worker, msg.get("last"))
+                if job is not None:
+                    conn.send({"type": "job", "job": job})
+                elif self.finished.is_set():
+                    conn.send({"type": "stop"})
+                    break
+                else:
+                    conn.send({
+                        "type": "wait",
+                        "interval": self.server_configs["interval"]
+                    })
+        except (EOFError, ConnectionError, OSError):
+            pass
+        finally:
+            if worker is not None:
+                self.release(worker)
+            conn.close()
+
+    def listen(self, listener: Listener) -> NoReturn:
+        while not self.finished.is_set():
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError) as e:
+                if self.finished.is_set():
+                    break
+                warn("failed to accept a worker: {}.".format(e))
+                continue
+            thread = threading.Thread(target=self.serve, args=(conn,))
+            thread.daemon = True
+            thread.start()
+
+    def run(self) -> NoReturn:
+        address = get_address(self.configs)
+        listener = Listener(address, authkey=get_authkey(self.configs))
+        info("the job server is listening on {}:{}.".format(*address))
+        thread = threading.Thread(target=self.listen, args=(listener,))
+        thread.daemon = True
+        thread.start()
+        self.finished.wait()
+        # let waiting workers receive "stop"
+        time.sleep(self.server_configs["interval"])
+        listener.close()
+        info("all jobs are finished.")
+
+
+class JobWorker(object):
+    """
+        A worker simulates a job at a time, so we launch several
+        worker processes to utilize a host.
+    """
+    def __init__(self, configs: dict):
+        super(JobWorker, self).__init__()
+        self.configs = configs
+        self.simulator = O3CPUSimulation(
+            design_space=parse_design_space(configs["design-space"]),
+            configs=configs["simulation"]
+        )
+        self.name = "{}-{}".format(socket.gethostname(), os.getpid())
+        self.last = None
+
+    def simulate(self, job: Dict) -> Dict:
+        self.simulator.simulate(job["embedding"], benchmark=job["benchmark"])
+        self.last = job["idx"]
+        succeeded = self.simulator.if_simulated(
+            job["embedding"], job["benchmark"]
+        )
+        files = {}
+        if not get_job_server_configs(self.configs)["shared-store"]:
+            files = collect_results(self.simulator.temp, job["benchmark"])
+        return {
+            "type": "result",
+            "worker": self.name,
+            "job": job["id"],
+            "succeeded": succeeded,
+            "files": files
+        }
+
+    def run(self) -> NoReturn:
+        conn = Client(
+            get_address(self.configs),
+            authkey=get_authkey(self.configs)
+        )
+        info("worker {} is registered.".format(self.name))
+        try:
+            while True:
+                conn.send({
+                    "type": "request",
+                    "worker": self.name,
+                    "last": self.last
+                })
+                msg = conn.recv()
+                if msg["type"] == "stop":
+                    break
+                elif msg["type"] == "wait":
+                    time.sleep(msg["interval"])
+                    continue
+                info("worker {} simulates {}.".format(
+                        self.name, msg["job"]["id"]
+                    )
+                )
+                conn.send(self.simulate(msg["job"]))
+        except (EOFError, ConnectionError):
+            warn("the job server is disconnected.")
+        finally:
+            conn.close()
+        info("worker {} exits.".format(self.name))
+
+
+def job_server(configs: dict) -> NoReturn:
+    JobServer(configs).run()
+
+
+def job_worker(configs: dict) -> NoReturn:
+    JobWorker(configs).run()
@@ -46,6 +46,7 @@ class BareModel(Benchmark):
             4. inputs: benchmark input files' root path.
         """
         self._macros = self.construct_bare_model()
+        self.set_weights(benchmark.get("weights"))
         self.validate()
 
     @property
@@ -10,6 +10,8 @@ class Benchmark(abc.ABC):
         super(Benchmark, self).__init__()
         self._macros = {}
         self._name = name
+        # `weights` saves the weight of each benchmark
+        self._weights = {}
 
     @property
     def macros(self):
@@ -19,6 +21,21 @@ class Benchmark(abc.ABC):
     def name(self):
         return self._name
 
+    @property
+    def weights(self):
+        return self._weights
+
+    def set_weights(self, weights: dict):
+        """
+            Weights are used to average results among benchmarks, e.g.,
+            for a representative subset of benchmarks. The default
+            weight is 1.
+        """
+        self._weights = weights if weights is not None else {}
+
+    def weight(self, name: str):
+        return self._weights.get(name, 1)
+
     @abc.abstractmethod
     def __len__(self):
         raise NotImplementedError()
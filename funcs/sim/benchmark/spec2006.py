@@ -46,6 +46,7 @@ class SPEC2006(Benchmark):
             6. maxinsts: maximal instructions.
         """
         self._macros = self.construct_spec2006()
+        self.set_weights(benchmark.get("weights"))
 
     @property
     def spec2006_root(self):
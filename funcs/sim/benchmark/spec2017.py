@@ -41,16 +41,21 @@ class SPEC2017(Benchmark):
         self._checkpoint_root = benchmark["checkpoint-root"]
         self._candidate = benchmark["candidate"]
         self._max_insts = benchmark["max-insts"]
+        # `simpoints` saves (checkpoint, weight) of SimPoints
+        self._simpoints = benchmark.get("simpoints")
         """
-            Each benchmark has six entries, including
+            Each benchmark has seven entries, including
             1. benchmark-root: benchmark root directory,
             2. elf: benchmark executable binary path,
             3. options: benchmark input arguments,
             4. inputs: benchmark input files' root path,
             5. checkpoint: the # of checkpoint,
-            6. checkpoint-root: checkpoint root path.
+            6. checkpoint-root: checkpoint root path,
+            7. simpoints: (checkpoint, weight) of each SimPoint.
         """
         self._macros = self.construct_spec2017()
+        self.set_weights(benchmark.get("weights"))
+        self.construct_simpoints()
 
     @property
     def spec2017_root(self):
@@ -68,6 +73,10 @@ class SPEC2017(Benchmark):
     def max_insts(self):
         return self._max_insts
 
+    @property
+    def simpoints(self):
+        return self._simpoints
+
     @property
     def benchmark_suite(self):
         return SPEC2017._benchmark_suite
@@ -111,6 +120,30 @@ class SPEC2017(Benchmark):
             self.create_complete_benchmark_macros(macros)
         return macros
 
+    def construct_simpoints(self):
+        """
+            By default, each benchmark has a single SimPoint, i.e.,
+            `checkpoint`. Weights of SimPoints are normalized.
+        """
+        for name, macros in self._macros.items():
+            if self.simpoints is not None and \
+                self.simpoints.get(name) is not None:
+                simpoints = [
+                    (int(checkpoint), float(weight)) \
+                        for checkpoint, weight in self.simpoints[name]
+                ]
+            else:
+                simpoints = [(macros["checkpoint"], 1.0)]
+            total = sum([weight for _, weight in simpoints])
+            assert total > 0, \
+                assert_error("weights of SimPoints of {} are invalid: " \
+                    "{}.".format(name, simpoints)
+                )
+            macros["simpoints"] = [
+                (checkpoint, weight / total) \
+                    for checkpoint, weight in simpoints
+            ]
+
     def create_single_benchmark_macros(self, macros, name):
         if "perlbench" in name:
             self.perlbench_macros(macros)
@@ -0,0 +1,238 @@
+# Author: baichen.bai@alibaba-inc.com
+
+
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Dict, NoReturn, Optional
+from utils.utils import if_exist, info, warn, assert_error, file_lock
+from utils.artifact import compress_artifact, remove_artifact
+
+
+"""
+    Bulky artifacts of a benchmark, i.e., `temp/gem5-<idx>/<bench>`,
+    in the order of eviction, so traces go first. Parsed results, e.g.,
+    "ppa.rpt" & "analysis.rpt", are small and always kept.
+"""
+bulky_artifacts = [
+    "instruction-flow",
+    "mcpat.xml",
+    "report",
+    "stats.txt",
+    "config.json"
+]
+
+
+default_policy = OrderedDict([
+    ("instruction-flow", "compress"),
+    # "mcpat.xml" can be regenerated from "stats.txt" & "config.json"
+    ("mcpat.xml", "delete"),
+    ("report", "compress"),
+    ("stats.txt", "compress"),
+    ("config.json", "compress")
+])
+
+
+def get_artifact_configs(manager: object) -> Dict:
+    """
+        The lifecycle of artifacts is specified in `misc-setting`/`artifact`.
+    """
+    artifact = manager.configs["misc-setting"].get("artifact")
+    return artifact if artifact is not None else {}
+
+
+def enable_artifact_management(manager: object) -> bool:
+    return bool(get_artifact_configs(manager).get("enable", False))
+
+
+def get_artifact_policy(manager: object) -> OrderedDict:
+    """
+        return: the action of each bulky artifact, i.e.,
+        "compress", "delete" or "keep".
+    """
+    policy = OrderedDict(default_policy)
+    _policy = get_artifact_configs(manager).get("policy")
+    if _policy is not None:
+        for artifact, action in _policy.items():
+            assert artifact in bulky_artifacts, \
+                assert_error("artifact: {} is unsupported.".format(artifact))
+            assert action in ["compress", "delete", "keep"], \
+                assert_error("action: {} is unsupported.".format(action))
+            policy[artifact] = action
+    return policy
+
+
+def get_quota(manager: object) -> float:
+    """
+        return: the disk quota (bytes) of the result store. The quota is
+        specified in GB, and `None` means no quota.
+    """
+    quota = get_artifact_configs(manager).get("quota")
+    if quota is None:
+        return float("inf")
+    return quota * (1024 ** 3)
+
+
+def if_finished(manager: object, m5out: str) -> bool:
+    """
+        Artifacts are managed only after they are parsed.
+    """
+    if not if_exist(os.path.join(m5out, "ppa.rpt")):
+        return False
+    if manager.configs["misc-setting"]["deg-model"] and \
+        not if_exist(os.path.join(m5out, "analysis.rpt")):
+        return False
+    return True
+
+
+def if_protected(m5out: str, artifact: str) -> bool:
+    """
+        The power predicted by the surrogate could be refined with McPAT,
+        which requires "stats.txt" & "config.json".
+    """
+    return artifact in ["stats.txt", "config.json"] and \
+        if_exist(os.path.join(m5out, "surrogate.rpt"))
+
+
+def apply_artifact_policy(manager: object, m5out: str) -> int:
+    """
+        return: bytes released.
+    """
+    if not if_finished(manager, m5out):
+        return 0
+    released = 0
+    for artifact, action in get_artifact_policy(manager).items():
+        if action == "keep" or if_protected(m5out, artifact):
+            continue
+        path = os.path.join(m5out, artifact)
+        if action == "compress":
+            released += compress_artifact(path)
+        else:
+            released += remove_artifact(path)
+    return released
+
+
+def get_usage(root: str) -> int:
+    usage = 0
+    for _root, _, files in os.walk(root):
+        for f in files:
+            try:
+                usage += os.path.getsize(os.path.join(_root, f))
+            except OSError:
+                # the file is removed concurrently
+                continue
+    return usage
+
+
+def get_usage_cache(root: str) -> str:
+    return os.path.join(root, ".usage")
+
+
+def load_usage(root: str) -> Optional[int]:
+    """
+        return: the running usage of the result store, or `None` if it
+        is not recorded.
+    """
+    usage_cache = get_usage_cache(root)
+    if not if_exist(usage_cache):
+        return None
+    with open(usage_cache, 'r') as f:
+        try:
+            return int(f.readline())
+        except ValueError:
+            return None
+
+
+def dump_usage(root: str, usage: int) -> NoReturn:
+    usage_cache = get_usage_cache(root)
+    temp = "{}.tmp-{}-{}".format(
+        usage_cache, os.getpid(), threading.get_ident()
+    )
+    with open(temp, 'w') as f:
+        f.write("{}\n".format(usage))
+    os.replace(temp, usage_cache)
+
+
+def get_last_access(root: str) -> float:
+    last = 0
+    for _root, _, files in os.walk(root):
+        for f in files:
+            try:
+                stat = os.stat(os.path.join(_root, f))
+            except OSError:
+                continue
+            last = max(last, stat.st_atime, stat.st_mtime)
+    return last
+
+
+def get_finished_m5outs(manager: object, temp: str) -> List[str]:
+    """
+        return: finished benchmarks (including SimPoints) of a design,
+        i.e., `temp/gem5-<idx>`.
+    """
+    return [
+        _root for _root, _, _ in os.walk(temp) \
+            if if_finished(manager, _root)
+    ]
+
+
+def enforce_quota(manager: object, root: str, increment: int) -> NoReturn:
+    """
+        Evict bulky artifacts of the least recently used designs in
+        `root`, i.e., `temp`, until its usage is within the quota.
+        Traces of all designs are evicted before other artifacts.
+        The running usage is increased by `increment`, i.e., the size
+        of a new result, and `root` is only rescanned above the quota,
+        since the running usage over-counts re-written results.
+    """
+    quota = get_quota(manager)
+    if quota == float("inf"):
+        return
+    # the quota enforcement of a result store is serialized among processes
+    with file_lock(os.path.join(root, ".quota.lock")):
+        usage = load_usage(root)
+        if usage is not None and usage + increment <= quota:
+            dump_usage(root, usage + increment)
+            return
+        usage = get_usage(root)
+        if usage <= quota:
+            dump_usage(root, usage)
+            return
+        designs = sorted(
+            [
+                os.path.join(root, design) \
+                    for design in os.listdir(root) \
+                        if design.startswith("gem5-")
+            ],
+            key=get_last_access
+        )
+        m5outs = [get_finished_m5outs(manager, design) for design in designs]
+        for artifact in bulky_artifacts:
+            for _m5outs in m5outs:
+                for m5out in _m5outs:
+                    if if_protected(m5out, artifact):
+                        continue
+                    usage -= remove_artifact(os.path.join(m5out, artifact))
+                    if usage <= quota:
+                        dump_usage(root, usage)
+                        info("the usage of {} is within the quota.".format(
+                                root
+                            )
+                        )
+                        return
+        dump_usage(root, usage)
+        warn("the usage of {}: {:.2f}GB exceeds the quota " \
+            "after eviction.".format(root, usage / (1024 ** 3))
+        )
+
+
+def manage_artifacts(manager: object, name: str) -> NoReturn:
+    """
+        `name` is the benchmark's (or SimPoint's) result directory
+        relative to `temp/gem5-<idx>`.
+    """
+    if not enable_artifact_management(manager):
+        return
+    m5out = os.path.join(manager.temp, name)
+    apply_artifact_policy(manager, m5out)
+    enforce_quota(manager, os.path.dirname(manager.temp), get_usage(m5out))
@@ -0,0 +1,226 @@
+# Author: baichen.bai@alibaba-inc.com
+
+
+import os
+import shutil
+import threading
+from typing import Dict, Tuple, Optional, NoReturn
+from utils.thread import WorkerThread
+from utils.runner import execute_with_limits, cancel_event
+from utils.utils import if_exist, mkdir, remove_suffix, info, warn, \
+    file_lock
+
+
+def get_checkpoint_configs(manager: object) -> Dict:
+    """
+        Warm checkpoints are specified in `misc-setting`/`warm-checkpoint`.
+    """
+    checkpoint = manager.configs["misc-setting"].get("warm-checkpoint")
+    return checkpoint if checkpoint is not None else {}
+
+
+def enable_warm_checkpoint(manager: object) -> bool:
+    return bool(get_checkpoint_configs(manager).get("enable", False)) and \
+        manager.benchmark.name in ["spec2006", "bare-model"]
+
+
+def get_checkpoint_cache(manager: object) -> str:
+    cache = get_checkpoint_configs(manager).get("checkpoint-cache")
+    if cache is None:
+        return os.path.join(manager.macros["temp-root"], "checkpoint")
+    return os.path.abspath(cache)
+
+
+def get_fast_forward(
+    manager: object,
+    v: Dict
+) -> Tuple[Optional[int], Optional[int]]:
+    """
+        return: the fast forward & warmup instructions of a benchmark.
+        SPEC2006 specifies them for each benchmark, and the bare model
+        specifies them for all benchmarks.
+    """
+    if manager.benchmark.name == "spec2006":
+        return v["fast-forward"], v["warmup-insts"]
+    return manager.benchmark.fast_forward, manager.benchmark.warmup_insts
+
+
+def get_checkpoint_dir(manager: object, k: str, fast_forward: int) -> str:
+    return os.path.join(
+        get_checkpoint_cache(manager),
+        remove_suffix(k, ".riscv"),
+        "ff-{}".format(fast_forward)
+    )
+
+
+def is_checkpoint_ready(checkpoint_dir: str) -> bool:
+    """
+        GEM5 saves the checkpoint in "cpt.<bench>.<inst>" with
+        `--at-instruction`.
+    """
+    if not if_exist(checkpoint_dir):
+        return False
+    for cpt in os.listdir(checkpoint_dir):
+        if cpt.startswith("cpt.") and \
+            if_exist(os.path.join(checkpoint_dir, cpt, "m5.cpt")):
+            return True
+    return False
+
+
+def get_mem_size(manager: object) -> str:
+    """
+        The memory size should be the same as the one used by
+        the simulation restored from the checkpoint.
+    """
+    return "16GB" if manager.benchmark.name == "spec2006" else "4096MB"
+
+
+def take_checkpoint(
+    manager: object,
+    k: str,
+    v: Dict,
+    fast_forward: int,
+    checkpoint_dir: str
+) -> bool:
+    """
+        Take the checkpoint with `AtomicSimpleCPU` and without caches,
+        so it is independent of the microarchitecture. It is written to
+        a temporary directory, and then published atomically.
+    """
+    from funcs.sim.o3cpu.o3cpu_simulation import get_runner_configs
+    temp = "{}.tmp-{}-{}".format(
+        checkpoint_dir, os.getpid(), threading.get_ident()
+    )
+    if if_exist(temp):
+        shutil.rmtree(temp)
+    mkdir(temp)
+    if manager.benchmark.name == "spec2006":
+        root = v["benchmark-root"]
+    else:
+        root = manager.macros["gem5-research-root"]
+    cmd = "cd {} && {} " \
+        "--outdir={} " \
+        "{} " \
+        "--num-cpus=1 " \
+        "--cpu-type=AtomicSimpleCPU " \
+        "--cmd={} ".format(
+            root,
+            os.path.join(
+                manager.macros["gem5-research-root"],
+                "build", "RISCV", manager.gem5_opt
+            ),
+            os.path.join(temp, "m5out"),
+            os.path.join(
+                manager.macros["gem5-research-root"],
+                "configs", "example", "se.py"
+            ),
+            v["elf"]
+        )
+    if v.get("options") is not None:
+        cmd = "{} " \
+            "--options=\"{}\" ".format(
+                cmd,
+                v["options"]
+            )
+    cmd = "{} " \
+        "--sys-clock=1GHz " \
+        "--cpu-clock=1GHz " \
+        "--mem-size={} " \
+        "--take-checkpoints={} " \
+        "--at-instruction " \
+        "--checkpoint-dir={}".format(
+            cmd,
+            get_mem_size(manager),
+            fast_forward,
+            temp
+        )
+    runner = get_runner_configs(manager)
+    result = execute_with_limits(
+        cmd,
+        timeout=runner.get("checkpoint-timeout"),
+        memory=runner.get("memory-limit"),
+        log="{}.log".format(checkpoint_dir),
+        cancel=cancel_event
+    )
+    if not result.succeeded or not is_checkpoint_ready(temp):
+        warn("the checkpoint of {} at {} instructions is failed to " \
+            "generate, {}.".format(k, fast_forward, result)
+        )
+        shutil.rmtree(temp, ignore_errors=True)
+        return False
+    shutil.rmtree(os.path.join(temp, "m5out"), ignore_errors=True)
+    try:
+        os.rename(temp, checkpoint_dir)
+    except OSError:
+        # another process has published the checkpoint
+        shutil.rmtree(temp, ignore_errors=True)
+    return is_checkpoint_ready(checkpoint_dir)
+
+
+def prepare_checkpoint(manager: object, k: str, v: Dict) -> Optional[str]:
+    """
+        return: the checkpoint directory of `k`, which is created if it
+        is not cached. `None` means the fast forwarding is used instead.
+    """
+    if not enable_warm_checkpoint(manager):
+        return None
+    fast_forward, _ = get_fast_forward(manager, v)
+    if fast_forward is None:
+        return None
+    checkpoint_dir = get_checkpoint_dir(manager, k, fast_forward)
+    """
+        Each (benchmark, fast-forward point) has its own file lock, so
+        a checkpoint is prepared only once even if multiple designs are
+        simulated concurrently, e.g., by explorers in other processes.
+    """
+    mkdir(os.path.dirname(checkpoint_dir))
+    with file_lock(checkpoint_dir + ".lock"):
+        if is_checkpoint_ready(checkpoint_dir):
+            return checkpoint_dir
+        info("prepare the checkpoint of {} at {} instructions.".format(
+                k, fast_forward
+            )
+        )
+        if take_checkpoint(manager, k, v, fast_forward, checkpoint_dir):
+            return checkpoint_dir
+    return None
+
+
+def checkpoint_preparation(configs: dict) -> NoReturn:
+    """
+        Prepare checkpoints of all benchmarks in advance. Checkpoints
+        do not depend on the microarchitecture, so any built GEM5 can
+        be used. If none is built, we generate the simulator of the
+        first design.
+    """
+    from funcs.sim.o3cpu.o3cpu_simulation import O3CPUSimulation
+    from funcs.design.o3cpu.o3cpu_design_space import parse_design_space
+    simulator = O3CPUSimulation(
+        design_space=parse_design_space(configs["design-space"]),
+        configs=configs["simulation"]
+    )
+    if not enable_warm_checkpoint(simulator):
+        warn("warm checkpoints are disabled or unsupported with {}.".format(
+                simulator.benchmark.name
+            )
+        )
+        return
+    idx = 1
+    if if_exist(simulator.macros["build-root"]):
+        for gem5_opt in sorted(os.listdir(simulator.macros["build-root"])):
+            if gem5_opt.startswith("gem5-") and gem5_opt.endswith(".opt"):
+                idx = int(remove_suffix(gem5_opt, ".opt").split('-')[-1])
+                break
+    simulator.generate_simulator(
+        simulator.o3cpu_design_space.idx_to_embedding(idx)
+    )
+    threads = []
+    for k, v in simulator.benchmark:
+        thread = WorkerThread(
+            func=prepare_checkpoint,
+            args=(simulator.gem5_manager, k, v,)
+        )
+        threads.append(thread)
+        thread.start()
+    for thread in threads:
+        thread.join()
@@ -0,0 +1,288 @@
+# Author: baichen.bai@alibaba-inc.com
+
+
+import os
+import re
+import numpy as np
+from typing import List, Dict, Tuple, NoReturn, Optional
+from utils.utils import if_exist, info, warn, error, assert_error
+from utils.artifact import if_artifact_exist, open_artifact
+
+
+pat_stats = re.compile(r"stats\.([a-zA-Z0-9_:\.]+)")
+pat_stat_line = re.compile(r"([a-zA-Z0-9_\.:-]+)\s+([-+]?[0-9]+\.[0-9]+|[-+]?[0-9]+|nan|inf)")
+
+
+def read_stats(stats: str) -> Dict[str, float]:
+    """
+        Read GEM5's "stats.txt" with the same format used by
+        "tools/gem5-mcpat-parser.py".
+    """
+    counters = {}
+    with open_artifact(stats, 'r') as f:
+        for line in f:
+            match = pat_stat_line.match(line)
+            if match is None:
+                continue
+            try:
+                value = float(match.group(2))
+            except ValueError:
+                continue
+            if np.isnan(value) or np.isinf(value):
+                value = 0
+            counters[match.group(1)] = value
+    return counters
+
+
+def get_activity_counters(template: str) -> List[str]:
+    """
+        The activity counters are the GEM5 statistics referred
+        by the McPAT template, i.e., exactly what McPAT uses to
+        compute the runtime dynamic power.
+    """
+    if_exist(template, strict=True, quiet=False)
+    with open(template, 'r') as f:
+        counters = sorted(set(pat_stats.findall(f.read())))
+    return counters
+
+
+class O3CPUPowerSurrogate(object):
+    """
+        A ridge regression model from activity rates, i.e., activity
+        counters normalized by the number of cycles, and the micro-
+        architecture embedding to McPAT's runtime dynamic power.
+    """
+    def __init__(self, counters: List[str], alpha: float = 1.0):
+        super(O3CPUPowerSurrogate, self).__init__()
+        self.counters = counters
+        self.alpha = alpha
+        cycles = [c for c in self.counters if c.endswith(".numCycles")]
+        assert len(cycles) > 0, \
+            assert_error("numCycles is not found in activity counters.")
+        self.cycles = cycles[0]
+        self.mean = None
+        self.std = None
+        self.coef = None
+        self.intercept = None
+        self.x_min = None
+        self.x_max = None
+        # the relative error bound from cross validation
+        self.error_bound = np.inf
+        # the surrogate is used only when `error_bound` <= `threshold`
+        self.threshold = 0.05
+
+    def features(self, stats: Dict[str, float], embedding: List[int]) -> np.ndarray:
+        cycles = max(stats.get(self.cycles, 0), 1)
+        x = [
+            stats.get(counter, 0) / cycles for counter in self.counters \
+                if counter != self.cycles
+        ]
+        return np.array(x + list(embedding), dtype=np.float64)
+
+    def fit_impl(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, ...]:
+        mean = x.mean(axis=0)
+        std = x.std(axis=0)
+        std[std == 0] = 1
+        _x = (x - mean) / std
+        intercept = y.mean()
+        coef = np.linalg.solve(
+            _x.T @ _x + self.alpha * np.eye(_x.shape[1]),
+            _x.T @ (y - intercept)
+        )
+        return mean, std, coef, intercept
+
+    def predict_impl(self, x: np.ndarray, mean, std, coef, intercept) -> np.ndarray:
+        return ((x - mean) / std) @ coef + intercept
+
+    def cross_validate(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        k: int = 5,
+        seed: int = 2023
+    ) -> float:
+        """
+            We use the 95th percentile of the relative errors in
+            k-fold cross validation as the error bound.
+        """
+        folds = np.array_split(
+            np.random.RandomState(seed).permutation(len(x)), k
+        )
+        error = []
+        for fold in folds:
+            if len(fold) == 0:
+                continue
+            mask = np.ones(len(x), dtype=bool)
+            mask[fold] = False
+            params = self.fit_impl(x[mask], y[mask])
+            error.append(
+                np.abs(self.predict_impl(x[fold], *params) - y[fold]) / \
+                    np.maximum(np.abs(y[fold]), 1e-8)
+            )
+        return float(np.percentile(np.concatenate(error), 95))
+
+    def fit(self, x: np.ndarray, y: np.ndarray, k: int = 5) -> NoReturn:
+        assert len(x) >= k, \
+            assert_error("{} samples are not enough for {}-fold " \
+                "cross validation.".format(len(x), k)
+            )
+        self.error_bound = self.cross_validate(x, y, k)
+        self.mean, self.std, self.coef, self.intercept = \
+            self.fit_impl(x, y)
+        self.x_min = x.min(axis=0)
+        self.x_max = x.max(axis=0)
+
+    def predict(self, x: np.ndarray) -> Tuple[float, bool]:
+        """
+            return: the predicted dynamic power and whether
+                    the prediction is confident. A prediction
+                    that extrapolates beyond the training data
+                    is not confident.
+        """
+        power = float(
+            self.predict_impl(
+                x, self.mean, self.std, self.coef, self.intercept
+            )
+        )
+        margin = 0.1 * (self.x_max - self.x_min)
+        inside = np.all(x >= self.x_min - margin) and \
+            np.all(x <= self.x_max + margin)
+        confident = bool(
+            self.error_bound <= self.threshold and inside and power > 0
+        )
+        return power, confident
+
+    def predict_with_stats(
+        self,
+        stats: str,
+        embedding: List[int]
+    ) -> Tuple[float, bool]:
+        if not if_artifact_exist(stats):
+            return 0, False
+        return self.predict(self.features(read_stats(stats), embedding))
+
+    def dump(self, path: str) -> NoReturn:
+        np.savez(
+            path,
+            counters=np.array(self.counters),
+            alpha=self.alpha,
+            mean=self.mean,
+            std=self.std,
+            coef=self.coef,
+            intercept=self.intercept,
+            x_min=self.x_min,
+            x_max=self.x_max,
+            error_bound=self.error_bound
+        )
+        info("dump the power surrogate to {}".format(path))
+
+
+def load_power_surrogate(path: str, threshold: float) -> O3CPUPowerSurrogate:
+    if_exist(path, strict=True, quiet=False)
+    model = np.load(path)
+    surrogate = O3CPUPowerSurrogate(
+        model["counters"].tolist(), float(model["alpha"])
+    )
+    surrogate.mean = model["mean"]
+    surrogate.std = model["std"]
+    surrogate.coef = model["coef"]
+    surrogate.intercept = float(model["intercept"])
+    surrogate.x_min = model["x_min"]
+    surrogate.x_max = model["x_max"]
+    surrogate.error_bound = float(model["error_bound"])
+    surrogate.threshold = threshold
+    if surrogate.error_bound > threshold:
+        warn("the error bound of the power surrogate: {:.4f} is larger " \
+            "than {:.4f}. McPAT will be used.".format(
+                surrogate.error_bound, threshold
+            )
+        )
+    return surrogate
+
+
+def get_m5outs(temp: str) -> List[str]:
+    """
+        return: output directories of each benchmark of a design, and
+        of each SimPoint if the benchmark has multiple SimPoints.
+    """
+    m5outs = []
+    for benchmark in os.listdir(temp):
+        m5out = os.path.join(temp, benchmark)
+        if not os.path.isdir(m5out):
+            continue
+        m5outs.append(m5out)
+        simpoints = os.path.join(m5out, "simpoints")
+        if not os.path.isdir(simpoints):
+            continue
+        for checkpoint in os.listdir(simpoints):
+            if os.path.isdir(os.path.join(simpoints, checkpoint)):
+                m5outs.append(os.path.join(simpoints, checkpoint))
+    return m5outs
+
+
+def collect_power_samples(
+    simulator: object
+) -> Tuple[O3CPUPowerSurrogate, np.ndarray, np.ndarray]:
+    """
+        Collect (activity rates & embedding, dynamic power) pairs
+        from the result store, i.e., `temp/gem5-<idx>/<benchmark>` and
+        `temp/gem5-<idx>/<benchmark>/simpoints/<checkpoint>` of multiple
+        SimPoints. Results predicted by the surrogate are excluded.
+    """
+    from funcs.sim.o3cpu.o3cpu_simulation import get_dynamic_power, \
+        get_mcpat_template
+    temp_root = simulator.macros["temp-root"]
+    surrogate = O3CPUPowerSurrogate(
+        get_activity_counters(get_mcpat_template(simulator))
+    )
+    x, y = [], []
+    if not if_exist(temp_root):
+        return surrogate, np.array(x), np.array(y)
+    for design in os.listdir(temp_root):
+        if not design.startswith("gem5-"):
+            continue
+        try:
+            embedding = simulator.o3cpu_design_space.idx_to_embedding(
+                int(design.split('-')[-1])
+            )
+        except (ValueError, AssertionError):
+            continue
+        for m5out in get_m5outs(os.path.join(temp_root, design)):
+            stats = os.path.join(m5out, "stats.txt")
+            report = os.path.join(m5out, "report")
+            if not if_artifact_exist(stats) or \
+                not if_artifact_exist(report) or \
+                if_exist(os.path.join(m5out, "surrogate.rpt")):
+                continue
+            dynamic = get_dynamic_power(report)
+            if dynamic <= 0:
+                continue
+            x.append(surrogate.features(read_stats(stats), embedding))
+            y.append(dynamic)
+    return surrogate, np.array(x), np.array(y)
+
+
+def power_surrogate(configs: dict):
+    """
+        Train the power surrogate with the result store.
+    """
+    from funcs.sim.o3cpu.o3cpu_simulation import O3CPUSimulation
+    from funcs.design.o3cpu.o3cpu_design_space import parse_design_space
+    simulator = O3CPUSimulation(
+        design_space=parse_design_space(configs["design-space"]),
+        configs=configs["simulation"]
+    )
+    configs = configs["power-surrogate"]
+    surrogate, x, y = collect_power_samples(simulator)
+    if len(x) < configs["k-fold"]:
+        error("{} samples are not enough to train the power " \
+            "surrogate.".format(len(x))
+        )
+    surrogate.alpha = configs["alpha"]
+    surrogate.fit(x, y, configs["k-fold"])
+    info("the power surrogate is trained with {} samples, error bound " \
+        "(95th percentile of relative errors): {:.4f}.".format(
+            len(x), surrogate.error_bound
+        )
+    )
+    surrogate.dump(configs["output"])
@@ -0,0 +1,218 @@
+# Author: baichen.bai@alibaba-inc.com
+
+
+import os
+import re
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Optional, NoReturn
+from utils.utils import if_exist, warn
+
+
+pat_ppa_rpt = re.compile(r"\d+\.\d+")
+
+
+def get_simpoints(k: str, v: Dict) -> List[Tuple[str, int, float]]:
+    """
+        return: (name, checkpoint, weight) of each SimPoint of `k`.
+        A benchmark with a single SimPoint is simulated in
+        `temp/gem5-<idx>/<k>`, otherwise, each SimPoint is simulated
+        in `temp/gem5-<idx>/<k>/simpoints/<checkpoint>` independently.
+    """
+    simpoints = v.get("simpoints")
+    if simpoints is None or len(simpoints) == 0:
+        return [(k, v["checkpoint"], 1.0)]
+    if len(simpoints) == 1:
+        return [(k, simpoints[0][0], 1.0)]
+    return [
+        (os.path.join(k, "simpoints", str(checkpoint)), checkpoint, weight) \
+            for checkpoint, weight in simpoints
+    ]
+
+
+def read_ppa_report(ppa_rpt: str) -> Tuple[float, float, float, float]:
+    with open(ppa_rpt, 'r') as f:
+        result = re.findall(pat_ppa_rpt, f.read())
+    return float(result[0]), float(result[1]), \
+        float(result[2]), float(result[3])
+
+
+def read_analysis_report(analysis_rpt: str) -> Tuple[int, OrderedDict]:
+    """
+        return: the critical path length & the contribution of each
+        bottleneck.
+    """
+    with open(analysis_rpt, 'r') as f:
+        cnt = f.readlines()
+    length = int(cnt[0].split(':')[-1])
+    btnk = OrderedDict()
+    for line in cnt[cnt.index("bottleneck:\n") + 1:]:
+        if ':' not in line:
+            continue
+        btnk_name, contrib = line.split(':')
+        btnk[btnk_name] = int(contrib)
+    return length, btnk
+
+
+def read_near_critical_report(analysis_rpt: str) -> Optional[OrderedDict]:
+    """
+        return: the near-critical contribution of each bottleneck, or
+        `None` if the report has no near-critical section.
+    """
+    with open(analysis_rpt, 'r') as f:
+        cnt = f.readlines()
+    start = None
+    for i, line in enumerate(cnt):
+        if line.startswith("near-critical"):
+            start = i + 1
+            break
+    if start is None:
+        return None
+    near_critical = OrderedDict()
+    for line in cnt[start:]:
+        if ':' not in line:
+            break
+        btnk_name, contrib = line.split(':')
+        near_critical[btnk_name] = int(contrib)
+    return near_critical
+
+
+def combine_ppa_reports(
+    m5out: str,
+    reports: List[Tuple[str, float]]
+) -> NoReturn:
+    """
+        SimPoint weights are fractions of instructions, so CPI is the
+        weighted average, and power is averaged w.r.t. the fraction of
+        cycles of each SimPoint.
+    """
+    ppa = [(read_ppa_report(ppa_rpt), weight) for ppa_rpt, weight in reports]
+    cpi = sum([_ppa[1] * weight for _ppa, weight in ppa])
+    if cpi <= 0:
+        return
+    power = sum([_ppa[1] * _ppa[2] * weight for _ppa, weight in ppa]) / cpi
+    area = ppa[0][0][3]
+    with open(os.path.join(m5out, "ppa.rpt"), 'w') as f:
+        msg = "IPC: {:.8f}, CPI: {:.8f}, " \
+            "Power: {:.8f}, area: {:.5f}".format(
+                1 / cpi, cpi, power, area
+            )
+        f.write(msg + '\n')
+
+
+def combine_analysis_reports(
+    m5out: str,
+    reports: List[Tuple[str, float]]
+) -> NoReturn:
+    """
+        The contribution of each bottleneck is normalized by its
+        critical path length, and then weighted by SimPoint weights.
+        The combined report keeps the format of "analysis.rpt", i.e.,
+        the bottleneck section is at the end.
+    """
+    analysis = [
+        (read_analysis_report(analysis_rpt), weight) \
+            for analysis_rpt, weight in reports
+    ]
+    length = int(round(
+        sum([_analysis[0] * weight for _analysis, weight in analysis])
+    ))
+    def combine(profiles):
+        btnk = OrderedDict()
+        for (_length, _btnk), weight in profiles:
+            for btnk_name, contrib in _btnk.items():
+                if btnk_name not in btnk.keys():
+                    btnk[btnk_name] = 0
+                if _length > 0:
+                    btnk[btnk_name] += weight * contrib / _length
+        return btnk
+
+    btnk = combine(analysis)
+    near_critical = [
+        (
+            (_analysis[0], read_near_critical_report(analysis_rpt)),
+            weight
+        ) for (_analysis, weight), (analysis_rpt, _) in zip(analysis, reports)
+    ]
+    if all([_near_critical is not None \
+        for (_, _near_critical), _ in near_critical]):
+        near_critical = combine(near_critical)
+    else:
+        near_critical = None
+    with open(os.path.join(m5out, "analysis.rpt"), 'w') as f:
+        f.write("critical path: {}\n".format(length))
+        f.write("simpoints: {}\n".format(
+                ", ".join([
+                    "{} ({:.4f})".format(analysis_rpt, weight) \
+                        for analysis_rpt, weight in reports
+                ])
+            )
+        )
+        if near_critical is not None:
+            f.write("\nnear-critical:\n")
+            msg = ""
+            for btnk_name, contrib in near_critical.items():
+                msg += "{}: {}\n".format(
+                    btnk_name, int(round(contrib * length))
+                )
+            f.write(msg)
+        f.write("\nbottleneck:\n")
+        msg = ""
+        for btnk_name, contrib in btnk.items():
+            msg += "{}: {}\n".format(
+                btnk_name, int(round(contrib * length))
+            )
+        f.write(msg)
+
+
+def combine_simpoints(
+    temp: str,
+    k: str,
+    simpoints: List[Tuple[str, int, float]]
+) -> NoReturn:
+    """
+        Combine results of SimPoints into benchmark-level "ppa.rpt" &
+        "analysis.rpt", so consumers of the result store are unchanged.
+        Failed SimPoints are excluded and weights are re-normalized.
+    """
+    m5out = os.path.join(temp, k)
+    for rpt in ["ppa.rpt", "analysis.rpt", "partial.rpt", "surrogate.rpt"]:
+        if if_exist(os.path.join(m5out, rpt)):
+            os.remove(os.path.join(m5out, rpt))
+    ppa_reports, analysis_reports, partial, surrogate = [], [], [], []
+    for name, checkpoint, weight in simpoints:
+        ppa_rpt = os.path.join(temp, name, "ppa.rpt")
+        if not if_exist(ppa_rpt):
+            warn("SimPoint {} of {} is failed.".format(checkpoint, k))
+            continue
+        ppa_reports.append((ppa_rpt, weight))
+        analysis_rpt = os.path.join(temp, name, "analysis.rpt")
+        if if_exist(analysis_rpt):
+            analysis_reports.append((analysis_rpt, weight))
+        if if_exist(os.path.join(temp, name, "partial.rpt")):
+            partial.append(name)
+        if if_exist(os.path.join(temp, name, "surrogate.rpt")):
+            surrogate.append(name)
+    if len(ppa_reports) == 0:
+        return
+    total = sum([weight for _, weight in ppa_reports])
+    combine_ppa_reports(
+        m5out,
+        [(ppa_rpt, weight / total) for ppa_rpt, weight in ppa_reports]
+    )
+    if len(analysis_reports) == len(ppa_reports):
+        combine_analysis_reports(
+            m5out,
+            [
+                (analysis_rpt, weight / total) \
+                    for analysis_rpt, weight in analysis_reports
+            ]
+        )
+    if len(ppa_reports) < len(simpoints) or len(partial) > 0:
+        with open(os.path.join(m5out, "partial.rpt"), 'w') as f:
+            f.write("SimPoints are partial: {}, failed: {}.\n".format(
+                    partial, len(simpoints) - len(ppa_reports)
+                )
+            )
+    if len(surrogate) > 0:
+        with open(os.path.join(m5out, "surrogate.rpt"), 'w') as f:
+            f.write("SimPoints with predicted power: {}\n".format(surrogate))
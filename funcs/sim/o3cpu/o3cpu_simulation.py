@@ -4,25 +4,44 @@
 import os
 import re
 import sys
+import copy
+import shutil
 import platform
+import threading
 import multiprocessing
 from collections import OrderedDict
 from utils.thread import WorkerThread
+from utils.runner import execute_with_limits, JobResult, cancel_event
 from multiprocessing.pool import ThreadPool
 from funcs.sim.base_simulation import Simulation
 from funcs.sim.benchmark.spec2006 import construct_spec2006
 from funcs.sim.benchmark.spec2017 import construct_spec2017
 from funcs.sim.benchmark.bare_model import construct_bare_model
 from funcs.design.o3cpu.o3cpu_design_space import O3CPUDesignSpace
+from funcs.sim.o3cpu.o3cpu_power_surrogate import load_power_surrogate
+from funcs.design.o3cpu.o3cpu_area_model import O3CPUAreaModel, \
+    load_area_model
+from funcs.sim.o3cpu.o3cpu_checkpoint import prepare_checkpoint
+from funcs.sim.o3cpu.o3cpu_simpoint import get_simpoints, combine_simpoints
+from funcs.sim.o3cpu.o3cpu_straggler import StragglerMonitor, get_inst_budget
+from funcs.sim.o3cpu.o3cpu_artifact import manage_artifacts
+from utils.artifact import if_artifact_exist, open_artifact, restore_artifact
 from typing import List, Union, Tuple, NoReturn, Dict, Callable, Optional
 from utils.utils import if_exist, mkdir, execute, remove_suffix , info, warn, \
-    error, assert_error, Timer
+    error, assert_error, Timer, file_lock
+
+
+# patterns of McPAT reports
+pat_subthreshold = re.compile(r"Subthreshold\ Leakage\ =\ [+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?\ W")
+pat_gate = re.compile(r"Gate\ Leakage\ =\ [+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?\ W")
+pat_dynamic = re.compile(r"Runtime\ Dynamic\ =\ [+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?\ W")
+pat_area = re.compile(r"Area\ =\ [+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?\ mm\^2")
 
 
 def get_perf(manager: object, stats: str) -> Tuple[float, float]:
     ipc = cpi = 0
-    if if_exist(stats):
-        with open(stats, 'r') as f:
+    if if_artifact_exist(stats):
+        with open_artifact(stats, 'r') as f:
             cnt = f.readlines()
         """
             Use different CPUs based on the fast forwarding.
@@ -55,33 +74,89 @@ def get_perf(manager: object, stats: str) -> Tuple[float, float]:
     return ipc, cpi
 
 
-def get_power_area(report: str) -> Tuple[float, float]:
-    p_subthreshold = re.compile(r"Subthreshold\ Leakage\ =\ [+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?\ W")
-    p_gate = re.compile(r"Gate\ Leakage\ =\ [+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?\ W")
-    p_dynamic = re.compile(r"Runtime\ Dynamic\ =\ [+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?\ W")
-    p_area = re.compile(r"Area\ =\ [+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?\ mm\^2")
-    subthreshold, gate, dynamic, area = 0, 0, 0, 0
-    if if_exist(report):
-        with open(report, 'r') as f:
+def get_dynamic_power(report: str) -> float:
+    dynamic = 0
+    if if_artifact_exist(report):
+        with open_artifact(report, 'r') as f:
+            cnt = f.read()
+            try:
+                dynamic = float(
+                    pat_dynamic.findall(cnt)[1][0]
+                )
+            except Exception as e:
+                error("McPAT report {} is " \
+                    "failed to generate.".format(report)
+                )
+    return dynamic
+
+
+def get_leakage_area(report: str) -> Tuple[float, float]:
+    """
+        Leakage (at the fixed temperature specified by the McPAT
+        template) and area only depend on the microarchitecture,
+        so they are the same for all benchmarks of a design.
+    """
+    subthreshold, gate, area = 0, 0, 0
+    if if_artifact_exist(report):
+        with open_artifact(report, 'r') as f:
             cnt = f.read()
             try:
                 subthreshold = float(
-                    p_subthreshold.findall(cnt)[1][0]
+                    pat_subthreshold.findall(cnt)[1][0]
                 )
                 gate = float(
-                    p_gate.findall(cnt)[1][0]
-                )
-                dynamic = float(
-                    p_dynamic.findall(cnt)[1][0]
+                    pat_gate.findall(cnt)[1][0]
                 )
                 area = float(
-                    p_area.findall(cnt)[1][0]
+                    pat_area.findall(cnt)[1][0]
                 )
             except Exception as e:
                 error("McPAT report {} is " \
                     "failed to generate.".format(report)
                 )
-        return subthreshold + gate + dynamic, area
+    return subthreshold + gate, area
+
+
+# `area_cache_lock` guards `area.rpt` among benchmark threads
+area_cache_lock = threading.Lock()
+
+
+def load_area_cache(temp: str) -> Optional[Tuple[float, float]]:
+    """
+        `temp` is the temporary root directory of a design,
+        i.e., `temp/gem5-<idx>`. The area cache is formatted as:
+        "Leakage: <leakage>, area: <area>"
+    """
+    area_rpt = os.path.join(temp, "area.rpt")
+    if not if_exist(area_rpt):
+        return None
+    with open(area_rpt, 'r') as f:
+        cnt = re.findall(r"\d+\.\d+", f.readline())
+    if len(cnt) != 2:
+        return None
+    return float(cnt[0]), float(cnt[1])
+
+
+def dump_area_cache(temp: str, leakage: float, area: float) -> NoReturn:
+    area_rpt = os.path.join(temp, "area.rpt")
+    with open(area_rpt + ".tmp", 'w') as f:
+        f.write("Leakage: {:.8f}, area: {:.5f}\n".format(leakage, area))
+    os.replace(area_rpt + ".tmp", area_rpt)
+
+
+def get_cached_leakage_area(temp: str, report: str) -> Tuple[float, float]:
+    """
+        Leakage and area are parsed from the first McPAT report of
+        a design and reused for the rest of its benchmarks.
+    """
+    with area_cache_lock:
+        cache = load_area_cache(temp)
+        if cache is None:
+            leakage, area = get_leakage_area(report)
+            if area > 0:
+                dump_area_cache(temp, leakage, area)
+            return leakage, area
+        return cache
 
 
 def generate_report(manager: object, k: str) -> Tuple[float, float, float, float]:
@@ -90,7 +165,8 @@ def generate_report(manager: object, k: str) -> Tuple[float, float, float, float
     report = os.path.join(m5out, "report")
     ppa_rpt = os.path.join(m5out, "ppa.rpt")
     ipc, cpi = get_perf(manager, stats)
-    power, area = get_power_area(report)
+    leakage, area = get_cached_leakage_area(manager.temp, report)
+    power = leakage + get_dynamic_power(report)
     with open(ppa_rpt, 'w') as f:
         msg = "IPC: {:.8f}, CPI: {:.8f}, " \
             "Power: {:.8f}, area: {:.5f}".format(
@@ -100,21 +176,126 @@ def generate_report(manager: object, k: str) -> Tuple[float, float, float, float
     return ipc, cpi, power, area
 
 
-def pat_model_impl(manager: object, k: str) -> NoReturn:
+def get_runner_configs(manager: object) -> Dict:
     """
-        `k` is the benchmark's name.
+        Per-job limits are specified in `misc-setting`/`runner`.
     """
-    if manager.benchmark.name == "spec2017":
-        m5out = os.path.join(manager.temp, k)
-    elif manager.benchmark.name == "spec2006":
-        m5out = os.path.join(manager.temp, k)
-    else:
-        # bare model
-        m5out = os.path.join(
-            manager.temp,
-            remove_suffix(k, ".riscv")
+    runner = manager.configs["misc-setting"].get("runner")
+    return runner if runner is not None else {}
+
+
+def execute_job(
+    manager: object,
+    cmd: str,
+    log: str,
+    timeout: str,
+    stop: Optional[StragglerMonitor] = None
+) -> JobResult:
+    """
+        `log` is the name of the log file saved in `temp/gem5-<idx>/logs`,
+        and `timeout` is the key of the wall-clock limit in `runner`.
+        `stop` stops GEM5 gracefully, so statistics are still dumped.
+    """
+    runner = get_runner_configs(manager)
+    return execute_with_limits(
+        cmd,
+        timeout=runner.get(timeout),
+        memory=runner.get("memory-limit"),
+        log=os.path.join(manager.temp, "logs", log),
+        cancel=cancel_event,
+        stop=stop if stop is not None and stop.enable else None,
+        stop_target=manager.gem5_opt
+    )
+
+
+def build_lock(gem5_root: str):
+    """
+        The lock of a GEM5 tree.
+    """
+    return file_lock(os.path.join(gem5_root, ".build.lock"))
+
+
+def simulation_lock(temp: str):
+    """
+        The lock of a design, i.e., `temp/gem5-<idx>`, so a design
+        is simulated once even if explorers reach it concurrently.
+    """
+    mkdir(temp)
+    return file_lock(os.path.join(temp, ".simulation.lock"))
+
+
+def get_outdir(manager: object, name: str) -> str:
+    """
+        GEM5's output directory is separated for each design, so
+        different designs can be simulated concurrently.
+    """
+    return os.path.join(
+        manager.macros["gem5-research-root"],
+        "m5out-{}".format(remove_suffix(manager.gem5_opt, ".opt")),
+        name
+    )
+
+
+def finalize_simulation(
+    manager: object,
+    result: JobResult,
+    monitor: StragglerMonitor,
+    outdir: str,
+    m5out: str
+) -> bool:
+    """
+        A simulation stopped early keeps its results, which are
+        marked with "partial.rpt".
+    """
+    if result.stopped and not result.timed_out and \
+        not result.cancelled:
+        if if_exist(outdir):
+            """
+                GEM5 could exit with a non-zero code after it is
+                interrupted, so outputs are not moved.
+            """
+            if if_exist(m5out):
+                shutil.rmtree(m5out)
+            shutil.move(outdir, m5out)
+        if not if_exist(os.path.join(m5out, "stats.txt")):
+            return False
+        with open(os.path.join(m5out, "partial.rpt"), 'w') as f:
+            f.write("stopped early due to {}.\n".format(monitor.reason))
+        return True
+    return result.succeeded and if_exist(m5out)
+
+
+def get_fast_forward_options(
+    manager: object,
+    k: str,
+    v: Dict,
+    fast_forward: int,
+    warmup_insts: int
+) -> str:
+    """
+        We restore from the warm checkpoint of (`k`, `fast_forward`) if
+        it is enabled, so the functional fast forwarding is not repeated
+        for each design. Otherwise, we fast forward from the beginning.
+    """
+    checkpoint_dir = prepare_checkpoint(manager, k, v)
+    if checkpoint_dir is not None:
+        return "--checkpoint-restore={} " \
+            "--at-instruction " \
+            "--checkpoint-dir={} " \
+            "--restore-with-cpu=AtomicSimpleCPU " \
+            "--warmup-insts={} ".format(
+                fast_forward,
+                checkpoint_dir,
+                warmup_insts
+            )
+    return "--warmup-insts={} " \
+        "--fast-forward={} ".format(
+            warmup_insts,
+            fast_forward
         )
 
+
+def get_mcpat_template(manager: object) -> str:
     """
         We use the "switch-o3cpu.xml" template if
         we specify the fast forwarding.
@@ -164,6 +345,27 @@ def pat_model_impl(manager: object, k: str) -> NoReturn:
                 "templates",
                 "o3cpu.xml"
             )
+    return template
+
+
+def pat_model_impl(manager: object, k: str) -> NoReturn:
+    """
+        `k` is the benchmark's name.
+    """
+    if manager.benchmark.name == "spec2017":
+        m5out = os.path.join(manager.temp, k)
+    elif manager.benchmark.name == "spec2006":
+        m5out = os.path.join(manager.temp, k)
+    else:
+        # bare model
+        m5out = os.path.join(
+            manager.temp,
+            remove_suffix(k, ".riscv")
+        )
+    template = get_mcpat_template(manager)
+    # the parser cannot read compressed artifacts, e.g., to refine power
+    restore_artifact(os.path.join(m5out, "config.json"))
+    restore_artifact(os.path.join(m5out, "stats.txt"))
 
     cmd = "{}; {} {} -c {} " \
         "-s {} " \
@@ -193,12 +395,80 @@ def pat_model_impl(manager: object, k: str) -> NoReturn:
     """
         NOTICE: the power & area modeling could be failed.
     """
-    execute(cmd)
+    execute_job(
+        manager,
+        cmd,
+        "{}-mcpat.log".format(remove_suffix(k, ".riscv")),
+        "pat-timeout"
+    )
+
+
+def surrogate_model(
+    manager: object, k: str
+) -> Optional[Tuple[float, float, float, float]]:
+    """
+        Predict the runtime dynamic power with the power surrogate.
+        The leakage & area are from the area cache, or predicted with
+        the area model if the cache is missing. We return `None` if
+        the surrogate is not confident, so McPAT is required.
+    """
+    surrogate = manager.simulator.power_surrogate
+    if surrogate is None or manager.simulator.force_mcpat:
+        return None
+    cache = manager.simulator.query_area(manager.simulator.embedding)
+    predicted = cache is None
+    if predicted:
+        area_model = manager.simulator.area_model
+        if area_model is None:
+            return None
+        idx = manager.simulator.o3cpu_design_space.embedding_to_idx(
+            manager.simulator.embedding
+        )
+        cache = float(area_model.estimate_leakage(idx)[0]), \
+            float(area_model.estimate_area(idx)[0])
+    m5out = os.path.join(manager.temp, k)
+    dynamic, confident = surrogate.predict_with_stats(
+        os.path.join(m5out, "stats.txt"),
+        manager.simulator.embedding
+    )
+    if not confident:
+        return None
+    leakage, area = cache
+    ipc, cpi = get_perf(manager, os.path.join(m5out, "stats.txt"))
+    power = leakage + dynamic
+    with open(os.path.join(m5out, "ppa.rpt"), 'w') as f:
+        msg = "IPC: {:.8f}, CPI: {:.8f}, " \
+            "Power: {:.8f}, area: {:.5f}".format(
+                ipc, cpi, power, area
+            )
+        f.write(msg + '\n')
+    """
+        "surrogate.rpt" marks the power is predicted, which
+        can be refined with McPAT afterward. Leakage & area are
+        marked if they are predicted with the area model.
+    """
+    with open(os.path.join(m5out, "surrogate.rpt"), 'w') as f:
+        f.write("Dynamic: {:.8f}, error bound: {:.8f}\n".format(
+                dynamic, surrogate.error_bound
+            )
+        )
+        if predicted:
+            f.write("Leakage: {:.8f}, area: {:.5f}, predicted with " \
+                "the area model\n".format(leakage, area)
+            )
+    return ipc, cpi, power, area
 
 
 def pat_model(manager: object, k: str) -> Tuple[float, float, float, float]:
+    with Timer("power surrogate with {}".format(k)):
+        ppa = surrogate_model(manager, k)
+    if ppa is not None:
+        return ppa
     with Timer("PAT model with {}".format(k)):
         pat_model_impl(manager, k)
+    surrogate_rpt = os.path.join(manager.temp, k, "surrogate.rpt")
+    if if_exist(surrogate_rpt):
+        os.remove(surrogate_rpt)
     return generate_report(manager, k)
 
 
@@ -219,14 +489,26 @@ def trim_instruction_flow(m5out: str):
 
 
 def simulation_spec2017_impl(
-    embedding: List[int], manager: object, k: str, v: Dict
+    embedding: List[int],
+    manager: object,
+    k: str,
+    v: Dict,
+    simpoint: Optional[Tuple[str, int, float]] = None
 ) -> NoReturn:
     """
         `k` is the benchmark's name, and `v` is
-        meta information of `k`.
+        meta information of `k`. `simpoint` is
+        (name, checkpoint, weight) of a SimPoint,
+        and results are saved in `name`.
     """
+    if simpoint is None:
+        simpoint = get_simpoints(k, v)[0]
+    name, checkpoint, _ = simpoint
     # `m5out` is the target output directory
-    m5out = os.path.join(manager.temp, k)
+    m5out = os.path.join(manager.temp, name)
+    mkdir(os.path.dirname(m5out))
+    # `outdir` is GEM5's output directory
+    outdir = get_outdir(manager, name)
 
     # change the execution directory
     cmd = "cd {} && {} ".format(
@@ -251,9 +533,7 @@ def simulation_spec2017_impl(
         "--cpu-type=RiscvO3CPU " \
         "--cmd={} ".format(
             cmd,
-            os.path.join(
-                manager.macros["gem5-research-root"], k
-            ),
+            outdir,
             os.path.join(
                 manager.macros["gem5-research-root"],
                 "configs", "example", "se.py"
@@ -296,29 +576,36 @@ def simulation_spec2017_impl(
             embedding[19],
             embedding[20],
             embedding[21],
-            v["checkpoint"],
+            checkpoint,
             v["checkpoint-root"]
         )
-    if manager.benchmark.max_insts is not None:
+    maxinsts = get_inst_budget(manager, k, manager.benchmark.max_insts)
+    if maxinsts is not None:
         cmd = "{} --maxinsts={}".format(
             cmd,
-            manager.benchmark.max_insts
+            maxinsts
         )
     cmd = "{} && rm -rf {} && mv -f {} {}".format(
-        cmd, m5out, os.path.join(
-            manager.macros["gem5-research-root"], k
-        ), m5out
+        cmd, m5out, outdir, m5out
     )
 
     # simulate
     with Timer("simulate with {}".format(cmd)):
-        execute(cmd)
+        monitor = StragglerMonitor(manager, k, outdir)
+        result = execute_job(
+            manager,
+            cmd,
+            "{}-gem5.log".format(name),
+            "simulation-timeout",
+            monitor
+        )
 
-    if not if_exist(m5out):
+    if not finalize_simulation(manager, result, monitor, outdir, m5out):
         warn("{} is failed in simulation with " \
-            "benchmark: {}.".format(
+            "benchmark: {}, {}.".format(
                 manager.gem5_opt,
-                k
+                name,
+                result
             )
         )
         return
@@ -332,7 +619,7 @@ def simulation_spec2017_impl(
     # power & area
     thread = WorkerThread(
         func=pat_model,
-        args=(manager, k,)
+        args=(manager, name,)
     )
     threads.append(thread)
 
@@ -342,7 +629,7 @@ def simulation_spec2017_impl(
         # model with the new DEG formulation
         thread = WorkerThread(
             func=deg_model,
-            args=(manager.deg_manager, k,)
+            args=(manager.deg_manager, name,)
         )
         threads.append(thread)
 
@@ -350,6 +637,8 @@ def simulation_spec2017_impl(
         thread.start()
     for thread in threads:
         thread.join()
+    # compress or delete bulky artifacts after they are parsed
+    manage_artifacts(manager, name)
 
 
 def simulation_spec2006_impl(
@@ -361,6 +650,8 @@ def simulation_spec2006_impl(
     """
     # `m5out` is the target output directory
     m5out = os.path.join(manager.temp, k)
+    # `outdir` is GEM5's output directory
+    outdir = get_outdir(manager, k)
 
     # change the execution directory
     cmd = "cd {} && {} ".format(
@@ -385,9 +676,7 @@ def simulation_spec2006_impl(
         "--cpu-type=RiscvO3CPU " \
         "--cmd={} ".format(
             cmd,
-            os.path.join(
-                manager.macros["gem5-research-root"], k
-            ),
+            outdir,
             os.path.join(
                 manager.macros["gem5-research-root"],
                 "configs", "example", "se.py"
@@ -414,33 +703,40 @@ def simulation_spec2006_impl(
         "--sys-voltage=0.63V " \
         "--mem-size=16GB " \
         "--mem-type=LPDDR3_1600_1x32 " \
-        "--mem-channels=1 " \
-        "--warmup-insts={} " \
-        "--fast-forward={} " \
-        "--maxinsts={}".format(
+        "--mem-channels=1 ".format(
             cmd,
             embedding[18],
             embedding[19],
             embedding[20],
-            embedding[21],
-            v["warmup-insts"],
-            v["fast-forward"],
-            v["maxinsts"]
+            embedding[21]
         )
+    cmd = "{} {}--maxinsts={}".format(
+        cmd,
+        get_fast_forward_options(
+            manager, k, v, v["fast-forward"], v["warmup-insts"]
+        ),
+        get_inst_budget(manager, k, v["maxinsts"])
+    )
     cmd = "{} && rm -rf {} && mv -f {} {}".format(
-        cmd, m5out, os.path.join(
-            manager.macros["gem5-research-root"], k
-        ), m5out
+        cmd, m5out, outdir, m5out
     )
 
     # simulate
-    execute(cmd)
+    monitor = StragglerMonitor(manager, k, outdir)
+    result = execute_job(
+        manager,
+        cmd,
+        "{}-gem5.log".format(k),
+        "simulation-timeout",
+        monitor
+    )
 
-    if not if_exist(m5out):
+    if not finalize_simulation(manager, result, monitor, outdir, m5out):
         warn("{} is failed in simulation with " \
-            "benchmark: {}.".format(
+            "benchmark: {}, {}.".format(
                 manager.gem5_opt,
-                k
+                k,
+                result
             )
         )
         return
@@ -472,6 +768,8 @@ def simulation_spec2006_impl(
         thread.start()
     for thread in threads:
         thread.join()
+    # compress or delete bulky artifacts after they are parsed
+    manage_artifacts(manager, k)
 
 
 def simulation_bare_model_impl(
@@ -485,6 +783,8 @@ def simulation_bare_model_impl(
     m5out = os.path.join(
         manager.temp, remove_suffix(k, ".riscv")
     )
+    # `outdir` is GEM5's output directory
+    outdir = get_outdir(manager, remove_suffix(k, ".riscv"))
 
     # change the execution directory
     cmd = "cd {} && {} ".format(
@@ -523,10 +823,7 @@ def simulation_bare_model_impl(
         "--mem-type=LPDDR3_1600_1x32 " \
         "--mem-channels=1 ".format(
             cmd,
-            os.path.join(
-                manager.macros["gem5-research-root"],
-                remove_suffix(k, ".riscv")
-            ),
+            outdir,
             os.path.join(
                 manager.macros["gem5-research-root"],
                 "configs", "example", "se.py"
@@ -539,28 +836,42 @@ def simulation_bare_model_impl(
         )
     if manager.benchmark.warmup_insts is not None and \
         manager.benchmark.fast_forward is not None:
-        cmd = "{} " \
-            "--warmup-insts={} " \
-            "--fast-forward={} ".format(
-                cmd,
-                manager.benchmark.warmup_insts,
-                manager.benchmark.fast_forward
-            ) 
+        cmd = "{} {}".format(
+            cmd,
+            get_fast_forward_options(
+                manager,
+                k,
+                v,
+                manager.benchmark.fast_forward,
+                manager.benchmark.warmup_insts
+            )
+        )
+    maxinsts = get_inst_budget(manager, k)
+    if maxinsts is not None:
+        cmd = "{} --maxinsts={}".format(
+            cmd,
+            maxinsts
+        )
     cmd = "{} && rm -rf {} && mv -f {} {}".format(
-        cmd, m5out, os.path.join(
-            manager.macros["gem5-research-root"],
-            remove_suffix(k, ".riscv")
-        ), m5out
+        cmd, m5out, outdir, m5out
     )
 
     # simulate
-    execute(cmd)
+    monitor = StragglerMonitor(manager, k, outdir)
+    result = execute_job(
+        manager,
+        cmd,
+        "{}-gem5.log".format(remove_suffix(k, ".riscv")),
+        "simulation-timeout",
+        monitor
+    )
 
-    if not if_exist(m5out):
+    if not finalize_simulation(manager, result, monitor, outdir, m5out):
         warn("{} is failed in simulation with " \
-            "benchmark: {}.".format(
+            "benchmark: {}, {}.".format(
                 manager.gem5_opt,
-                k
+                k,
+                result
             )
         )
         return
@@ -607,30 +918,53 @@ def simulation_bare_model_impl(
         thread.start()
     for thread in threads:
         thread.join()
+    # compress or delete bulky artifacts after they are parsed
+    manage_artifacts(manager, remove_suffix(k, ".riscv"))
 
 
-def simulation_spec2017(embedding: List[int], manager: object) -> NoReturn:
+def simulation_spec2017(
+    embedding: List[int],
+    manager: object,
+    benchmark: Optional[str] = None
+) -> NoReturn:
     """
-        For each benchmark, we launch a thread to execute.
+        For each SimPoint of each benchmark, we launch a thread
+        to execute. Results of SimPoints are combined with weights
+        after all threads finish.
     """
     threads = []
     for k, v in manager.benchmark:
-        thread = WorkerThread(
-            func=simulation_spec2017_impl,
-            args=(embedding, manager, k, v,)
-        )
-        threads.append(thread)
-        thread.start()
+        if benchmark is not None and k != benchmark:
+            continue
+        for simpoint in get_simpoints(k, v):
+            thread = WorkerThread(
+                func=simulation_spec2017_impl,
+                args=(embedding, manager, k, v, simpoint,)
+            )
+            threads.append(thread)
+            thread.start()
     for thread in threads:
         thread.join()
+    for k, v in manager.benchmark:
+        if benchmark is not None and k != benchmark:
+            continue
+        simpoints = get_simpoints(k, v)
+        if len(simpoints) > 1:
+            combine_simpoints(manager.temp, k, simpoints)
 
 
-def simulation_spec2006(embedding: List[int], manager: object) -> NoReturn:
+def simulation_spec2006(
+    embedding: List[int],
+    manager: object,
+    benchmark: Optional[str] = None
+) -> NoReturn:
     """
         For each benchmark, we launch a thread to execute.
     """
     threads = []
     for k, v in manager.benchmark:
+        if benchmark is not None and k != benchmark:
+            continue
         thread = WorkerThread(
             func=simulation_spec2006_impl,
             args=(embedding, manager, k, v,)
@@ -641,12 +975,18 @@ def simulation_spec2006(embedding: List[int], manager: object) -> NoReturn:
         thread.join()
 
 
-def simulation_bare_model(embedding: List[int], manager: object) -> NoReturn:
+def simulation_bare_model(
+    embedding: List[int],
+    manager: object,
+    benchmark: Optional[str] = None
+) -> NoReturn:
     """
         For each benchmark, we launch a thread to execute.
     """
     threads = []
     for k, v in manager.benchmark:
+        if benchmark is not None and k != benchmark:
+            continue
         thread = WorkerThread(
             func=simulation_bare_model_impl,
             args=(embedding, manager, k, v,)
@@ -718,9 +1058,30 @@ class PyDEGManager(object):
                 self.simulator.configs["misc-setting"]["start-idx"],
                 self.simulator.configs["misc-setting"]["end-idx"]
             )
+        if self.simulator.configs["misc-setting"].get("near-critical") \
+            is not None:
+            cmd = "{} -n {}".format(
+                cmd,
+                self.simulator.configs["misc-setting"]["near-critical"]
+            )
+        if self.simulator.configs["misc-setting"].get("deg-snapshot", False):
+            # the DEG is saved for the what-if analysis
+            cmd = "{} -g {}".format(
+                cmd,
+                os.path.join(
+                    self.temp,
+                    remove_suffix(benchmark, ".riscv"),
+                    "deg.npz"
+                )
+            )
 
         # model with the new DEG formulation
-        execute(cmd)
+        execute_job(
+            self.simulator,
+            cmd,
+            "{}-deg.log".format(remove_suffix(benchmark, ".riscv")),
+            "deg-timeout"
+        )
 
         if not if_exist(output):
             error("DEG is failed with " \
@@ -770,7 +1131,12 @@ class CppDEGManager(object):
             )
 
         # model with the new DEG formulation
-        execute(cmd)
+        execute_job(
+            self.simulator,
+            cmd,
+            "{}-deg.log".format(remove_suffix(benchmark, ".riscv")),
+            "deg-timeout"
+        )
 
         if not if_exist(output):
             error("DEG is failed with " \
@@ -794,6 +1160,8 @@ class O3CPUSimulation(Simulation):
             self.gem5_opt = self.simulator.gem5_opt
             # `temp` saves the temporary root directory
             self.temp = self.simulator.temp
+            # `fidelity` saves the fidelity tier to simulate
+            self.fidelity = self.simulator.fidelity
             # `deg_manager` helps to call the new DEG model
             self.deg_manager = PyDEGManager(simulator)
             # for higher performance, we can use `CppDEGManager`
@@ -1086,22 +1454,30 @@ class DSE_FUPool(FUPool):
         def simulate_spec2006(self):
             pool = ThreadPool(len(self.benchmark.keys()))
 
-        def simulate(self, embedding: List[int]) -> NoReturn:
+        def simulate(
+            self,
+            embedding: List[int],
+            benchmark: Optional[str] = None
+        ) -> NoReturn:
+            """
+                `benchmark` specifies a single benchmark to simulate,
+                and `None` means all benchmarks.
+            """
             if not if_exist(self.temp):
                 mkdir(self.temp)
             
             if self.benchmark.name == "spec2017":
                 simulation_spec2017(
-                    embedding, self
+                    embedding, self, benchmark
                 )
             elif self.benchmark.name == "spec2006":
                 simulation_spec2006(
-                    embedding, self
+                    embedding, self, benchmark
                 )
             else:
                 assert self.benchmark.name == "bare-model"
                 simulation_bare_model(
-                    embedding, self
+                    embedding, self, benchmark
                 )
 
     def __init__(
@@ -1120,6 +1496,16 @@ class DSE_FUPool(FUPool):
         self.temp = None
         # `gem5_manager` saves the instantiation of `GEM5Manager`
         self.gem5_manager = None
+        # `embedding` saves the microarchitecture to simulate
+        self.embedding = None
+        # `power_surrogate` predicts the runtime dynamic power
+        self.power_surrogate = self.load_power_surrogate()
+        # `area_model` predicts leakage & area for the power surrogate
+        self.area_model = self.load_area_model()
+        # `force_mcpat` disables the power surrogate
+        self.force_mcpat = False
+        # `fidelity` saves the fidelity tier, `None` means the full tier
+        self.fidelity = None
 
     def build_benchmark(self, benchmark: dict) -> Union[List, Dict]:
         # TODO: self.options
@@ -1136,6 +1522,119 @@ class DSE_FUPool(FUPool):
                 )
             return construct_bare_model(benchmark[run])
 
+    @property
+    def fidelity_tiers(self) -> List[Dict]:
+        """
+            Fidelity tiers are specified from the lowest to the highest
+            in `misc-setting`/`fidelity`/`tiers`. The full tier, i.e.,
+            `None`, is always the highest one.
+        """
+        fidelity = self.configs["misc-setting"].get("fidelity")
+        if fidelity is None or fidelity.get("tiers") is None:
+            return []
+        return fidelity["tiers"]
+
+    def get_fidelity_configs(self, fidelity: Optional[str]) -> Dict:
+        if fidelity is None:
+            return {}
+        for tier in self.fidelity_tiers:
+            if tier["name"] == fidelity:
+                return tier
+        error("fidelity tier: {} is not specified.".format(fidelity))
+
+    def get_temp_root(self, fidelity: Optional[str] = None) -> str:
+        """
+            Results of each fidelity tier are stored separately, i.e.,
+            `temp-<fidelity>` for a low-fidelity tier.
+        """
+        if fidelity is None:
+            return self.macros["temp-root"]
+        return "{}-{}".format(self.macros["temp-root"], fidelity)
+
+    def if_fidelity_available(
+        self,
+        embedding: List[int],
+        fidelity: Optional[str] = None
+    ) -> bool:
+        temp = os.path.join(
+            self.get_temp_root(fidelity),
+            "gem5-{}".format(
+                self.o3cpu_design_space.embedding_to_idx(embedding)
+            )
+        )
+        for k, v in self.benchmark:
+            if not if_exist(
+                os.path.join(temp, remove_suffix(k, ".riscv"), "ppa.rpt")
+            ):
+                return False
+        return True
+
+    def query_best_fidelity(
+        self,
+        embedding: List[int]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+            return: the best available fidelity tier of `embedding` and
+            the root directory of its results, i.e., `temp/gem5-<idx>`.
+            `(None, None)` means `embedding` is not simulated.
+        """
+        for fidelity in [None] + [
+            tier["name"] for tier in reversed(self.fidelity_tiers)
+        ]:
+            if self.if_fidelity_available(embedding, fidelity):
+                return fidelity, os.path.join(
+                    self.get_temp_root(fidelity),
+                    "gem5-{}".format(
+                        self.o3cpu_design_space.embedding_to_idx(embedding)
+                    )
+                )
+        return None, None
+
+    def screen(self, embedding: List[int], fidelity: str) -> NoReturn:
+        """
+            Simulate `embedding` with a low-fidelity tier, e.g., with
+            fewer instructions, unless a better fidelity is available.
+        """
+        tiers = [tier["name"] for tier in self.fidelity_tiers]
+        best, _ = self.query_best_fidelity(embedding)
+        if best is not None and tiers.index(best) >= tiers.index(fidelity):
+            return
+        if self.if_fidelity_available(embedding):
+            return
+        self.simulate(embedding, fidelity)
+
+    def escalate(self, embedding: List[int]) -> NoReturn:
+        """
+            Simulate `embedding` with the full tier, e.g., for designs
+            that survive screening.
+        """
+        if self.if_fidelity_available(embedding):
+            return
+        self.simulate(embedding)
+
+    def load_power_surrogate(self) -> Optional[object]:
+        power_surrogate = self.configs["misc-setting"].get("power-surrogate")
+        if power_surrogate is None or power_surrogate["model"] is None:
+            return None
+        return load_power_surrogate(
+            power_surrogate["model"],
+            power_surrogate["error-bound"]
+        )
+
+    def load_area_model(self) -> Optional[O3CPUAreaModel]:
+        """
+            The area model is used by the power surrogate when the
+            area cache of a design is missing.
+        """
+        power_surrogate = self.configs["misc-setting"].get("power-surrogate")
+        if self.power_surrogate is None or \
+            power_surrogate.get("area-model") is None:
+            return None
+        return load_area_model(
+            power_surrogate["area-model"],
+            self.o3cpu_design_space
+        )
+
     def validate_before_simulate(self) -> NoReturn:
         assert self.gem5_opt is not None and \
                 self.temp is not None and \
@@ -1151,15 +1650,49 @@ class DSE_FUPool(FUPool):
         except ValueError as e:
             error("{} is invalid.".format(embedding))
 
-    def generate_simulator(self, embedding: List[int]) -> NoReturn:
+    def query_area(self, embedding: List[int]) -> Optional[Tuple[float, float]]:
+        """
+            Area-only query. We return the cached leakage & area of
+            `embedding` without launching GEM5 or McPAT. If the cache
+            is missing, we try to recover it from an existing McPAT
+            report, otherwise, `None` is returned.
+            Leakage & area do not depend on the fidelity, so results of
+            all fidelity tiers are queried, from the full tier to the
+            lowest one.
+        """
+        idx = self.o3cpu_design_space.embedding_to_idx(embedding)
+        temps = [
+            os.path.join(self.get_temp_root(fidelity), "gem5-{}".format(idx)) \
+                for fidelity in [None] + [
+                    tier["name"] for tier in reversed(self.fidelity_tiers)
+                ]
+        ]
+        for temp in temps:
+            cache = load_area_cache(temp)
+            if cache is not None:
+                return cache
+        for temp in temps:
+            for k, v in self.benchmark:
+                report = os.path.join(
+                    temp, remove_suffix(k, ".riscv"), "report"
+                )
+                if if_artifact_exist(report):
+                    return get_cached_leakage_area(temp, report)
+        return None
+
+    def setup_simulator(self, embedding: List[int]) -> NoReturn:
+        self.embedding = embedding
         self.gem5_opt = "gem5-{}.opt".format(
             self.o3cpu_design_space.embedding_to_idx(embedding)
         )
         self.temp = os.path.join(
-            self.macros["temp-root"],
+            self.get_temp_root(self.fidelity),
             remove_suffix(self.gem5_opt, ".opt")
         )
         self.gem5_manager = self.GEM5Manager(self)
+
+    def generate_simulator(self, embedding: List[int]) -> NoReturn:
+        self.setup_simulator(embedding)
         if if_exist(
             os.path.join(
                 self.macros["build-root"],
@@ -1171,13 +1704,127 @@ class DSE_FUPool(FUPool):
                 to generate it again.
             """
             return
-        self.gem5_manager.generate_simulator(embedding)
+        with build_lock(self.macros["gem5-research-root"]):
+            """
+                GEM5's source code is modified to build a simulator,
+                so builds in a GEM5 tree are serialized. The simulator
+                could be built by others while we are waiting.
+            """
+            if if_exist(
+                os.path.join(
+                    self.macros["build-root"],
+                    self.gem5_opt
+                )
+            ):
+                return
+            self.gem5_manager.generate_simulator(embedding)
 
-    def simulate_impl(self, embedding: List[int]) -> NoReturn:
+    def if_built(self, embedding: List[int]) -> bool:
+        return if_exist(
+            os.path.join(
+                self.macros["build-root"],
+                "gem5-{}.opt".format(
+                    self.o3cpu_design_space.embedding_to_idx(embedding)
+                )
+            )
+        )
+
+    def if_simulated(
+        self,
+        embedding: List[int],
+        benchmark: Optional[str] = None,
+        fidelity: Optional[str] = None
+    ) -> bool:
+        """
+            Whether results of `benchmark` (all benchmarks if it is
+            `None`) are in the result store.
+        """
+        temp = os.path.join(
+            self.get_temp_root(fidelity),
+            "gem5-{}".format(
+                self.o3cpu_design_space.embedding_to_idx(embedding)
+            )
+        )
+        for k, v in self.benchmark:
+            if benchmark is not None and k != benchmark:
+                continue
+            m5out = os.path.join(temp, remove_suffix(k, ".riscv"))
+            if not if_exist(os.path.join(m5out, "ppa.rpt")):
+                return False
+            if self.configs["misc-setting"]["deg-model"] and \
+                not if_exist(os.path.join(m5out, "analysis.rpt")):
+                return False
+        return True
+
+    def fork(self) -> object:
+        """
+            A shallow copy shares the design space, benchmarks & the
+            power surrogate, so designs can be simulated concurrently
+            with forked simulators.
+        """
+        simulator = copy.copy(self)
+        simulator.gem5_opt = None
+        simulator.temp = None
+        simulator.gem5_manager = None
+        simulator.embedding = None
+        simulator.fidelity = None
+        return simulator
+
+    def refine_power(self, embedding: List[int]) -> NoReturn:
+        """
+            Replace the power predicted by the surrogate with McPAT's
+            results, e.g., for Pareto candidates.
+        """
+        self.setup_simulator(embedding)
+        threads, refined = [], []
+        for k, v in self.benchmark:
+            if self.benchmark.name == "spec2017":
+                names = [name for name, _, _ in get_simpoints(k, v)]
+            else:
+                names = [remove_suffix(k, ".riscv")]
+            for name in names:
+                if if_exist(os.path.join(self.temp, name, "surrogate.rpt")):
+                    threads.append(
+                        WorkerThread(
+                            func=pat_model,
+                            args=(self.gem5_manager, name,)
+                        )
+                    )
+                    refined.append(name)
+        force_mcpat = self.force_mcpat
+        self.force_mcpat = True
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.force_mcpat = force_mcpat
+        if self.benchmark.name == "spec2017":
+            for k, v in self.benchmark:
+                simpoints = get_simpoints(k, v)
+                if len(simpoints) > 1:
+                    combine_simpoints(self.temp, k, simpoints)
+        for name in refined:
+            manage_artifacts(self.gem5_manager, name)
+
+    def simulate_impl(
+        self,
+        embedding: List[int],
+        benchmark: Optional[str] = None
+    ) -> NoReturn:
         self.validate_before_simulate()
-        self.gem5_manager.simulate(embedding)
+        self.gem5_manager.simulate(embedding, benchmark)
 
-    def simulate(self, embedding: List[int]):
+    def simulate(
+        self,
+        embedding: List[int],
+        fidelity: Optional[str] = None,
+        benchmark: Optional[str] = None
+    ):
         self.validate_embedding(embedding)
-        self.generate_simulator(embedding)
-        self.simulate_impl(embedding)
+        self.get_fidelity_configs(fidelity)
+        self.fidelity = fidelity
+        try:
+            self.generate_simulator(embedding)
+            self.simulate_impl(embedding, benchmark)
+        finally:
+            self.fidelity = None
@@ -0,0 +1,168 @@
+# Author: baichen.bai@alibaba-inc.com
+
+
+import os
+import numpy as np
+from typing import Dict, List, Optional, NoReturn
+from utils.utils import timestamp, if_exist
+
+
+def get_straggler_configs(manager: object, benchmark: str) -> Dict:
+    """
+        Budgets of `benchmark`. Budgets specified in
+        `misc-setting`/`straggler`/`benchmark`/`benchmark` override
+        the default ones.
+    """
+    straggler = manager.configs["misc-setting"].get("straggler")
+    if straggler is None:
+        return {}
+    configs = {
+        k: v for k, v in straggler.items() if k != "benchmark"
+    }
+    if straggler.get("benchmark") is not None and \
+        straggler["benchmark"].get(benchmark) is not None:
+        configs.update(straggler["benchmark"][benchmark])
+    return configs
+
+
+def get_inst_budget(
+    manager: object,
+    benchmark: str,
+    maxinsts: Optional[int] = None
+) -> Optional[int]:
+    """
+        The instruction budget is passed to GEM5 with `--maxinsts`.
+        A low-fidelity tier could specify a smaller budget.
+    """
+    budgets = [
+        budget for budget in [
+            maxinsts,
+            get_straggler_configs(manager, benchmark).get("inst-budget"),
+            manager.simulator.get_fidelity_configs(
+                manager.fidelity
+            ).get("inst-budget")
+        ] if budget is not None
+    ]
+    if len(budgets) == 0:
+        return None
+    return min(budgets)
+
+
+class IPCMonitor(object):
+    """
+        Track IPC of a running simulation with the trace, i.e.,
+        "instruction-flow", and check whether IPC is stabilized.
+        The commit tick is the 26th field of each instruction.
+    """
+    def __init__(
+        self,
+        trace: str,
+        window: int,
+        tolerance: float,
+        stable_windows: int
+    ):
+        super(IPCMonitor, self).__init__()
+        self.trace = trace
+        self.window = window
+        self.tolerance = tolerance
+        self.stable_windows = stable_windows
+        self.offset = 0
+        self.remain = ""
+        self.commit = []
+        self.ipc = []
+
+    def tick_to_cycle(self, tick: int) -> float:
+        return tick / 1000
+
+    def update(self) -> NoReturn:
+        if not if_exist(self.trace):
+            return
+        if os.path.getsize(self.trace) < self.offset:
+            # the trace is truncated, e.g., a stale trace is overwritten
+            self.offset = 0
+            self.remain = ""
+        with open(self.trace, 'r') as f:
+            f.seek(self.offset)
+            cnt = f.read()
+            self.offset = f.tell()
+        cnt = (self.remain + cnt).split('\n')
+        # the last line could be incomplete
+        self.remain = cnt[-1]
+        for line in cnt[:-1]:
+            if "DST=" not in line:
+                # skip fast forwarded instructions
+                continue
+            try:
+                self.commit.append(
+                    self.tick_to_cycle(
+                        int(line.split(':')[26].split('=')[1].strip())
+                    )
+                )
+            except (IndexError, ValueError):
+                continue
+            if len(self.commit) > self.window:
+                cycles = self.commit[-1] - self.commit[0]
+                if cycles > 0:
+                    self.ipc.append(self.window / cycles)
+                self.commit = self.commit[-1:]
+
+    def stable(self) -> bool:
+        self.update()
+        if len(self.ipc) < self.stable_windows:
+            return False
+        ipc = np.array(self.ipc[-self.stable_windows:])
+        return bool(
+            np.max(np.abs(ipc - ipc.mean())) <= \
+                self.tolerance * ipc.mean()
+        )
+
+
+class StragglerMonitor(object):
+    """
+        Decide whether a simulation should be stopped early, i.e.,
+        1. its time budget is exhausted, or
+        2. its IPC is stabilized within a tolerance.
+    """
+    def __init__(self, manager: object, benchmark: str, outdir: str):
+        super(StragglerMonitor, self).__init__()
+        configs = get_straggler_configs(manager, benchmark)
+        self.time_budget = configs.get("time-budget")
+        self.ipc_monitor = None
+        if configs.get("ipc-tolerance") is not None and \
+            manager.configs["misc-setting"]["deg-model"]:
+            """
+                IPC is tracked with the trace, which is generated
+                only if the DEG model is enabled.
+            """
+            self.ipc_monitor = IPCMonitor(
+                os.path.join(outdir, "instruction-flow"),
+                configs["ipc-window"],
+                configs["ipc-tolerance"],
+                configs["ipc-stable-windows"]
+            )
+        self.start = timestamp()
+        # `reason` saves why the simulation is stopped early
+        self.reason = None
+
+    @property
+    def enable(self) -> bool:
+        return self.time_budget is not None or \
+            self.ipc_monitor is not None
+
+    def __call__(self) -> bool:
+        if self.time_budget is not None and \
+            timestamp() - self.start > self.time_budget:
+            self.reason = "time budget: {}s".format(self.time_budget)
+            return True
+        if self.ipc_monitor is not None and self.ipc_monitor.stable():
+            self.reason = "IPC is stabilized: {}".format(
+                ["{:.4f}".format(ipc) for ipc in \
+                    self.ipc_monitor.ipc[-self.ipc_monitor.stable_windows:]
+                ]
+            )
+            return True
+        return False
+
+
+def is_partial(m5out: str) -> bool:
+    return if_exist(os.path.join(m5out, "partial.rpt"))
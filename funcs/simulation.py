@@ -2,8 +2,10 @@
 
 
 import os
-from typing import List
-from utils.utils import assert_error, if_exist
+import threading
+from typing import List, NoReturn
+from concurrent.futures import ThreadPoolExecutor
+from utils.utils import assert_error, if_exist, mkdir, info, warn, timestamp
 from utils.exceptions import UnSupportedException
 from funcs.sim.o3cpu.o3cpu_simulation import O3CPUSimulation
 from funcs.design.o3cpu.o3cpu_design_space import parse_design_space
@@ -66,10 +68,130 @@ def simulation_for_idx_range(
 ):
     for idx in range(start_idx, end_idx + 1):
         simulator.simulate(
-            simulator.idx_to_embedding(idx)
+            simulator.o3cpu_design_space.idx_to_embedding(idx)
         )
 
 
+def get_candidate_embeddings(
+    simulator: O3CPUSimulation,
+    configs: dict
+) -> List[List[int]]:
+    """
+        Designs to simulate, which are specified in the same way as
+        the simulation mode.
+    """
+    configs = configs["simulator"]
+    design_space = simulator.o3cpu_design_space
+    if configs["candidate-design-set"]:
+        if_exist(configs["candidate-design-set"], strict=True, quiet=False)
+        with open(configs["candidate-design-set"], 'r') as f:
+            return [
+                [int(i) for i in \
+                    design.strip().strip('(').strip(')').split(',')
+                ] for design in f.readlines() \
+                    if not design.startswith('#')
+            ]
+    elif configs["candidate-embedding"]:
+        return configs["candidate-embedding"]
+    elif configs["candidate-idx"]:
+        candidate_idx = configs["candidate-idx"]
+        if isinstance(candidate_idx, str):
+            if_exist(candidate_idx, strict=True, quiet=False)
+            with open(candidate_idx, 'r') as f:
+                candidate_idx = [int(idx) for idx in f.readlines()]
+        return [
+            design_space.idx_to_embedding(idx) for idx in candidate_idx
+        ]
+    assert configs["start-idx"] and \
+        configs["end-idx"] and \
+        configs["end-idx"] >= \
+        configs["start-idx"], \
+        assert_error("invalid YAML for index range.")
+    return [
+        design_space.idx_to_embedding(idx) for idx in \
+            range(configs["start-idx"], configs["end-idx"] + 1)
+    ]
+
+
+def sort_for_build(
+    simulator: O3CPUSimulation,
+    embedding_set: List[List[int]]
+) -> List[List[int]]:
+    """
+        Built designs are simulated first. Other designs are sorted
+        by their embeddings, so designs sharing most of the modified
+        GEM5 source code, e.g., the pipeline width, are built together
+        and the incremental compilation is cheaper.
+    """
+    return sorted(
+        embedding_set,
+        key=lambda embedding: (
+            not simulator.if_built(embedding), embedding
+        )
+    )
+
+
+def batch_simulation(
+    simulator: O3CPUSimulation,
+    embedding_set: List[List[int]],
+    workers: int,
+    log: str
+) -> NoReturn:
+    """
+        Simulate designs with a bounded parallel executor. Duplicated
+        designs & designs in the result store are skipped, and the
+        progress & ETA are written to `log`.
+    """
+    batch, visited = [], set()
+    for embedding in embedding_set:
+        idx = simulator.o3cpu_design_space.embedding_to_idx(embedding)
+        if idx in visited or simulator.if_simulated(embedding):
+            continue
+        visited.add(idx)
+        batch.append(embedding)
+    batch = sort_for_build(simulator, batch)
+    info("{} designs are requested, and {} designs are to simulate " \
+        "with {} workers.".format(len(embedding_set), len(batch), workers)
+    )
+
+    lock = threading.Lock()
+    start = timestamp()
+    progress = {"finished": 0, "failed": 0}
+    mkdir(os.path.dirname(os.path.abspath(log)))
+
+    def simulate(embedding: List[int]) -> NoReturn:
+        try:
+            simulator.fork().simulate(embedding)
+            succeeded = simulator.if_simulated(embedding)
+        except (Exception, SystemExit) as e:
+            # `error` exits, which should not abort the batch
+            warn("{} is failed: {}.".format(embedding, e))
+            succeeded = False
+        with lock:
+            progress["finished"] += 1
+            if not succeeded:
+                progress["failed"] += 1
+            elapsed = timestamp() - start
+            eta = elapsed / progress["finished"] * \
+                (len(batch) - progress["finished"])
+            msg = "{}/{} designs are finished, failed: {}, " \
+                "elapsed: {:.0f}s, ETA: {:.0f}s, {}".format(
+                    progress["finished"],
+                    len(batch),
+                    progress["failed"],
+                    elapsed,
+                    eta,
+                    embedding
+                )
+            info(msg)
+            with open(log, 'a') as f:
+                f.write("{}\n".format(msg))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in executor.map(simulate, batch):
+            pass
+
+
 def simulation(configs: dict):
     # create the simulator
     simulator = O3CPUSimulation(
@@ -80,7 +202,14 @@ def simulation(configs: dict):
     )
 
     configs = configs["simulation"]
-    if configs["simulator"]["candidate-design-set"]:
+    if configs["simulator"].get("batch-workers"):
+        batch_simulation(
+            simulator,
+            get_candidate_embeddings(simulator, configs),
+            configs["simulator"]["batch-workers"],
+            os.path.join(simulator.macros["temp-root"], "batch.log")
+        )
+    elif configs["simulator"]["candidate-design-set"]:
         simulation_for_design_set(
             simulator,
             configs["simulator"]["candidate-design-set"]
@@ -5,7 +5,12 @@ import os
 from funcs.initialize import initialize
 from algo.dse import archexplorer
 from funcs.simulation import simulation
+from funcs.area_calibration import area_calibration
+from funcs.job_server import job_server, job_worker
+from funcs.sim.o3cpu.o3cpu_power_surrogate import power_surrogate
+from funcs.sim.o3cpu.o3cpu_checkpoint import checkpoint_preparation
 from utils.utils import get_configs_from_command
+from utils.runner import install_signal_handlers, cancel_jobs
 from funcs.dataset_generation import dataset_generation
 
 
@@ -18,9 +23,25 @@ def main(configs):
         dataset_generation(configs)
     elif configs["mode"].startswith("exploration"):
         archexplorer(configs)
+    elif configs["mode"].startswith("area-calibration"):
+        area_calibration(configs)
+    elif configs["mode"].startswith("power-surrogate"):
+        power_surrogate(configs)
+    elif configs["mode"].startswith("checkpoint-preparation"):
+        checkpoint_preparation(configs)
+    elif configs["mode"].startswith("job-server"):
+        job_server(configs)
+    elif configs["mode"].startswith("job-worker"):
+        job_worker(configs)
     else:
         raise NotImplementedError()
 
 
 if __name__ == "__main__":
-    main(get_configs_from_command())
+    install_signal_handlers()
+    try:
+        main(get_configs_from_command())
+    except (KeyboardInterrupt, SystemExit):
+        # terminate GEM5 & McPAT, which run in their own sessions
+        cancel_jobs()
+        raise
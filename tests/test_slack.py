@@ -0,0 +1,44 @@
+# Author: baichen.bai@alibaba-inc.com
+
+
+import numpy as np
+from algo.core.slack import analyze_slack
+
+
+"""
+    A hand-built DEG, nodes are indexed in the topological order:
+        0 -> 1 -> 3 -> 4 (critical, cost: 5)
+        0 -> 2 -> 3      (slack: 1)
+        0 -> 4           (slack: 4)
+    An edge is (src, dst, cost, delay, bottleneck index).
+"""
+edges = [
+    (0, 1, 2, 2, 1),
+    (1, 3, 3, 3, 4),
+    (0, 2, 2, 2, 2),
+    (2, 3, 2, 2, 4),
+    (3, 4, 0, 1, 0),
+    (0, 4, 1, 1, 16)
+]
+
+
+def test_slack():
+    slack, threshold, _ = analyze_slack(5, edges, 17, 0.2)
+    assert slack.tolist() == [0, 0, 1, 1, 0, 4]
+    # the threshold is in `cost`, i.e., 0.2 * 5
+    assert threshold == 1.0
+
+
+def test_critical_profile():
+    _, _, profile = analyze_slack(5, edges, 17, 0)
+    expected = np.zeros(17, dtype=np.int64)
+    expected[[0, 1, 4]] = [1, 2, 3]
+    assert profile.tolist() == expected.tolist()
+
+
+def test_near_critical_profile():
+    _, _, profile = analyze_slack(5, edges, 17, 0.2)
+    expected = np.zeros(17, dtype=np.int64)
+    # the delay of bottleneck 4 is not summed over 1 -> 3 and 2 -> 3
+    expected[[0, 1, 2, 4]] = [1, 2, 2, 3]
+    assert profile.tolist() == expected.tolist()
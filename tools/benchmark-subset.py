@@ -0,0 +1,304 @@
+# Author: baichen.bai@alibaba-inc.com
+
+
+import os
+import argparse
+import numpy as np
+from collections import OrderedDict
+from typing import List, Dict, Tuple, NoReturn
+from utils.utils import if_exist, info, warn, error, get_configs, \
+    dump_yaml, remove_suffix
+from funcs.sim.benchmark.spec2006 import construct_spec2006
+from funcs.sim.benchmark.spec2017 import construct_spec2017
+from funcs.sim.benchmark.bare_model import construct_bare_model
+from funcs.sim.o3cpu.o3cpu_simpoint import read_ppa_report, \
+    read_analysis_report
+
+
+"""
+    Select representative benchmarks with DEG bottleneck profiles.
+    Benchmarks are clustered with k-medoids w.r.t. their bottleneck
+    contributions, i.e., "analysis.rpt", and IPC sensitivity across a
+    calibration set of designs, i.e., designs in `temp` which have
+    results of all benchmarks. Each medoid is weighted with the size of
+    its cluster, so the weighted subset reproduces the suite-average PPA
+    and bottleneck rankings. The output can be used as `candidate` &
+    `weights` of the benchmark configuration.
+"""
+
+
+def parse_args():
+    def initialize_parser(parser):
+        parser.add_argument(
+            "-c", "--configs",
+            required=True,
+            type=str,
+            help="YAML file, where the benchmark is specified"
+        )
+        parser.add_argument(
+            "-t", "--temp",
+            type=str,
+            default=os.path.join(
+                os.path.dirname(os.path.abspath(__file__)),
+                os.path.pardir,
+                "temp"
+            ),
+            help="the result store"
+        )
+        parser.add_argument(
+            "-k", "--num-of-benchmarks",
+            type=int,
+            default=None,
+            help="the size of the subset. If it is not specified, the " \
+                "smallest subset satisfying the tolerance is selected"
+        )
+        parser.add_argument(
+            "-e", "--tolerance",
+            type=float,
+            default=0.05,
+            help="the tolerance of the max. absolute percentage error " \
+                "of the suite-average IPC & power"
+        )
+        parser.add_argument(
+            "--top-k",
+            type=int,
+            default=2,
+            help="the top-k bottlenecks to compare rankings"
+        )
+        parser.add_argument(
+            "-s", "--seed",
+            type=int,
+            default=2023,
+            help="random seed"
+        )
+        parser.add_argument(
+            "-o", "--output",
+            type=str,
+            default="benchmark-subset.yml",
+            help="output YAML file"
+        )
+        return parser
+
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser = initialize_parser(parser)
+    return parser.parse_args()
+
+
+def construct_benchmark(configs: Dict) -> object:
+    benchmark = configs["simulation"]["benchmark"]
+    run = benchmark["run"]
+    if run == "spec2017":
+        return construct_spec2017(benchmark[run])
+    elif run == "spec2006":
+        return construct_spec2006(benchmark[run])
+    return construct_bare_model(benchmark[run])
+
+
+def load_profiles(
+    temp: str,
+    benchmarks: List[str]
+) -> Tuple[List[str], np.ndarray, np.ndarray, List[str]]:
+    """
+        return: designs, PPA with the shape of (# of benchmarks,
+        # of designs, 3), normalized bottleneck contributions with
+        the shape of (# of benchmarks, # of designs, # of bottlenecks),
+        and names of bottlenecks.
+    """
+    designs, ppa, btnk, names = [], [], [], []
+    for design in sorted(os.listdir(temp)):
+        if not design.startswith("gem5-"):
+            continue
+        root = os.path.join(temp, design)
+        reports = [
+            (
+                os.path.join(root, benchmark, "ppa.rpt"),
+                os.path.join(root, benchmark, "analysis.rpt")
+            ) for benchmark in benchmarks
+        ]
+        if not all([
+            if_exist(ppa_rpt) and if_exist(analysis_rpt) \
+                for ppa_rpt, analysis_rpt in reports
+        ]):
+            continue
+        _ppa, _btnk = [], []
+        for ppa_rpt, analysis_rpt in reports:
+            ipc, _, power, area = read_ppa_report(ppa_rpt)
+            length, contrib = read_analysis_report(analysis_rpt)
+            for name in contrib.keys():
+                if name not in names:
+                    names.append(name)
+            _ppa.append([ipc, power, area])
+            _btnk.append(
+                OrderedDict([
+                    (name, v / max(length, 1)) \
+                        for name, v in contrib.items()
+                ])
+            )
+        designs.append(design)
+        ppa.append(_ppa)
+        btnk.append(_btnk)
+    if len(designs) == 0:
+        error("no designs in {} have results of all benchmarks.".format(
+                temp
+            )
+        )
+    btnk = np.array([
+        [
+            [_btnk.get(name, 0) for name in names] \
+                for _btnk in __btnk
+        ] for __btnk in btnk
+    ])
+    # transpose to (# of benchmarks, # of designs, ...)
+    return designs, np.array(ppa).transpose(1, 0, 2), \
+        btnk.transpose(1, 0, 2), names
+
+
+def construct_features(ppa: np.ndarray, btnk: np.ndarray) -> np.ndarray:
+    """
+        The feature of a benchmark consists of its bottleneck
+        contributions and IPC sensitivity, i.e., relative IPC
+        w.r.t. its average IPC, across designs.
+    """
+    ipc = ppa[:, :, 0]
+    sensitivity = ipc / np.maximum(ipc.mean(axis=1, keepdims=True), 1e-8) - 1
+    return np.concatenate(
+        [btnk.reshape(btnk.shape[0], -1), sensitivity],
+        axis=1
+    )
+
+
+def k_medoids(
+    x: np.ndarray,
+    k: int,
+    rng: np.random.RandomState,
+    n_init: int = 10,
+    max_iter: int = 100
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        return: medoids and the cluster of each sample.
+    """
+    distance = np.linalg.norm(x[:, None, :] - x[None, :, :], axis=-1)
+    best_cost, best_medoids = np.inf, None
+    for _ in range(n_init):
+        # k-medoids++ initialization
+        medoids = [rng.randint(len(x))]
+        while len(medoids) < k:
+            d = distance[:, medoids].min(axis=1) ** 2
+            if d.sum() == 0:
+                candidate = [i for i in range(len(x)) if i not in medoids]
+                medoids.append(rng.choice(candidate))
+            else:
+                medoids.append(rng.choice(len(x), p=d / d.sum()))
+        medoids = np.array(medoids)
+        for _ in range(max_iter):
+            cluster = distance[:, medoids].argmin(axis=1)
+            _medoids = medoids.copy()
+            for i in range(k):
+                members = np.where(cluster == i)[0]
+                if len(members) == 0:
+                    continue
+                _medoids[i] = members[
+                    distance[np.ix_(members, members)].sum(axis=1).argmin()
+                ]
+            if np.all(_medoids == medoids):
+                break
+            medoids = _medoids
+        cost = distance[:, medoids].min(axis=1).sum()
+        if cost < best_cost:
+            best_cost, best_medoids = cost, medoids
+    return best_medoids, distance[:, best_medoids].argmin(axis=1)
+
+
+def evaluate_subset(
+    ppa: np.ndarray,
+    btnk: np.ndarray,
+    medoids: np.ndarray,
+    weights: np.ndarray,
+    top_k: int
+) -> Dict:
+    """
+        Compare the weighted subset with the suite average of each
+        design, w.r.t. PPA & bottleneck rankings.
+    """
+    suite_ppa = ppa.mean(axis=0)
+    subset_ppa = np.average(ppa[medoids], axis=0, weights=weights)
+    ape = np.abs(subset_ppa - suite_ppa) / np.maximum(suite_ppa, 1e-8)
+    suite_btnk = btnk.mean(axis=0)
+    subset_btnk = np.average(btnk[medoids], axis=0, weights=weights)
+    top_k_match = [
+        set(np.argsort(-s)[:top_k]) == set(np.argsort(-_s)[:top_k]) \
+            for s, _s in zip(suite_btnk, subset_btnk)
+    ]
+    return {
+        "ipc-mape": float(ape[:, 0].mean()),
+        "ipc-max-ape": float(ape[:, 0].max()),
+        "power-mape": float(ape[:, 1].mean()),
+        "power-max-ape": float(ape[:, 1].max()),
+        "area-mape": float(ape[:, 2].mean()),
+        "area-max-ape": float(ape[:, 2].max()),
+        "top-{}-bottleneck-match".format(top_k): float(np.mean(top_k_match))
+    }
+
+
+def select_subset(
+    ppa: np.ndarray,
+    btnk: np.ndarray,
+    k: int,
+    top_k: int,
+    seed: int
+) -> Tuple[np.ndarray, np.ndarray, Dict]:
+    medoids, cluster = k_medoids(
+        construct_features(ppa, btnk), k, np.random.RandomState(seed)
+    )
+    weights = np.array([np.sum(cluster == i) for i in range(k)])
+    return medoids, weights, \
+        evaluate_subset(ppa, btnk, medoids, weights, top_k)
+
+
+def main() -> NoReturn:
+    benchmark = construct_benchmark(get_configs(args.configs))
+    names = [k for k, v in benchmark]
+    designs, ppa, btnk, _ = load_profiles(
+        args.temp, [remove_suffix(k, ".riscv") for k in names]
+    )
+    info("{} designs are used to profile {} benchmarks.".format(
+            len(designs), len(names)
+        )
+    )
+    if args.num_of_benchmarks is not None:
+        candidates = [args.num_of_benchmarks]
+    else:
+        candidates = range(1, len(names) + 1)
+    for k in candidates:
+        medoids, weights, report = select_subset(
+            ppa, btnk, k, args.top_k, args.seed
+        )
+        info("{} benchmarks: {}, error: {}".format(
+                k, [names[i] for i in medoids], report
+            )
+        )
+        if report["ipc-max-ape"] <= args.tolerance and \
+            report["power-max-ape"] <= args.tolerance:
+            break
+    if args.num_of_benchmarks is None and \
+        (report["ipc-max-ape"] > args.tolerance or \
+            report["power-max-ape"] > args.tolerance):
+        warn("no subset satisfies the tolerance: {}.".format(args.tolerance))
+    dump_yaml(
+        args.output,
+        {
+            "candidate": [names[i] for i in medoids],
+            "weights": {
+                names[i]: int(w) for i, w in zip(medoids, weights)
+            },
+            "calibration-set": len(designs),
+            "error": report
+        }
+    )
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    main()
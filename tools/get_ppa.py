@@ -7,6 +7,7 @@ import sys
 import argparse
 from typing import Tuple, NoReturn
 from utils.utils import if_exist, info, warn
+from utils.artifact import if_artifact_exist, open_artifact
 
 
 def parse_args():
@@ -38,8 +39,8 @@ def get_perf(stats: str, ff=False) -> Tuple[float, float]:
     """
 
     ipc = cpi = 0
-    if if_exist(stats):
-        with open(stats, 'r') as f:
+    if if_artifact_exist(stats):
+        with open_artifact(stats, 'r') as f:
             cnt = f.readlines()
         """
             Use different CPUs based on the fast forwarding.
@@ -69,8 +70,8 @@ def get_power_area(report: str) -> Tuple[float, float]:
     p_dynamic = re.compile(r"Runtime\ Dynamic\ =\ [+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?\ W")
     p_area = re.compile(r"Area\ =\ [+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?\ mm\^2")
     subthreshold, gate, dynamic, area = 0, 0, 0, 0
-    if if_exist(report):
-        with open(report, 'r') as f:
+    if if_artifact_exist(report):
+        with open_artifact(report, 'r') as f:
             cnt = f.read()
             try:
                 subthreshold = float(p_subthreshold.findall(cnt)[1][0])
@@ -3,15 +3,11 @@
 
 import os
 import sys
-import torch
 import argparse
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
 from utils.utils import if_exist, info, mkdir
-from botorch.utils.multi_objective.pareto import is_non_dominated
-from botorch.utils.multi_objective.hypervolume import Hypervolume
-
+from utils.pareto import get_pareto_frontier, hypervolume_3d, \
+    hypervolume_curve
 
 
 """
@@ -43,7 +39,7 @@ markers = [
 colors = [
     'c', 'b', 'g', 'r', 'm', 'y', 'k', # 'w'
 ]
-ref_point = torch.Tensor([0, -1.0, -15.0])
+ref_point = np.array([0, -1.0, -15.0])
 
 
 def create_parser():
@@ -71,34 +67,25 @@ def create_parser():
     return parser
 
 
-def get_pareto_frontier(y: torch.Tensor):
-    """
-        NOTICE: `is_non_dominated` assumes maximization
-    """
-    return y[is_non_dominated(y)]
-
-
 def calc_pareto_hypervolume(ppa: np.ndarray, vis: bool = False):
-    tppa = torch.Tensor(ppa)
+    tppa = np.array(ppa, dtype=np.float64)
 
     # inverse the data
     tppa[:, 1] = -tppa[:, 1]
     tppa[:, 2] = -tppa[:, 2]
 
     # get the Pareto frontier
-    pareto_frontier = get_pareto_frontier(tppa).numpy()
+    pareto_frontier = get_pareto_frontier(tppa)
 
     # calculate Pareto hypervolume
-    hv = Hypervolume(ref_point=ref_point)
-    pareto_hypervolume = hv.compute(
-        torch.from_numpy(pareto_frontier)
-    )
+    pareto_hypervolume = hypervolume_3d(pareto_frontier, ref_point)
 
     # recover the data
     pareto_frontier[:, 1] = -pareto_frontier[:, 1]
     pareto_frontier[:, 2] = -pareto_frontier[:, 2]
 
     if vis:
+        import matplotlib.pyplot as plt
         fig = plt.figure()
         ax = fig.add_subplot(projection='3d')
         ax.scatter(
@@ -147,15 +134,12 @@ def calc_pareto_hypervolume(ppa: np.ndarray, vis: bool = False):
 def main():
     if_exist(args.solution, strict=True)
     mkdir(args.output)
-    solution = pd.read_csv(args.solution, sep="\\s+")
-    ppa = solution.values
+    # the header is "IPC Power Area"
+    ppa = np.atleast_2d(np.loadtxt(args.solution, skiprows=1))
+    calc_pareto_hypervolume(ppa)
 
     # we slide `ppa` to draw Pareto hypervolume curves
-    n_designs = ppa.shape[0]
-    hv = []
-    for i in range(1, n_designs + 1):
-        hv.append(calc_pareto_hypervolume(ppa[:i]))
-    hv = np.array(hv)
+    hv = hypervolume_curve(ppa * np.array([1, -1, -1]), ref_point)
     pareto_hy_curve = os.path.join(
         args.output, "pareto-curve.rpt"
     )
@@ -0,0 +1,112 @@
+# Author: baichen.bai@alibaba-inc.com
+
+
+import os
+import gzip
+import shutil
+import threading
+from typing import IO, Optional
+from utils.utils import if_exist
+
+
+"""
+    Bulky artifacts, e.g., "stats.txt", could be compressed to
+    "<artifact>.gz" in the result store. Readers resolve an artifact
+    with its original path, so both forms are read transparently.
+"""
+suffix = ".gz"
+
+
+def resolve_artifact(path: str) -> Optional[str]:
+    """
+        return: `path` if it is not compressed, "<path>.gz" if it is
+        compressed, otherwise, `None`.
+    """
+    if os.path.exists(path):
+        return path
+    if os.path.exists(path + suffix):
+        return path + suffix
+    return None
+
+
+def if_artifact_exist(path: str) -> bool:
+    return resolve_artifact(path) is not None
+
+
+def open_artifact(path: str, mode: str = 'r') -> IO:
+    """
+        Open `path` for reading even if it is compressed.
+    """
+    assert mode in ['r', "rb"], "artifacts are opened read-only."
+    _path = resolve_artifact(path)
+    if _path is None:
+        # raise `FileNotFoundError` like `open`
+        return open(path, mode)
+    if _path.endswith(suffix):
+        return gzip.open(_path, "rt" if mode == 'r' else "rb")
+    return open(_path, mode)
+
+
+def compress_artifact(path: str) -> int:
+    """
+        Compress `path` to "<path>.gz", and remove `path`.
+        return: bytes released.
+    """
+    if not os.path.isfile(path):
+        return 0
+    temp = "{}{}.tmp-{}-{}".format(
+        path, suffix, os.getpid(), threading.get_ident()
+    )
+    try:
+        size = os.path.getsize(path)
+        with open(path, "rb") as fin, gzip.open(temp, "wb") as fout:
+            shutil.copyfileobj(fin, fout)
+        os.replace(temp, path + suffix)
+        os.remove(path)
+        return size - os.path.getsize(path + suffix)
+    except FileNotFoundError:
+        # `path` is compressed or removed by others concurrently
+        if os.path.exists(temp):
+            os.remove(temp)
+        return 0
+
+
+def restore_artifact(path: str) -> bool:
+    """
+        Decompress "<path>.gz" in place for external tools, e.g., McPAT,
+        which cannot read compressed artifacts.
+        return: whether `path` is available.
+    """
+    if if_exist(path):
+        return True
+    if not if_exist(path + suffix):
+        return False
+    temp = "{}.tmp-{}-{}".format(path, os.getpid(), threading.get_ident())
+    try:
+        with gzip.open(path + suffix, "rb") as fin, open(temp, "wb") as fout:
+            shutil.copyfileobj(fin, fout)
+        os.replace(temp, path)
+        os.remove(path + suffix)
+    except FileNotFoundError:
+        # `path` is restored by others concurrently
+        if os.path.exists(temp):
+            os.remove(temp)
+    return if_exist(path)
+
+
+def remove_artifact(path: str) -> int:
+    """
+        Remove `path` in both forms.
+        return: bytes released.
+    """
+    size = 0
+    for _path in [path, path + suffix]:
+        if os.path.isfile(_path):
+            try:
+                _size = os.path.getsize(_path)
+                os.remove(_path)
+            except FileNotFoundError:
+                # `_path` is removed by others concurrently
+                continue
+            size += _size
+    return size
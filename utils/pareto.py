@@ -0,0 +1,232 @@
+# Author: baichen.bai@alibaba-inc.com
+
+
+import numpy as np
+from bisect import bisect_right
+from typing import List, Tuple, Union
+
+
+"""
+    Pareto utilities with NumPy, shared by the DSE engine, baselines
+    & tools. All objectives are maximized, so minimized objectives,
+    e.g., power & area, should be negated.
+"""
+
+
+def dominate(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+        return: whether `a` dominates `b`, which are broadcasted.
+    """
+    return np.all(a >= b, axis=-1) & np.any(a > b, axis=-1)
+
+
+def is_non_dominated(y: np.ndarray, deduplicate: bool = True) -> np.ndarray:
+    """
+        return: a mask of non-dominated points of `y` with the shape of
+        (n, m). For m = 2 & 3, points are sorted lexicographically in
+        the descending order, so a point is dominated iff a preceding
+        point is not worse w.r.t. the other objectives, which costs
+        O(n log n). Otherwise, points are compared pairwise in chunks.
+        If `deduplicate` is True, only the first of duplicated
+        non-dominated points is kept.
+    """
+    y = np.atleast_2d(np.array(y, dtype=np.float64))
+    n, m = y.shape
+    mask = np.zeros(n, dtype=bool)
+    if n == 0:
+        return mask
+    if m in [2, 3]:
+        order = np.lexsort([-y[:, i] for i in reversed(range(m))])
+        _y = y[order]
+        if m == 2:
+            # the maximum of the second objective of preceding points
+            best = np.concatenate(
+                [[-np.inf], np.maximum.accumulate(_y[:, 1])[:-1]]
+            )
+            keep = _y[:, 1] > best
+        else:
+            staircase = Staircase()
+            keep = np.array([
+                staircase.insert(y1, y2) for y1, y2 in _y[:, 1:]
+            ])
+        mask[order] = keep
+        if not deduplicate:
+            # duplicates of non-dominated points are non-dominated
+            _, inverse = np.unique(y, axis=0, return_inverse=True)
+            mask = np.isin(inverse.ravel(), inverse.ravel()[mask])
+        return mask
+    chunk = max(1, int(2 ** 24 // max(n * m, 1)))
+    for i in range(0, n, chunk):
+        mask[i:i + chunk] = ~np.any(
+            dominate(y[np.newaxis, :, :], y[i:i + chunk, np.newaxis, :]),
+            axis=1
+        )
+    if deduplicate:
+        _, first = np.unique(y, axis=0, return_index=True)
+        unique = np.zeros(n, dtype=bool)
+        unique[first] = True
+        mask &= unique
+    return mask
+
+
+def get_pareto_frontier(y: np.ndarray) -> np.ndarray:
+    return np.atleast_2d(np.array(y, dtype=np.float64))[is_non_dominated(y)]
+
+
+def hypervolume_2d(
+    points: Union[List[Tuple[float, float]], np.ndarray],
+    ref_point: Union[List[float], np.ndarray]
+) -> float:
+    """
+        The area dominated by `points` w.r.t. `ref_point`.
+    """
+    points = np.atleast_2d(np.array(points, dtype=np.float64)) - \
+        np.array(ref_point, dtype=np.float64)
+    points = points[np.all(points > 0, axis=1)]
+    if len(points) == 0:
+        return 0.
+    staircase = Staircase()
+    for x, y in points:
+        staircase.insert(x, y)
+    return staircase.area
+
+
+class Staircase(object):
+    """
+        A 2-D non-dominated front, whose points are relative to the
+        reference point. `xs` is ascending, and `ys` is descending.
+        The dominated area is updated incrementally, so n insertions
+        cost O(n log n) except for list shifts.
+    """
+    def __init__(self):
+        super(Staircase, self).__init__()
+        self.xs = []
+        self.ys = []
+        self.area = 0.
+
+    def insert(self, x: float, y: float) -> bool:
+        """
+            return: whether (`x`, `y`) is non-dominated.
+        """
+        hi = bisect_right(self.xs, x)
+        if hi < len(self.xs) and self.ys[hi] >= y:
+            # dominated by a point on the right
+            return False
+        if hi > 0 and self.xs[hi - 1] == x and self.ys[hi - 1] >= y:
+            return False
+        # points in [lo, hi) are dominated by (`x`, `y`)
+        lo = hi
+        while lo > 0 and self.ys[lo - 1] <= y:
+            lo -= 1
+        prev = self.xs[lo - 1] if lo > 0 else 0.
+        right = self.ys[hi] if hi < len(self.ys) else 0.
+        for j in range(lo, hi):
+            self.area += (self.xs[j] - prev) * (y - self.ys[j])
+            prev = self.xs[j]
+        self.area += (x - prev) * (y - right)
+        self.xs[lo:hi] = [x]
+        self.ys[lo:hi] = [y]
+        return True
+
+
+def hypervolume_3d(
+    points: Union[List[Tuple[float, float, float]], np.ndarray],
+    ref_point: Union[List[float], np.ndarray]
+) -> float:
+    """
+        The exact hypervolume dominated by `points` w.r.t. `ref_point`
+        with the dimension sweep, i.e., points are swept along the
+        third objective in the descending order, and the dominated
+        area of the first two objectives is maintained by `Staircase`.
+        The complexity is O(n log n) except for list shifts.
+    """
+    points = np.atleast_2d(np.array(points, dtype=np.float64)) - \
+        np.array(ref_point, dtype=np.float64)
+    points = points[np.all(points > 0, axis=1)]
+    if len(points) == 0:
+        return 0.
+    points = points[np.argsort(-points[:, 2], kind="stable")]
+    staircase = Staircase()
+    volume = 0.
+    z = points[0][2]
+    for x, y, _z in points:
+        volume += staircase.area * (z - _z)
+        staircase.insert(x, y)
+        z = _z
+    return volume + staircase.area * z
+
+
+class ParetoArchive(object):
+    """
+        A non-dominated archive of 3-D objectives, which is updated
+        incrementally with each evaluation. `items` are attached to
+        points, e.g., design indices. The hypervolume is increased by
+        the exclusive contribution of an inserted point, i.e., its box
+        except for boxes of the archive projected onto it.
+    """
+    def __init__(self, ref_point: Union[List[float], np.ndarray]):
+        super(ParetoArchive, self).__init__()
+        self.ref_point = np.array(ref_point, dtype=np.float64)
+        self.points = np.empty((0, len(self.ref_point)))
+        self.items = []
+        self.hypervolume = 0.
+
+    def __len__(self):
+        return len(self.items)
+
+    def insert(self, point: Union[List[float], np.ndarray], item=None) -> bool:
+        """
+            return: whether `point` is non-dominated, i.e., inserted.
+            Duplicated points are not inserted.
+        """
+        point = np.array(point, dtype=np.float64)
+        if len(self.points) > 0 and (
+            np.any(dominate(self.points, point)) or \
+                np.any(np.all(self.points == point, axis=1))
+        ):
+            return False
+        # the exclusive contribution of `point`
+        contribution = np.prod(np.maximum(point - self.ref_point, 0))
+        if len(self.points) > 0:
+            contribution -= hypervolume_3d(
+                np.minimum(self.points, point), self.ref_point
+            )
+        self.hypervolume += contribution
+        mask = ~dominate(point, self.points)
+        self.points = np.concatenate([self.points[mask], point[np.newaxis]])
+        self.items = [
+            item for item, keep in zip(self.items, mask) if keep
+        ] + [item]
+        return True
+
+
+def hypervolume_curve(
+    points: np.ndarray,
+    ref_point: Union[List[float], np.ndarray],
+    block: int = 1024
+) -> np.ndarray:
+    """
+        return: the hypervolume of each prefix of 3-D `points`, i.e.,
+        points[:1], points[:2], ..., points[:n]. A block of points is
+        screened against the archive at once, and only survivors are
+        inserted one by one.
+    """
+    points = np.atleast_2d(np.array(points, dtype=np.float64))
+    archive = ParetoArchive(ref_point)
+    curve = np.zeros(len(points))
+    for i in range(0, len(points), block):
+        _points = points[i:i + block]
+        survivor = np.ones(len(_points), dtype=bool) \
+            if len(archive) == 0 else ~np.any(
+                np.all(
+                    archive.points[np.newaxis, :, :] >= \
+                        _points[:, np.newaxis, :],
+                    axis=-1
+                ),
+                axis=1
+            )
+        for j in range(len(_points)):
+            if survivor[j]:
+                archive.insert(_points[j])
+            curve[i + j] = archive.hypervolume
+    return curve
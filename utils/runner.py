@@ -0,0 +1,325 @@
+# Author: baichen.bai@alibaba-inc.com
+
+
+import os
+import signal
+import asyncio
+import threading
+from typing import List, Optional, Callable
+from utils.utils import info, warn, timestamp
+
+
+"""
+    `cancel_event` is shared by all jobs of a process. It is set once
+    the process is interrupted or shut down, so running jobs, e.g.,
+    GEM5 & McPAT in their own sessions, are terminated rather than
+    orphaned.
+"""
+cancel_event = threading.Event()
+
+
+def handle_signal(signum: int, frame: object) -> None:
+    cancel_event.set()
+    if signum == signal.SIGINT:
+        raise KeyboardInterrupt()
+    raise SystemExit(128 + signum)
+
+
+def install_signal_handlers() -> None:
+    """
+        It should be called in the main thread of each process, e.g.,
+        `main` and the initializer of a process pool.
+    """
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+
+"""
+    All jobs of a process are polled by a shared event loop in a
+    daemon thread, rather than an event loop for each job. The loop is
+    created lazily, and re-created in a forked process.
+"""
+event_loop = None
+event_loop_lock = threading.Lock()
+# `running_jobs` is the number of jobs on the shared event loop
+running_jobs = 0
+running_jobs_condition = threading.Condition()
+
+
+def reset_event_loop() -> None:
+    global event_loop, event_loop_lock, running_jobs, running_jobs_condition
+    event_loop = None
+    event_loop_lock = threading.Lock()
+    running_jobs = 0
+    running_jobs_condition = threading.Condition()
+
+
+os.register_at_fork(after_in_child=reset_event_loop)
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    global event_loop
+    with event_loop_lock:
+        if event_loop is None:
+            event_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=event_loop.run_forever,
+                name="runner",
+                daemon=True
+            ).start()
+        return event_loop
+
+
+def update_running_jobs(delta: int) -> None:
+    global running_jobs
+    with running_jobs_condition:
+        running_jobs += delta
+        running_jobs_condition.notify_all()
+
+
+def cancel_jobs(timeout: float = 15) -> None:
+    """
+        Cancel all jobs of the process, and wait for them to be
+        terminated, i.e., SIGTERM & SIGKILL after the grace period.
+    """
+    cancel_event.set()
+    with running_jobs_condition:
+        running_jobs_condition.wait_for(
+            lambda: running_jobs == 0, timeout=timeout
+        )
+
+
+class JobResult(object):
+    """
+        The structured return value of a job.
+    """
+    def __init__(self, cmd: str, log: Optional[str]):
+        super(JobResult, self).__init__()
+        self.cmd = cmd
+        self.log = log
+        self.returncode = None
+        self.duration = 0
+        # the job is killed due to the wall-clock limit
+        self.timed_out = False
+        # the job is killed due to the cancellation
+        self.cancelled = False
+        # the job is stopped gracefully by `stop`
+        self.stopped = False
+
+    @property
+    def succeeded(self) -> bool:
+        return self.returncode == 0 and \
+            not self.timed_out and \
+            not self.cancelled
+
+    def __repr__(self) -> str:
+        return "JobResult(returncode={}, duration={:.2f}s, " \
+            "timed_out={}, cancelled={}, stopped={}, log={})".format(
+                self.returncode,
+                self.duration,
+                self.timed_out,
+                self.cancelled,
+                self.stopped,
+                self.log
+            )
+
+
+def limit_memory(cmd: str, memory: Optional[float]) -> str:
+    """
+        memory: the memory limit (GB) of a job
+        The limit is set by the shell with `ulimit`, rather than
+        `preexec_fn`, which is unsafe with threads, i.e., a forked
+        child could deadlock before `exec`.
+    """
+    if memory is None:
+        return cmd
+    return "ulimit -v {} || exit 1; {}".format(
+        int(memory * 1024 ** 2), cmd
+    )
+
+
+def kill_process_group(proc: asyncio.subprocess.Process, sig: int) -> None:
+    try:
+        os.killpg(proc.pid, sig)
+    except ProcessLookupError:
+        # the process group has exited
+        pass
+
+
+def get_session_processes(sid: int) -> List[int]:
+    """
+        Get processes of the session `sid` via procfs.
+    """
+    pids = []
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(os.path.join("/proc", pid, "stat"), 'r') as f:
+                stat = f.read()
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            continue
+        # the 4th field after "(comm)" is the session id
+        if int(stat[stat.rfind(')') + 2:].split()[3]) == sid:
+            pids.append(int(pid))
+    return pids
+
+
+def interrupt(proc: asyncio.subprocess.Process, target: Optional[str]) -> None:
+    """
+        Send SIGINT to processes whose executables, i.e., argv[0],
+        contain `target`, or to the whole process group if `target`
+        is `None`. It lets GEM5 exit gracefully, e.g., with statistics
+        dumped, while the shell continues to run the rest commands.
+    """
+    if target is None:
+        kill_process_group(proc, signal.SIGINT)
+        return
+    for pid in get_session_processes(proc.pid):
+        try:
+            with open(os.path.join("/proc", str(pid), "cmdline"), 'rb') as f:
+                executable = f.read().split(b'\0')[0].decode()
+            if target in executable:
+                os.kill(pid, signal.SIGINT)
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            continue
+
+
+async def terminate(
+    proc: asyncio.subprocess.Process,
+    grace: float
+) -> None:
+    """
+        Terminate the whole process group, e.g., `cd && gem5 && mv`,
+        with SIGTERM, and then SIGKILL if it does not exit in time.
+    """
+    kill_process_group(proc, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(proc.wait(), timeout=grace)
+    except asyncio.TimeoutError:
+        kill_process_group(proc, signal.SIGKILL)
+        await proc.wait()
+
+
+async def execute_async(
+    cmd: str,
+    timeout: Optional[float] = None,
+    memory: Optional[float] = None,
+    log: Optional[str] = None,
+    cancel: Optional[threading.Event] = None,
+    stop: Optional[Callable[[], bool]] = None,
+    stop_target: Optional[str] = None,
+    interval: float = 1,
+    grace: float = 10
+) -> JobResult:
+    """
+        cmd: the shell command
+        timeout: the wall-clock limit (seconds)
+        memory: the memory limit (GB)
+        log: the path of the log file to capture stdout & stderr
+        cancel: the job is cancelled once `cancel` is set
+        stop: the job is stopped gracefully with SIGINT once `stop()`
+              returns True, and the wall-clock limit still applies
+        stop_target: the process to be stopped, refer it to `interrupt`
+        interval: the polling interval (seconds)
+        grace: the time (seconds) between SIGTERM and SIGKILL
+    """
+    result = JobResult(cmd, log)
+    fout = None
+    if log is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(log)), exist_ok=True)
+        fout = open(log, 'w')
+    start = timestamp()
+    update_running_jobs(1)
+    try:
+        """
+            The job runs in a new session, so its process group can
+            be killed altogether.
+        """
+        proc = await asyncio.create_subprocess_shell(
+            limit_memory(cmd, memory),
+            stdout=fout,
+            stderr=asyncio.subprocess.STDOUT if fout is not None else None,
+            start_new_session=True
+        )
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(proc.wait(), timeout=interval)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+                if not result.stopped and stop is not None and stop():
+                    result.stopped = True
+                    interrupt(proc, stop_target)
+                if cancel is not None and cancel.is_set():
+                    result.cancelled = True
+                    await terminate(proc, grace)
+                    break
+                if timeout is not None and \
+                    timestamp() - start > timeout:
+                    result.timed_out = True
+                    await terminate(proc, grace)
+                    break
+        except asyncio.CancelledError:
+            result.cancelled = True
+            await terminate(proc, grace)
+            raise
+        result.returncode = proc.returncode
+    finally:
+        result.duration = timestamp() - start
+        if fout is not None:
+            fout.close()
+        update_running_jobs(-1)
+    return result
+
+
+def execute_with_limits(
+    cmd: str,
+    timeout: Optional[float] = None,
+    memory: Optional[float] = None,
+    log: Optional[str] = None,
+    cancel: Optional[threading.Event] = None,
+    stop: Optional[Callable[[], bool]] = None,
+    stop_target: Optional[str] = None,
+    logger=None
+) -> JobResult:
+    """
+        A synchronous wrapper of `execute_async`, which can be
+        called from any worker thread. The job is run on the shared
+        event loop, and the caller waits for it.
+        NOTICE: the caller still blocks until the job finishes, so
+        the concurrency is bounded by callers, e.g., thread pools.
+    """
+    if logger:
+        logger.info("executing: {}".format(cmd))
+    else:
+        info("executing: {}".format(cmd))
+    future = asyncio.run_coroutine_threadsafe(
+        execute_async(
+            cmd,
+            timeout=timeout,
+            memory=memory,
+            log=log,
+            cancel=cancel,
+            stop=stop,
+            stop_target=stop_target
+        ),
+        get_event_loop()
+    )
+    try:
+        result = future.result()
+    except BaseException:
+        # e.g., `KeyboardInterrupt`, and the job is terminated
+        future.cancel()
+        raise
+    if result.timed_out:
+        warn("{} is killed due to the time limit: {}s.".format(
+                cmd, timeout
+            )
+        )
+    elif result.cancelled:
+        warn("{} is cancelled.".format(cmd))
+    elif result.stopped:
+        info("{} is stopped early.".format(cmd))
+    return result
@@ -5,16 +5,15 @@ import os
 import yaml
 import time
 import csv
-import torch
+import fcntl
 import shutil
+import contextlib
 import logging
 import argparse
 import subprocess
 import numpy as np
-import pandas as pd
 from typing import Union
 from math import ceil, log
-from sklearn import metrics
 from datetime import datetime
 from utils.exceptions import NotFoundException
 
@@ -84,6 +83,19 @@ def remove(path: str):
             info("remove {}".format(path))
 
 
+@contextlib.contextmanager
+def file_lock(lock: str):
+    """
+        An exclusive file lock among threads and processes.
+    """
+    with open(lock, 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
 def copy(src, dst):
     shutil.copy(src, dst)
     info("copy from {} to {}".format(src, dst))
@@ -162,6 +174,7 @@ def load_csv(data: str, header: int = 0):
     """
         data: data path
     """
+    import pandas as pd
     if_exist(data, strict=True)
     return np.array(pd.read_csv(data, header=header))
 
@@ -171,6 +184,7 @@ def load_xlsx(path: str, sheet_name: Union[int, str] = 0):
         path: xlsx root path
         sheet_name: sheet name
     """
+    import pandas as pd
     if_exist(path, strict=True, quiet=False)
     data = pd.read_excel(path, sheet_name=sheet_name)
     info("read the sheet {} of excel from {}".format(sheet_name, path))
@@ -217,6 +231,7 @@ def write_xlsx(path: str, data: np.ndarray, features: np.ndarray):
         data: the saved data
         features: the corresponding column names
     """
+    import pandas as pd
     writer = pd.ExcelWriter(path)
     _data = pd.DataFrame(data)
     _data.columns = features
@@ -234,6 +249,7 @@ def mse(gt: np.ndarray, predict: np.ndarray):
         gt: the ground truth
         predict: the predictions
     """
+    from sklearn import metrics
     return metrics.mean_squared_error(gt, predict)
 
 
@@ -242,6 +258,7 @@ def r2(gt: np.ndarray, predict: np.ndarray):
         gt: the ground truth
         predict: the predictions
     """
+    from sklearn import metrics
     return metrics.r2_score(gt, predict)
 
 
@@ -250,6 +267,7 @@ def mape(gt: np.ndarray, predict: np.ndarray):
         gt: the ground truth
         predict: the predictions
     """
+    from sklearn import metrics
     return metrics.mean_absolute_percentage_error(gt, predict)
 
 